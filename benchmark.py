@@ -0,0 +1,225 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from mock_site import FakeSocksProxy, MockSite
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_BASELINE_FILE = "benchmark_baselines.json"
+SELECTOR = "p.item"
+# Settings each scraping mode adds on top of the common benchmark settings
+MODES = {
+    "plain": {},
+    "stream": {"stream_parse": True},
+    "parse-workers": {"parse_workers": 2},
+    "paginate": {"pagination": True},
+    "crawl": {"crawl": True},
+    "tor": {"network_option": "Tor Network", "tor_isolation_streams": 2},
+    "js": {"js_render": True},
+}
+DEFAULT_MODES = ["plain", "stream", "parse-workers", "paginate", "crawl", "tor"]
+# Reported figures; for these lower is better, for the rest higher is better
+LOWER_IS_BETTER = ("fetch_p50", "fetch_p95", "fetch_p99", "parse_p50", "parse_p95", "parse_p99",
+                   "elapsed", "cpu_seconds", "peak_rss_mb")
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be measured"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1048576 if sys.platform == "darwin" else peak / 1024
+
+
+def run_mode(urls, settings, results):
+    """Runs one scraping mode in a fresh process and puts its figures on ``results``"""
+    from modules.engine import ScrapeEngine
+    engine = ScrapeEngine(settings)
+    cpu_started = os.times()
+    started = time.perf_counter()
+    count = engine.run(urls, SELECTOR, output_path=os.devnull)
+    elapsed = time.perf_counter() - started
+    cpu = os.times()
+    snapshot = engine.metrics.snapshot()
+    stages = snapshot["stages"]
+    figures = {
+        "elapsed": elapsed,
+        "elements": count,
+        "requests": snapshot["counters"]["requests"],
+        "errors": len(engine.errors),
+        "requests_per_second": snapshot["counters"]["requests"] / elapsed if elapsed else 0.0,
+        # Parse workers count once they have exited
+        "cpu_seconds": sum(cpu[:4]) - sum(cpu_started[:4]),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    for stage in ("fetch", "parse"):
+        for percentile in ("p50", "p95", "p99"):
+            figures[f"{stage}_{percentile}"] = stages[stage][percentile] if stage in stages else None
+    results.put(figures)
+
+
+def benchmark_mode(mode, urls, settings, repeat):
+    """Median figures of ``repeat`` runs of one mode, each in its own process"""
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        results = context.Queue()
+        process = context.Process(target=run_mode, args=(urls, settings, results))
+        process.start()
+        while True:
+            try:
+                figures = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    raise RuntimeError(f"{mode} run failed (exit code {process.exitcode})")
+        process.join()
+        runs.append(figures)
+    return {key: statistics.median(run[key] for run in runs) if runs[0][key] is not None else None
+            for key in runs[0]}
+
+
+def mode_settings(mode, args, socks_proxy):
+    settings = {
+        "request_delay": 0,
+        "page_delay": 0,
+        "timeout": 30,
+        "max_concurrency": args.concurrency,
+        "per_host_concurrency": args.per_host,
+        "parser": args.parser,
+        "max_pages": args.pagination_depth,
+        "crawl_max_pages": args.pages,
+        "crawl_max_depth": 100,
+        "dedup_records": False,
+        "dedup_pages": False,
+    }
+    settings.update(MODES[mode])
+    if mode == "tor":
+        settings["tor_socks_ip"] = "127.0.0.1"
+        settings["tor_socks_port"] = socks_proxy.port
+    return settings
+
+
+def format_figure(key, value):
+    if value is None:
+        return "-"
+    if key.startswith(("fetch_", "parse_")):
+        return f"{value * 1000:.1f}ms"
+    if key in ("elapsed", "cpu_seconds"):
+        return f"{value:.2f}s"
+    if key == "peak_rss_mb":
+        return f"{value:.0f}MB"
+    if key == "requests_per_second":
+        return f"{value:.1f}"
+    return str(value)
+
+
+def print_table(results, baseline=None):
+    columns = ["requests_per_second", "fetch_p50", "fetch_p95", "fetch_p99", "parse_p50", "cpu_seconds",
+               "peak_rss_mb", "elements", "errors"]
+    headers = ["mode", "req/s", "fetch p50", "fetch p95", "fetch p99", "parse p50", "cpu", "peak rss", "elements",
+               "errors"]
+    rows = []
+    for mode, figures in results.items():
+        row = [mode]
+        for key in columns:
+            cell = format_figure(key, figures[key])
+            previous = (baseline or {}).get(mode, {}).get(key)
+            if previous and figures[key] is not None and key not in ("elements", "errors"):
+                change = (figures[key] - previous) / previous * 100
+                better = change < 0 if key in LOWER_IS_BETTER else change > 0
+                cell += f" ({change:+.0f}%{'' if abs(change) < 5 else ' better' if better else ' worse'})"
+            row.append(cell)
+        rows.append(row)
+    widths = [max(len(str(row[index])) for row in [headers] + rows) for index in range(len(headers))]
+    for row in [headers] + rows:
+        print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
+
+
+def load_baselines(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the scraping modes against a local mock site.")
+    parser.add_argument("--modes", default=",".join(DEFAULT_MODES),
+                        help=f"Comma-separated modes to run: {', '.join(MODES)} (default: all but js)")
+    parser.add_argument("--pages", type=int, default=200, help="URLs to scrape (pages to crawl in crawl mode)")
+    parser.add_argument("--page-size", type=int, default=20, help="Page size in KB (default: 20)")
+    parser.add_argument("--elements", type=int, default=50, help="Matching elements per page (default: 50)")
+    parser.add_argument("--pagination-depth", type=int, default=5, help="Pages per URL in paginate mode (default: 5)")
+    parser.add_argument("--latency", type=float, default=20, help="Server latency per response in ms (default: 20)")
+    parser.add_argument("--jitter", type=float, default=10, help="Extra random latency of up to this many ms (default: 10)")
+    parser.add_argument("--socks-latency", type=float, default=50,
+                        help="Delay per new connection through the fake SOCKS proxy in ms (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum requests in flight (default: 16)")
+    parser.add_argument("--per-host", type=int, default=16, help="Maximum requests in flight per host (default: 16)")
+    parser.add_argument("--parser", default="html.parser", help="HTML parser backend (default: html.parser)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per mode; the median is reported (default: 1)")
+    parser.add_argument("--baseline-file", default=DEFAULT_BASELINE_FILE,
+                        help=f"File baselines are stored in (default: {DEFAULT_BASELINE_FILE})")
+    parser.add_argument("--save", metavar="NAME", help="Store the results as baseline NAME")
+    parser.add_argument("--compare", metavar="NAME", help="Show changes against baseline NAME")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        print(f"Error: unknown mode(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    baselines = load_baselines(args.baseline_file)
+    if args.compare and args.compare not in baselines:
+        print(f"Error: no baseline named {args.compare} in {args.baseline_file}", file=sys.stderr)
+        return 2
+    config = {key: getattr(args, key) for key in ("pages", "page_size", "elements", "pagination_depth", "latency",
+                                                  "jitter", "socks_latency", "concurrency", "per_host", "parser")}
+    if args.compare and baselines[args.compare]["config"] != config:
+        print(f"Warning: baseline {args.compare} was recorded with different options: "
+              f"{baselines[args.compare]['config']}", file=sys.stderr)
+
+    site = MockSite(page_size=args.page_size * 1024, elements=args.elements, pagination_depth=args.pagination_depth,
+                    latency=args.latency / 1000, jitter=args.jitter / 1000).start()
+    socks_proxy = FakeSocksProxy(connect_latency=args.socks_latency / 1000).start()
+    results = {}
+    try:
+        for mode in modes:
+            print(f"Running {mode}...", file=sys.stderr)
+            urls = site.urls(1 if mode == "crawl" else args.pages)
+            try:
+                results[mode] = benchmark_mode(mode, urls, mode_settings(mode, args, socks_proxy), args.repeat)
+            except RuntimeError as e:
+                print(f"Error: {e}", file=sys.stderr)
+    finally:
+        site.close()
+        socks_proxy.close()
+
+    print_table(results, baselines[args.compare]["results"] if args.compare else None)
+    if args.save:
+        baselines[args.save] = {"created": datetime.now().isoformat(timespec="seconds"), "config": config,
+                                "results": results}
+        with open(args.baseline_file, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"Saved baseline {args.save} to {args.baseline_file}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+import argparse
+import getpass
+import json
+import sys
+from modules.engine import ScrapeEngine
+from modules.exporters import EXPORT_FORMATS
+from modules.parsing import PARSERS, ExtractionSchema
+from modules.selector_catalog import find_selector
+from modules.javascript_rendering import WAIT_STRATEGIES, RESOURCE_TYPE_PATTERNS
+from modules.network import TOR_SOCKS_PORT
+from modules.proxy_pool import load_proxy_file
+
+NETWORK_OPTIONS = {
+    "own": "Own Network",
+    "proxy": "HTTP Proxy",
+    "tor": "Tor Network",
+}
+
+
+def load_settings(path):
+    """Loads a settings.json file written by the GUI, if one exists."""
+    if not path:
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def read_urls(args):
+    """Collects URLs from the command line and the optional URL file."""
+    urls = list(args.urls)
+    if args.url_file:
+        with open(args.url_file, "r", encoding="utf-8") as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    return urls
+
+
+def build_schema(args):
+    """Combines --selector and --field options into a selector or an extraction schema."""
+    fields = {}
+    if args.selector:
+        fields["selector"] = args.selector
+    for field in args.field:
+        name, sep, selector = field.partition("=")
+        if not sep:
+            selector = find_selector(field)
+            if selector is None:
+                raise ValueError(f"Unknown selector label: {field}")
+        fields[name.strip()] = selector.strip()
+    if not fields:
+        raise ValueError("Give a --selector or at least one --field.")
+    if len(fields) == 1 and args.selector:
+        return args.selector
+    return ExtractionSchema(fields)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless batch web scraper with Tor support.")
+    parser.add_argument("urls", nargs="*", help="URLs to scrape")
+    parser.add_argument("-f", "--url-file", help="File with one URL per line")
+    parser.add_argument("-s", "--selector", help="CSS selector to extract")
+    parser.add_argument("--field", action="append", default=[],
+                        help="Extract a named field in the same pass: NAME=SELECTOR or a catalog label such as 'Links (a)' (repeatable)")
+    parser.add_argument("-o", "--output", help="File the extracted text is appended to (default: stdout)")
+    parser.add_argument("--settings", default="settings.json", help="Settings file shared with the GUI")
+    parser.add_argument("--network", choices=NETWORK_OPTIONS.keys(), help="Network to scrape through")
+    parser.add_argument("--proxy", help="HTTP proxy address (host:port)")
+    parser.add_argument("--proxy-list", help="File with one proxy per line to rotate through (implies --network proxy)")
+    parser.add_argument("--proxy-check-url", help="URL used to health-check idle and quarantined proxies")
+    parser.add_argument("--proxy-check-interval", type=float,
+                        help="Seconds between background proxy health checks, 0 to disable (default: 60)")
+    parser.add_argument("--login-url", help="Page with the login form; the session logs in there before scraping")
+    parser.add_argument("--username", help="Login username")
+    parser.add_argument("--password", help="Login password (prompted for if omitted)")
+    parser.add_argument("--login-check", help="Text that only appears on pages when logged in")
+    parser.add_argument("--session-dir", help="Where login cookies are kept between jobs (default: ~/.web_scraper_sessions)")
+    parser.add_argument("--fresh-login", action="store_true", help="Ignore saved login cookies and log in again")
+    parser.add_argument("--tor-socks-ip", help="Tor SOCKS IP")
+    parser.add_argument("--tor-socks-port", type=int, help=f"Tor SOCKS port (default: {TOR_SOCKS_PORT})")
+    parser.add_argument("--tor-socks-ports", help="Comma-separated SOCKS ports to spread Tor requests across")
+    parser.add_argument("--tor-isolation", type=int, help="Isolated circuits per SOCKS port (via SOCKS credentials)")
+    parser.add_argument("--tor-control-port", type=int, help="Tor control port used for identity rotation")
+    parser.add_argument("--tor-password", help="Tor control password")
+    parser.add_argument("--rotate-every", type=int, help="Request a new Tor identity every N requests")
+    parser.add_argument("--rotate-on-block", action="store_true", help="Request a new Tor identity on 403/429 responses")
+    parser.add_argument("--rotate-latency-factor", type=float,
+                        help="Request a new Tor identity when latency exceeds this multiple of the average")
+    parser.add_argument("--js", action="store_true", help="Render pages with headless Chrome")
+    parser.add_argument("--render-wait", type=float, help="Seconds to wait after a page has rendered (fixed strategy)")
+    parser.add_argument("--wait-strategy", choices=WAIT_STRATEGIES,
+                        help="When a rendered page is complete: fixed delay, selector present, network idle or DOM stable")
+    parser.add_argument("--block", help="Resource types Chrome should not download, matched by URL extension "
+                                         "(images by type): " + ",".join(RESOURCE_TYPE_PATTERNS))
+    parser.add_argument("--block-url", action="append", help="URL pattern Chrome should not download (repeatable, * wildcards)")
+    parser.add_argument("--no-images", action="store_true", help="Disable images in Chrome")
+    parser.add_argument("--lightweight", action="store_true", help="Block images, fonts, media and trackers in Chrome")
+    parser.add_argument("--render-timeout", type=float, help="Hard limit in seconds for the wait strategy")
+    parser.add_argument("--chrome-driver", help="Path to chromedriver")
+    parser.add_argument("--browsers", type=int, help="Headless Chrome instances rendering in parallel (default: 2)")
+    parser.add_argument("--browser-max-pages", type=int, help="Restart a Chrome instance after this many pages")
+    parser.add_argument("--paginate", action="store_true", help="Follow ?page=N pagination")
+    parser.add_argument("--max-pages", type=int, help="Maximum number of pages per URL")
+    parser.add_argument("--page-delay", type=float, help="Delay between pages in seconds")
+    parser.add_argument("--crawl", action="store_true", help="Follow links from the given URLs")
+    parser.add_argument("--depth", type=int, help="Maximum link depth when crawling (default: 2)")
+    parser.add_argument("--crawl-max-pages", type=int, help="Maximum number of pages to crawl (default: 1000)")
+    parser.add_argument("--follow", help="Only follow links matching this regular expression")
+    parser.add_argument("--exclude", help="Never follow links matching this regular expression")
+    parser.add_argument("--prefer", help="Crawl links matching this regular expression first")
+    parser.add_argument("--any-host", action="store_true", help="Follow links to other hosts too")
+    parser.add_argument("--crawl-delay", type=float, help="Seconds between requests to the same host while crawling")
+    parser.add_argument("--delay", type=float, help="Delay between URLs in seconds")
+    parser.add_argument("--timeout", type=int, help="Request timeout in seconds")
+    parser.add_argument("--concurrency", type=int, help="Maximum number of requests in flight (default: 16)")
+    parser.add_argument("--per-host", type=int, help="Maximum number of requests in flight per host (default: 4)")
+    parser.add_argument("--no-autothrottle", action="store_true",
+                        help="Use a fixed per-host limit instead of adapting to latency and 429/503 responses")
+    parser.add_argument("--max-host-delay", type=float, help="Longest delay between requests to one host (default: 60)")
+    parser.add_argument("--parser", choices=PARSERS, help="HTML parser backend (default: html.parser)")
+    parser.add_argument("--no-strain", action="store_true", help="Always build the full document tree")
+    parser.add_argument("--parse-workers", type=int, help="Parse pages in this many worker processes (default: in-thread)")
+    parser.add_argument("--stream", action="store_true", help="Extract matches while pages download (simple selectors)")
+    parser.add_argument("--pool-size", type=int, help="Keep-alive connections kept open per host (default: 10)")
+    parser.add_argument("--cache", action="store_true", help="Cache responses on disk and revalidate stale ones")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the response cache even if the settings enable it")
+    parser.add_argument("--cache-dir", help="Response cache directory (default: ~/.web_scraper_cache)")
+    parser.add_argument("--cache-max-mb", type=float, help="Response cache size limit in MB (default: 500)")
+    parser.add_argument("--cache-min-ttl", type=float,
+                        help="Treat cached responses as fresh for at least this many seconds")
+    parser.add_argument("--resume", action="store_true",
+                        help="Checkpoint progress and, if this job was interrupted before, continue where it stopped")
+    parser.add_argument("--checkpoint-dir", help="Checkpoint directory (default: ~/.web_scraper_checkpoints)")
+    parser.add_argument("--drop-duplicates", action="store_true",
+                        help="Drop records identical to ones already output, even repeated values in different rows")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="Keep records identical to ones already output (the default; overrides saved settings)")
+    parser.add_argument("--no-page-dedup", action="store_true",
+                        help="Keep paginating when a page repeats an earlier one")
+    parser.add_argument("--dedup-dir", help="Directory for spilling record hashes to disk on very large crawls")
+    parser.add_argument("--rotate-user-agents", action="store_true", help="Use a random user agent per request")
+    parser.add_argument("--export", "--csv", dest="export",
+                        help="Also write the extracted elements to this file as they arrive (.csv, .jsonl or .parquet)")
+    parser.add_argument("--export-format", choices=EXPORT_FORMATS, help="Export format (default: from the file extension)")
+    parser.add_argument("--export-fields", "--csv-fields", dest="export_fields",
+                        help="Comma-separated export columns: text, field, tag, url, page or attribute names (default: text,href)")
+    parser.add_argument("--metrics", help="Write request timings and counters to this file (.json, otherwise Prometheus text)")
+    parser.add_argument("--metrics-format", choices=("json", "prometheus"), help="Metrics file format (default: from the extension)")
+    parser.add_argument("--metrics-interval", type=float, help="Seconds between metrics file updates during a run (default: 10)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the run: time and memory per stage, plus flame graph input next to the results")
+    parser.add_argument("--profile-dir", help="Directory for the profile files (default: next to the export or output file)")
+    parser.add_argument("--profile-interval", type=float, help="Seconds between stack samples (default: 0.005)")
+    parser.add_argument("--no-profile-memory", action="store_true", help="Do not track allocations while profiling")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    urls = read_urls(args)
+    if not urls:
+        print("Error: no URLs given.", file=sys.stderr)
+        return 2
+    try:
+        schema = build_schema(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    settings = load_settings(args.settings)
+    overrides = {
+        "network_option": NETWORK_OPTIONS.get(args.network),
+        "proxy_address": args.proxy,
+        "proxy_list": load_proxy_file(args.proxy_list) if args.proxy_list else None,
+        "proxy_check_url": args.proxy_check_url,
+        "proxy_check_interval": args.proxy_check_interval,
+        "login_url": args.login_url,
+        "login_username": args.username,
+        "login_check_text": args.login_check,
+        "session_dir": args.session_dir,
+        "metrics_path": args.metrics,
+        "metrics_format": args.metrics_format,
+        "metrics_interval": args.metrics_interval,
+        "profile_dir": args.profile_dir,
+        "profile_interval": args.profile_interval,
+        "tor_socks_ip": args.tor_socks_ip,
+        "tor_socks_port": args.tor_socks_port,
+        "tor_socks_ports": args.tor_socks_ports,
+        "tor_isolation_streams": args.tor_isolation,
+        "tor_port": args.tor_control_port,
+        "tor_password": args.tor_password,
+        "tor_rotate_every": args.rotate_every,
+        "tor_rotate_latency_factor": args.rotate_latency_factor,
+        "render_wait": args.render_wait,
+        "wait_strategy": args.wait_strategy,
+        "render_timeout": args.render_timeout,
+        "block_resource_types": [t.strip() for t in args.block.split(",")] if args.block else None,
+        "block_url_patterns": args.block_url,
+        "chrome_driver_path": args.chrome_driver,
+        "browser_pool_size": args.browsers,
+        "browser_max_pages": args.browser_max_pages,
+        "max_pages": args.max_pages,
+        "page_delay": args.page_delay,
+        "request_delay": args.delay,
+        "timeout": args.timeout,
+        "max_concurrency": args.concurrency,
+        "per_host_concurrency": args.per_host,
+        "pool_maxsize": args.pool_size,
+        "parser": args.parser,
+        "parse_workers": args.parse_workers,
+        "cache_dir": args.cache_dir,
+        "cache_max_mb": args.cache_max_mb,
+        "cache_min_ttl": args.cache_min_ttl,
+        "dedup_dir": args.dedup_dir,
+        "checkpoint_dir": args.checkpoint_dir,
+        "crawl_max_depth": args.depth,
+        "crawl_max_pages": args.crawl_max_pages,
+        "crawl_follow": args.follow,
+        "crawl_exclude": args.exclude,
+        "crawl_priority_pattern": args.prefer,
+        "crawl_delay": args.crawl_delay,
+        "throttle_max_delay": args.max_host_delay,
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    if args.proxy_list and not args.network:
+        settings["network_option"] = "HTTP Proxy"
+    settings["js_render"] = args.js
+    settings["pagination"] = args.paginate
+    settings["crawl"] = args.crawl
+    if args.any_host:
+        settings["crawl_same_host"] = False
+    if args.rotate_user_agents:
+        settings["rotate_user_agents"] = True
+    if args.no_strain:
+        settings["strain"] = False
+    if args.stream:
+        settings["stream_parse"] = True
+    if args.no_images:
+        settings["disable_images"] = True
+    if args.lightweight:
+        settings["js_lightweight"] = True
+    if args.rotate_on_block:
+        settings["tor_rotate_on_block"] = True
+    if args.cache or args.cache_dir:
+        settings["http_cache"] = True
+    if args.no_cache:
+        settings["http_cache"] = False
+    if args.no_autothrottle:
+        settings["autothrottle"] = False
+    if args.profile or args.profile_dir:
+        settings["profile"] = True
+    if args.no_profile_memory:
+        settings["profile_memory"] = False
+    if args.resume:
+        settings["checkpoint"] = True
+    if args.drop_duplicates:
+        settings["dedup_records"] = True
+    if args.keep_duplicates:
+        settings["dedup_records"] = False
+    if args.no_page_dedup:
+        settings["dedup_pages"] = False
+
+    if args.password:
+        settings["login_password"] = args.password
+    elif settings.get("login_url") and settings.get("login_username") and not settings.get("login_password"):
+        settings["login_password"] = getpass.getpass(f"Password for {settings['login_username']}: ")
+
+    engine = ScrapeEngine(settings, on_status=lambda message: print(message, file=sys.stderr))
+    if args.fresh_login and engine.session_manager:
+        engine.session_manager.discard()
+    text_line = ExtractionSchema.coerce(schema).text_line
+
+    def print_records(url, elements):
+        if elements:
+            print("\n".join(map(text_line, elements)))
+
+    on_result = None if args.output else print_records
+    export_fields = [f.strip() for f in args.export_fields.split(",") if f.strip()] if args.export_fields else None
+    try:
+        count = engine.run(urls, schema, output_path=args.output, on_result=on_result,
+                           export_path=args.export, export_fields=export_fields, export_format=args.export_format)
+    except KeyboardInterrupt:
+        engine.stop()
+        return 130
+
+    for url, message in engine.errors:
+        print(f"{url}: {message}", file=sys.stderr)
+    if args.crawl:
+        print(f"Scraped {count} elements from {engine.processed - len(engine.errors)}/{engine.processed} crawled pages.",
+              file=sys.stderr)
+    else:
+        print(f"Scraped {count} elements from {len(urls) - len(engine.errors)}/{len(urls)} URLs.", file=sys.stderr)
+    return 1 if engine.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
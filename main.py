@@ -1,139 +1,60 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import requests
-from bs4 import BeautifulSoup
 import threading
-import random
-from stem import Signal
-from stem.control import Controller
-import time
 import os
 import json
-from modules.pagination_csv import PaginationHandler, CSVExporter
-from modules.javascript_rendering import JavaScriptRenderer
-from modules.form_submission import FormSubmitter
+import queue
+import re
+from modules.engine import ScrapeEngine
+from modules.exporters import DEFAULT_FIELDS, EXPORT_FORMATS, export_format_for, open_writer
+from modules.http_cache import DEFAULT_CACHE_MAX_MB
+from modules.http_pool import create_session
+from modules.parsing import PARSERS, ExtractionSchema
+from modules.selector_catalog import CSS_SELECTORS
+from modules.browser_pool import BrowserPool
+from modules.javascript_rendering import WAIT_FIXED, WAIT_SELECTOR, WAIT_NETWORK_IDLE, WAIT_DOM_STABLE
+from modules.network import TOR_SOCKS_PORT, DEFAULT_TOR_CONTROL_PORT, build_proxies
+from modules.proxy_pool import load_proxy_file
+from modules.result_spool import ResultSpool
+from modules.tor_control import TorIdentityRotator
 
 # --- Constants ---
-TOR_SOCKS_PORT = 9150  # Default Tor Browser SOCKS port
-DEFAULT_TOR_CONTROL_PORT = 9051  # Default Tor Control port
 DEFAULT_SAVE_DIR = os.path.expanduser("~")
 SETTINGS_FILE = "settings.json"
-
-# --- Enhanced CSS Selectors ---
-CSS_SELECTORS = {
-    "Whole Website": {
-        "Entire Page": "*"
-    },
-    "Basic Elements": {
-        "All Elements": "*",
-        "Headings (h1-h6)": "h1, h2, h3, h4, h5, h6",
-        "Paragraphs (p)": "p",
-        "Spans (span)": "span",
-        "Divs (div)": "div",
-        "Links (a)": "a",
-        "Images (img)": "img",
-        "Forms (form)": "form",
-        "Buttons (button)": "button",
-        "Inputs (input)": "input",
-        "Textareas (textarea)": "textarea",
-    },
-    "Headings": {
-        "Heading 1 (h1)": "h1",
-        "Heading 2 (h2)": "h2",
-        "Heading 3 (h3)": "h3",
-        "Heading 4 (h4)": "h4",
-        "Heading 5 (h5)": "h5",
-        "Heading 6 (h6)": "h6",
-    },
-    "Text": {
-        "Paragraphs": "p",
-        "Strong Text (strong)": "strong",
-        "Emphasized Text (em)": "em",
-        "Line Breaks (br)": "br",
-    },
-    "Lists": {
-        "Unordered Lists (ul)": "ul",
-        "Ordered Lists (ol)": "ol",
-        "List Items (li)": "li",
-    },
-    "Tables": {
-        "Tables": "table",
-        "Table Headers (th)": "th",
-        "Table Rows (tr)": "tr",
-        "Table Data Cells (td)": "td",
-    },
-    "Media": {
-        "Links": "a",
-        "Images": "img",
-        "Audio (audio)": "audio",
-        "Video (video)": "video",
-    },
-    "Attributes": {
-        "Links with href attribute": "a[href]",
-        "Images with src attribute": "img[src]",
-        "Elements with specific id": "#example-id",  # Replace example-id
-        "Elements with specific class": ".example-class",  # Replace example-class
-        "Elements with data attribute": "[data-value]", # Example data attribute
-        "Links with rel='nofollow'": "a[rel='nofollow']",
-        "Images with alt text": "img[alt]",
-    },
-    "Combinators": {
-        "Child elements": "parent > child",
-        "Descendant elements": "ancestor descendant",
-        "Adjacent sibling elements": "previous + next",
-        "General sibling elements": "element ~ siblings",
-    },
-    "Pseudo-classes": {
-        "First child": ":first-child",
-        "Last child": ":last-child",
-        "Nth child (even)": ":nth-child(even)",
-        "Nth child (odd)": ":nth-child(odd)",
-        "Hover state": ":hover",
-        "Focus state": ":focus",
-    },
-    "Forms": {
-        "Input fields": "input[type='text']",
-        "Password fields": "input[type='password']",
-        "Submit buttons": "input[type='submit'], button[type='submit']",
-        "Checkboxes": "input[type='checkbox']",
-        "Radio buttons": "input[type='radio']",
-        "Select dropdowns": "select",
-        "Option elements": "option",
-    },
-    "Custom": ""
+UI_POLL_MS = 100  # How often worker updates are applied to the widgets
+UI_MAX_UPDATES = 1000  # Queued updates applied per poll
+OUTPUT_MAX_LINES = 5000  # Records kept in the output pane; every record is in the spool file
+PAGER_PAGE_SIZE = 1000
+METRICS_REFRESH_MS = 1000  # How often the metrics panel is redrawn
+
+# --- Render completion strategies shown in the JavaScript Rendering frame ---
+WAIT_STRATEGY_LABELS = {
+    "Fixed delay": WAIT_FIXED,
+    "Selector": WAIT_SELECTOR,
+    "Network idle": WAIT_NETWORK_IDLE,
+    "DOM stable": WAIT_DOM_STABLE,
 }
 
 # --- Helper Functions ---
+def is_valid_pattern(pattern):
+    """Checks that a link-following pattern compiles as a regular expression."""
+    try:
+        re.compile(pattern)
+        return True
+    except re.error:
+        return False
+
 
-def get_random_user_agent():
-    """Returns a random user agent from a predefined list."""
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15",
-        "Mozilla/5.0 (iPad; CPU OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1 Mobile/15E148 Safari/604.1"
-    ]
-    return random.choice(user_agents)
-
-def test_connection(network_option, proxy_address="", tor_control_password="", tor_control_port=DEFAULT_TOR_CONTROL_PORT, tor_socks_ip="127.0.0.1", tor_socks_port=TOR_SOCKS_PORT):
+def test_connection(network_option, proxy_address="", tor_control_password="", tor_control_port=DEFAULT_TOR_CONTROL_PORT, tor_socks_ip="127.0.0.1", tor_socks_port=TOR_SOCKS_PORT, session=None):
     """Tests the connection for the selected network option."""
-    proxies = {}
-    if network_option == "HTTP Proxy":
-        proxies = {
-            'http': f'http://{proxy_address}',
-            'https': f'http://{proxy_address}'
-        }
-    elif network_option == "Tor Network":
-        proxies = {
-            'http': f'socks5h://{tor_socks_ip}:{tor_socks_port}',
-            'https': f'socks5h://{tor_socks_ip}:{tor_socks_port}'
-        }
+    session = session or requests
+    proxies = build_proxies(network_option, proxy_address, tor_socks_ip, tor_socks_port)
 
     test_url = "https://check.torproject.org/" if network_option == "Tor Network" else "https://api.ipify.org?format=json"
 
     try:
-        response = requests.get(test_url, proxies=proxies, timeout=10)
+        response = session.get(test_url, proxies=proxies, timeout=10, headers={'Cache-Control': 'no-store'})
         response.raise_for_status()
 
         if network_option == "Tor Network":
@@ -160,128 +81,41 @@ class ScrapeThread(threading.Thread):
         self.tor_port = tor_port
         self.settings = settings
         self.running = True
+        self.engine = None
 
     def stop(self):
         """Stops the scraping thread."""
         self.running = False
+        if self.engine:
+            self.engine.stop()
+
+    def on_result(self, url, elements):
+        """Spools a batch of records, then hands them to the main loop for display."""
+        self.app.result_spool.append(elements)
+        self.app.post("result", elements)
 
     def run(self):
         """Performs the web scraping."""
-        self.app.update_progress(0)
+        # Widgets are only touched from the Tk main loop; every update goes through the app's queue
+        self.engine = ScrapeEngine(self.settings, session=self.app.http_session, browser_pool=self.app.browser_pool,
+                                   on_progress=lambda value: self.app.post("progress", value),
+                                   on_status=lambda message: self.app.post("status", message))
         try:
-            headers = {}
-            if self.settings.get("rotate_user_agents", False):
-                headers['User-Agent'] = get_random_user_agent()
-
-            proxies = {}
-            if self.network_option == "HTTP Proxy":
-                if self.proxy_list:
-                    # Rotate proxies with error handling
-                    max_retries = len(self.proxy_list)
-                    retries = 0
-                    while retries < max_retries:
-                        try:
-                            proxy = self.proxy_list[self.current_proxy_index]
-                            proxies = {'http': f'http://{proxy}', 'https': f'http://{proxy}'}
-                            
-                            # Test the proxy
-                            test_response = requests.get("https://api.ipify.org?format=json",
-                                                       proxies=proxies,
-                                                       timeout=5)
-                            test_response.raise_for_status()
-                            
-                            # Update status with current proxy
-                            self.app.status_label.config(text=f"Using proxy: {proxy}")
-                            self.current_proxy_index = (self.current_proxy_index + 1) % len(self.proxy_list)
-                            break
-                        except Exception as e:
-                            # Mark bad proxy and try next one
-                            self.proxy_list.pop(self.current_proxy_index)
-                            if not self.proxy_list:
-                                raise Exception("All proxies failed")
-                            if self.current_proxy_index >= len(self.proxy_list):
-                                self.current_proxy_index = 0
-                            retries += 1
-                else:
-                    proxies = {'http': f'http://{self.proxy_address}', 'https': f'http://{self.proxy_address}'}
-            elif self.network_option == "Tor Network":
-                proxies = {'http': f'socks5h://{self.settings.get("tor_socks_ip", "127.0.0.1")}:{self.settings.get("tor_socks_port", TOR_SOCKS_PORT)}', 'https': f'socks5h://{self.settings.get("tor_socks_ip", "127.0.0.1")}:{self.settings.get("tor_socks_port", TOR_SOCKS_PORT)}'}
-
-            self.app.update_progress(10)
-            
-            # Initialize JavaScript renderer if enabled
-            js_renderer = None
-            if self.app.js_render_var.get():
-                js_renderer = JavaScriptRenderer({
-                    'timeout': self.settings.get("timeout", 10),
-                    'render_wait': self.app.js_wait_var.get(),
-                    'proxy': proxies.get('http') if proxies else None
-                })
-
-            # Initialize pagination handler if enabled
-            if self.app.pagination_var.get():
-                pagination_handler = PaginationHandler(
-                    self.url,
-                    self.selector,
-                    {
-                        'pagination_selector': 'a[href*="page"]',
-                        'max_pages': self.app.max_pages_var.get(),
-                        'page_delay': self.app.page_delay_var.get()
-                    }
-                )
-                
-                # Scrape all pages
-                if js_renderer:
-                    all_elements = []
-                    for page_url in pagination_handler.get_all_page_urls():
-                        soup = js_renderer.render_page(page_url)
-                        all_elements.extend(soup.select(self.selector))
-                else:
-                    all_elements = pagination_handler.scrape_all_pages()
-                    
-                scraped_data = "\n".join([element.text.strip() for element in all_elements if self.running])
-            else:
-                # Single page scraping
-                if js_renderer:
-                    soup = js_renderer.render_page(self.url)
-                    elements = soup.select(self.selector)
-                else:
-                    response = requests.get(self.url, headers=headers, proxies=proxies, timeout=self.settings.get("timeout", 10))
-                    response.raise_for_status()
-                    self.app.update_progress(30)
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    elements = soup.select(self.selector)
-                    
-                scraped_data = "\n".join([element.text.strip() for element in elements if self.running])
-
-            if self.running:
-                self.app.update_progress(80)
-                self.app.display_result(scraped_data)
-                
-                # Export to CSV if enabled
-                if self.app.export_csv_var.get():
-                    fields = [f.strip() for f in self.app.csv_fields_var.get().split(',')]
-                    filename = filedialog.asksaveasfilename(
-                        defaultextension=".csv",
-                        filetypes=[("CSV files", "*.csv")],
-                        title="Save CSV File"
-                    )
-                    if filename:
-                        CSVExporter.export(all_elements if self.app.pagination_var.get() else elements, filename, fields)
-                        self.app.status_label.config(text=f"Data exported to {filename}")
-
-                self.app.update_progress(100)
-                time.sleep(self.settings.get("request_delay", 1.0))
-
-        except requests.exceptions.RequestException as e:
-            if self.running:
-                self.app.show_error(f"Request Error: {e}")
+            self.engine.run(
+                [self.url],
+                self.selector,
+                on_result=self.on_result,
+                export_path=self.settings.get("export_path"),
+                export_fields=self.settings.get("export_fields")
+            )
+            if self.engine.errors and self.running:
+                self.app.post("error", self.engine.errors[0][1])
         except Exception as e:
             if self.running:
-                self.app.show_error(f"An unexpected error occurred: {e}")
+                self.app.post("error", f"An unexpected error occurred: {e}")
         finally:
             if self.running:
-                self.app.scraping_finished()
+                self.app.post("finished")
 
 # --- Main Application Window ---
 
@@ -300,6 +134,12 @@ class WebScraperApp(tk.Tk):
 
         self.settings = {}  # Initialize settings here
         self.scrape_thread = None
+        self.http_session = None  # Shared keep-alive connection pool, created on first scrape
+        self.browser_pool = None  # Warm headless Chrome instances, created on first JS scrape
+        self.ui_queue = queue.Queue()  # Updates from the scrape thread, applied by poll_ui_queue
+        self.result_spool = ResultSpool(PAGER_PAGE_SIZE)  # Every scraped record; the pane only keeps the tail
+        self.result_schema = None  # Formats the spooled records as text lines
+        self.output_record_count = 0
 
         # Initialize StringVar variables here
         self.url_text = tk.StringVar()  # To remember last URL
@@ -322,6 +162,8 @@ class WebScraperApp(tk.Tk):
         self.update_selector_options()
         self.toggle_custom_selector_visibility()
         self.toggle_proxy_tor_fields()
+        self.after(UI_POLL_MS, self.poll_ui_queue)
+        self.after(METRICS_REFRESH_MS, self.refresh_metrics_panel)
 
     def create_widgets(self):
         """Creates and arranges GUI widgets."""
@@ -388,9 +230,29 @@ class WebScraperApp(tk.Tk):
         self.page_delay_var = tk.DoubleVar(value=1.0)
         ttk.Spinbox(pagination_frame, from_=0.1, to=10.0, increment=0.1, textvariable=self.page_delay_var, width=5).pack(side=tk.LEFT)
 
+        # Link Crawling Frame
+        crawl_frame = ttk.LabelFrame(main_frame, text="Link Crawling", padding=5)
+        crawl_frame.grid(row=1, column=0, sticky="ew", pady=(0, 5))
+        crawl_frame.grid_columnconfigure(0, weight=1)
+
+        self.crawl_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(crawl_frame, text="Follow Links", variable=self.crawl_var).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(crawl_frame, text="Depth:").pack(side=tk.LEFT, padx=(10, 5))
+        self.crawl_depth_var = tk.IntVar(value=2)
+        ttk.Spinbox(crawl_frame, from_=1, to=20, textvariable=self.crawl_depth_var, width=4).pack(side=tk.LEFT)
+
+        ttk.Label(crawl_frame, text="Max Pages:").pack(side=tk.LEFT, padx=(10, 5))
+        self.crawl_max_pages_var = tk.IntVar(value=1000)
+        ttk.Spinbox(crawl_frame, from_=1, to=1000000, increment=100, textvariable=self.crawl_max_pages_var, width=7).pack(side=tk.LEFT)
+
+        ttk.Label(crawl_frame, text="Follow Pattern:").pack(side=tk.LEFT, padx=(10, 5))
+        self.crawl_follow_var = tk.StringVar()
+        ttk.Entry(crawl_frame, textvariable=self.crawl_follow_var, width=15).pack(side=tk.LEFT)
+
         # Login Frame
         login_frame = ttk.LabelFrame(main_frame, text="Login Credentials", padding=5)
-        login_frame.grid(row=1, column=0, sticky="ew", pady=(0, 10))
+        login_frame.grid(row=2, column=0, sticky="ew", pady=(0, 10))
         login_frame.grid_columnconfigure(0, weight=1)
 
         self.login_required_var = tk.BooleanVar(value=False)
@@ -408,9 +270,14 @@ class WebScraperApp(tk.Tk):
         self.password_var = tk.StringVar()
         ttk.Entry(login_frame, textvariable=self.password_var, show="*", width=20).pack()
 
+        # Login page, if the form is not on the page being scraped
+        ttk.Label(login_frame, text="Login Page (optional):").pack(pady=(5, 0))
+        self.login_url_var = tk.StringVar()
+        ttk.Entry(login_frame, textvariable=self.login_url_var, width=30).pack()
+
         # JavaScript Rendering Frame
         js_frame = ttk.LabelFrame(main_frame, text="JavaScript Rendering", padding=5)
-        js_frame.grid(row=2, column=0, sticky="ew", pady=(0, 10))
+        js_frame.grid(row=3, column=0, sticky="ew", pady=(0, 10))
         js_frame.grid_columnconfigure(0, weight=1)
 
         self.js_render_var = tk.BooleanVar(value=False)
@@ -420,9 +287,16 @@ class WebScraperApp(tk.Tk):
         self.js_wait_var = tk.DoubleVar(value=2.0)
         ttk.Spinbox(js_frame, from_=0.1, to=10.0, increment=0.1, textvariable=self.js_wait_var, width=5).pack(side=tk.LEFT)
 
+        ttk.Label(js_frame, text="Wait For:").pack(side=tk.LEFT, padx=(10, 5))
+        self.js_wait_strategy_var = tk.StringVar(value="Fixed delay")
+        ttk.Combobox(js_frame, textvariable=self.js_wait_strategy_var, values=list(WAIT_STRATEGY_LABELS.keys()), state="readonly", width=12).pack(side=tk.LEFT)
+
+        self.js_lightweight_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(js_frame, text="Lightweight (no images, fonts, media, trackers)", variable=self.js_lightweight_var).pack(side=tk.LEFT, padx=(10, 5))
+
         # Proxy Rotation Frame
         proxy_rotation_frame = ttk.LabelFrame(main_frame, text="Proxy Rotation", padding=5)
-        proxy_rotation_frame.grid(row=3, column=0, sticky="ew", pady=(0, 10))
+        proxy_rotation_frame.grid(row=4, column=0, sticky="ew", pady=(0, 10))
         proxy_rotation_frame.grid_columnconfigure(0, weight=1)
 
         self.proxy_rotation_var = tk.BooleanVar(value=False)
@@ -439,19 +313,19 @@ class WebScraperApp(tk.Tk):
 
         # Export Frame
         export_frame = ttk.LabelFrame(main_frame, text="Export Options", padding=5)
-        export_frame.grid(row=4, column=0, sticky="ew", pady=(0, 10))
+        export_frame.grid(row=5, column=0, sticky="ew", pady=(0, 10))
         export_frame.grid_columnconfigure(0, weight=1)
 
-        self.export_csv_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(export_frame, text="Export to CSV", variable=self.export_csv_var).pack(side=tk.LEFT, padx=5)
+        self.export_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(export_frame, text="Export to File", variable=self.export_var).pack(side=tk.LEFT, padx=5)
 
         ttk.Label(export_frame, text="Fields:").pack(side=tk.LEFT, padx=(10, 5))
-        self.csv_fields_var = tk.StringVar(value="text,href")
-        ttk.Entry(export_frame, textvariable=self.csv_fields_var, width=20).pack(side=tk.LEFT)
+        self.export_fields_var = tk.StringVar(value="text,href")
+        ttk.Entry(export_frame, textvariable=self.export_fields_var, width=20).pack(side=tk.LEFT)
 
         # Input Frame
         input_frame = ttk.LabelFrame(main_frame, text="Input", padding=10)
-        input_frame.grid(row=5, column=0, sticky="ew", pady=(0, 10))
+        input_frame.grid(row=6, column=0, sticky="ew", pady=(0, 10))
         input_frame.grid_columnconfigure(0, weight=1)
 
         # URL
@@ -479,6 +353,9 @@ class WebScraperApp(tk.Tk):
         ttk.Label(self.proxy_tor_frame, text="Tor Control Password (optional):").grid(row=1, column=0, sticky="e", padx=5)
         self.tor_password_entry = ttk.Entry(self.proxy_tor_frame, textvariable=self.tor_password, show="*", state=tk.DISABLED)
         self.tor_password_entry.grid(row=1, column=1, sticky="ew", padx=5)
+        self.new_identity_button = ttk.Button(self.proxy_tor_frame, text="New Identity", command=self.renew_tor_identity,
+                                              state=tk.DISABLED)
+        self.new_identity_button.grid(row=1, column=2, padx=5)
 
         # CSS Selector
         selector_frame = ttk.Frame(input_frame)
@@ -497,9 +374,17 @@ class WebScraperApp(tk.Tk):
         self.custom_selector_entry = ttk.Entry(selector_frame)
         self.custom_selector_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
+        # Extra fields extracted in the same pass (name=selector; name=selector)
+        fields_frame = ttk.Frame(input_frame)
+        fields_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=2)
+        ttk.Label(fields_frame, text="Extra Fields:").pack(side=tk.LEFT, padx=(0, 5))
+        self.extra_fields_var = tk.StringVar()
+        ttk.Entry(fields_frame, textvariable=self.extra_fields_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(fields_frame, text="Add Selected", command=self.add_selected_field).pack(side=tk.LEFT, padx=(5, 0))
+
         # Buttons Frame
         buttons_frame = ttk.Frame(main_frame)
-        buttons_frame.grid(row=6, column=0, sticky="ew", pady=(5, 0))
+        buttons_frame.grid(row=7, column=0, sticky="ew", pady=(5, 0))
         buttons_frame.grid_columnconfigure(0, weight=1)
 
         self.scrape_button = ttk.Button(buttons_frame, text="Start Scraping", command=self.start_scraping)
@@ -514,6 +399,9 @@ class WebScraperApp(tk.Tk):
         self.save_button = ttk.Button(buttons_frame, text="Save Data", command=self.save_data)
         self.save_button.pack(side=tk.LEFT, padx=5)
 
+        self.view_all_button = ttk.Button(buttons_frame, text="View All", command=self.open_result_pager, state=tk.DISABLED)
+        self.view_all_button.pack(side=tk.LEFT, padx=5)
+
         # Progress Bar in content frame
         self.progress_bar = ttk.Progressbar(content_frame, orient="horizontal", mode="determinate")
         self.progress_bar.grid(row=0, column=0, sticky="ew", pady=(0, 5))
@@ -524,6 +412,16 @@ class WebScraperApp(tk.Tk):
         self.output_text.grid(row=1, column=0, sticky="nsew")
         content_frame.grid_rowconfigure(1, weight=1)
 
+        # Live metrics of the current (or last) run
+        metrics_frame = ttk.LabelFrame(content_frame, text="Metrics", padding=5)
+        metrics_frame.grid(row=2, column=0, sticky="ew", pady=(5, 0))
+        metrics_frame.grid_columnconfigure(0, weight=1)
+        self.metrics_label = ttk.Label(metrics_frame, text="No scrape yet", font="TkFixedFont", justify=tk.LEFT, anchor="w")
+        self.metrics_label.grid(row=0, column=0, sticky="ew")
+        self.export_metrics_button = ttk.Button(metrics_frame, text="Export Metrics", command=self.export_metrics, state=tk.DISABLED)
+        self.export_metrics_button.grid(row=0, column=1, sticky="ne", padx=(5, 0))
+        content_frame.grid_rowconfigure(2, weight=0)
+
         # Status Bar
         self.status_label = ttk.Label(self, text="", anchor="w")
         self.status_label.grid(row=1, column=0, sticky="ew")
@@ -563,6 +461,7 @@ class WebScraperApp(tk.Tk):
         network = self.network_option.get()
         self.proxy_address_entry.config(state=tk.NORMAL if network == "HTTP Proxy" else tk.DISABLED)
         self.tor_password_entry.config(state=tk.NORMAL if network == "Tor Network" else tk.DISABLED)
+        self.new_identity_button.config(state=tk.NORMAL if network == "Tor Network" else tk.DISABLED)
 
         # Clear fields when disabling
         if network != "HTTP Proxy":
@@ -580,52 +479,27 @@ class WebScraperApp(tk.Tk):
         else:
             self.custom_selector_entry.delete(0, tk.END)
 
-    def perform_login(self, session, url, username, password):
-        """Performs login on the given URL using provided credentials."""
-        try:
-            response = session.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Identify login form elements (adjust selectors as needed)
-            form = soup.find('form')
-            if not form:
-                self.show_error("Login form not found.")
-                return False
-            
-            inputs = form.find_all('input')
-            login_data = {}
-            for input_field in inputs:
-                name = input_field.get('name')
-                input_type = input_field.get('type')
-                if name:
-                    if input_type == 'text' or input_type == 'email':
-                        login_data[name] = username
-                    elif input_type == 'password':
-                        login_data[name] = password
-                    else:
-                        login_data[name] = input_field.get('value', '')  # For hidden fields, etc.
-
-            # Identify submit URL (form action)
-            login_url = response.urljoin(form.get('action')) if form.get('action') else url
-
-            # Submit the login form
-            login_response = session.post(login_url, data=login_data)
-            login_response.raise_for_status()
-
-            if login_response.url == url or "logout" in login_response.text.lower():
-                self.status_label.config(text="Login successful.")
-                return True
-            else:
-                self.show_error("Login failed. Please check your credentials.")
-                return False
-
-        except requests.exceptions.RequestException as e:
-            self.show_error(f"Login request error: {e}")
-            return False
-        except Exception as e:
-            self.show_error(f"Login error: {e}")
-            return False
+    def add_selected_field(self):
+        """Adds the currently selected catalog selector to the extra fields."""
+        label = self.selector_combo.get()
+        category = self.selector_category_var.get()
+        if not label or label not in CSS_SELECTORS.get(category, {}):
+            messagebox.showerror("Error", "Please select a CSS selector to add.")
+            return
+        field = f"{label}={CSS_SELECTORS[category][label]}"
+        current = self.extra_fields_var.get().strip()
+        self.extra_fields_var.set(f"{current}; {field}" if current else field)
+
+    def build_extraction_schema(self, selector):
+        """Combines the main selector with the extra fields into one extraction schema."""
+        fields = {}
+        for entry in self.extra_fields_var.get().split(";"):
+            name, sep, field_selector = entry.partition("=")
+            if sep and name.strip() and field_selector.strip():
+                fields[name.strip()] = field_selector.strip()
+        if not fields:
+            return selector
+        return ExtractionSchema({"selector": selector, **fields})
 
     def start_scraping(self):
         """Starts the web scraping process."""
@@ -648,29 +522,78 @@ class WebScraperApp(tk.Tk):
             messagebox.showerror("Error", "Please enter a custom CSS selector.")
         elif network_option == "HTTP Proxy" and not proxy_address:
             messagebox.showerror("Error", "Please enter a proxy address.")
+        elif self.login_required_var.get() and not (self.username_var.get().strip() and self.password_var.get()):
+            messagebox.showerror("Error", "Please enter a username and password.")
+        elif self.crawl_var.get() and not is_valid_pattern(self.crawl_follow_var.get().strip()):
+            messagebox.showerror("Error", "The follow pattern is not a valid regular expression.")
         else:
             if selector_category == "Whole Website":
                 selector = "*"
             elif selector_category != "Custom":
                 selector = CSS_SELECTORS[selector_category][selector_value]
 
+            if self.http_session is None:
+                self.http_session = create_session(self.settings)
+            if self.js_render_var.get() and self.browser_pool is None:
+                self.browser_pool = BrowserPool(self.settings, {})
+
             # Test connection before starting scraping
-            connection_status = test_connection(network_option, proxy_address, tor_password, tor_port, tor_socks_ip, tor_socks_port)
+            connection_status = test_connection(network_option, proxy_address, tor_password, tor_port, tor_socks_ip, tor_socks_port, session=self.http_session)
             if "successful" not in connection_status:
                 messagebox.showerror("Connection Error", connection_status)
                 return
 
+            # Snapshot the Tk variables here so the worker thread never touches them
+            job_settings = dict(self.settings)
+            job_settings.update({
+                "network_option": network_option,
+                "proxy_address": proxy_address,
+                "tor_password": tor_password,
+                "tor_port": tor_port,
+                "tor_socks_ip": tor_socks_ip,
+                "tor_socks_port": tor_socks_port,
+                "js_render": self.js_render_var.get(),
+                "render_wait": self.js_wait_var.get(),
+                "wait_strategy": WAIT_STRATEGY_LABELS.get(self.js_wait_strategy_var.get(), WAIT_FIXED),
+                "js_lightweight": self.js_lightweight_var.get(),
+                "pagination": self.pagination_var.get(),
+                "crawl": self.crawl_var.get(),
+                "crawl_max_depth": self.crawl_depth_var.get(),
+                "crawl_max_pages": self.crawl_max_pages_var.get(),
+                "crawl_follow": self.crawl_follow_var.get().strip() or None,
+                "max_pages": self.max_pages_var.get(),
+                "page_delay": self.page_delay_var.get(),
+            })
+            if self.login_required_var.get():
+                job_settings.update({
+                    "login_url": self.login_url_var.get().strip() or url,
+                    "login_username": self.username_var.get().strip(),
+                    "login_password": self.password_var.get(),
+                })
+            if network_option == "HTTP Proxy" and self.proxy_rotation_var.get():
+                job_settings["proxy_list"] = [p.strip() for p in self.proxy_list_var.get().split(',') if p.strip()]
+            if self.export_var.get():
+                job_settings["export_fields"] = [f.strip() for f in self.export_fields_var.get().split(',') if f.strip()]
+                job_settings["export_path"] = filedialog.asksaveasfilename(
+                    defaultextension=".csv",
+                    filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"), ("Parquet files", "*.parquet")],
+                    title="Export Scraped Data"
+                ) or None
+            if self.settings.get("profile"):
+                # Results go to a temporary spool, so the profile goes next to the export or to the save folder
+                job_settings["profile_dir"] = os.path.dirname(job_settings.get("export_path") or "") or DEFAULT_SAVE_DIR
+
+            self.clear_output()
             self.status_label.config(text="Scraping...")
             self.progress_bar['value'] = 0
-            self.output_text.config(state=tk.NORMAL)
-            self.output_text.delete(1.0, tk.END)
-            self.output_text.config(state=tk.DISABLED)
             self.scrape_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
             self.clear_button.config(state=tk.DISABLED)
             self.save_button.config(state=tk.DISABLED)
 
-            self.scrape_thread = ScrapeThread(self, url, selector, network_option, proxy_address, tor_password, tor_port, self.settings)
+            schema = self.build_extraction_schema(selector)
+            self.result_schema = ExtractionSchema.coerce(schema)
+            self.scrape_thread = ScrapeThread(self, url, schema, network_option, proxy_address, tor_password, tor_port, job_settings)
             self.scrape_thread.start()
 
     def stop_scraping(self):
@@ -684,16 +607,135 @@ class WebScraperApp(tk.Tk):
             self.clear_button.config(state=tk.NORMAL)
             self.save_button.config(state=tk.NORMAL)
 
+    def renew_tor_identity(self):
+        """Asks Tor for a new identity without blocking; the outcome arrives as a status update."""
+        engine = self.scrape_thread.engine if self.scrape_thread and self.scrape_thread.is_alive() else None
+        if engine and engine.identity_rotator:
+            # The running job's rotator coalesces this with its own rotations and reports the result
+            engine.identity_rotator.request_rotation("requested from the GUI")
+            return
+        self.status_label.config(text="Requesting a new Tor identity...")
+        settings = {"tor_password": self.tor_password.get(),
+                    "tor_port": int(self.tor_port.get()) if self.tor_port.get() else DEFAULT_TOR_CONTROL_PORT}
+        threading.Thread(target=self._renew_tor_identity, args=(settings,), name="tor-newnym", daemon=True).start()
+
+    def _renew_tor_identity(self, settings, timeout=15):
+        rotator = TorIdentityRotator(settings)
+        try:
+            rotator.start()
+            rotator.request_rotation()
+            if rotator.rotated.wait(timeout):
+                self.post("status", "Tor identity renewed.")
+            else:
+                self.post("status", "Timed out waiting for Tor to renew its identity.")
+        except Exception as e:
+            self.post("status", f"Error renewing Tor identity: {e}")
+        finally:
+            rotator.close()
+
+    def post(self, kind, payload=None):
+        """Queues an update from a worker thread for the Tk main loop."""
+        self.ui_queue.put((kind, payload))
+
+    def poll_ui_queue(self):
+        """Applies queued worker updates in one batch, then reschedules itself."""
+        results = []
+        try:
+            for _ in range(UI_MAX_UPDATES):
+                kind, payload = self.ui_queue.get_nowait()
+                if kind == "result":
+                    results.extend(payload)
+                elif kind == "progress":
+                    self.update_progress(payload)
+                elif kind == "status":
+                    self.status_label.config(text=payload)
+                elif kind == "error":
+                    self.show_error(payload)
+                elif kind == "finished":
+                    self.scraping_finished()
+        except queue.Empty:
+            pass
+        if results:
+            self.display_result(results)
+        self.after(UI_POLL_MS, self.poll_ui_queue)
+
+    def current_metrics(self):
+        """Metrics of the running or most recent scrape, if any"""
+        engine = self.scrape_thread.engine if self.scrape_thread else None
+        return engine.metrics if engine else None
+
+    def refresh_metrics_panel(self):
+        """Redraws the metrics panel while a scrape runs, then reschedules itself."""
+        metrics = self.current_metrics()
+        if metrics and self.scrape_thread.is_alive():
+            self.metrics_label.config(text=metrics.summary_text())
+        self.after(METRICS_REFRESH_MS, self.refresh_metrics_panel)
+
+    def export_metrics(self):
+        """Saves the last run's metrics as JSON or Prometheus text."""
+        metrics = self.current_metrics()
+        if not metrics:
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("Prometheus text", "*.prom"), ("All files", "*.*")],
+            initialdir=DEFAULT_SAVE_DIR,
+            title="Export Metrics"
+        )
+        if file_path:
+            try:
+                metrics.write(file_path)
+                self.status_label.config(text=f"Metrics saved to {file_path}")
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save metrics: {e}")
+
     def update_progress(self, value):
         """Updates the progress bar."""
         self.progress_bar["value"] = value
-        self.update_idletasks()
 
-    def display_result(self, data):
-        """Displays the scraped data in the output area."""
+    def display_result(self, elements):
+        """Appends scraped records to the output area, keeping only about the last OUTPUT_MAX_LINES lines."""
+        self.output_record_count += len(elements)
+        # Only the records that stay visible are formatted
+        lines = [self.result_schema.text_line(element) for element in elements[-OUTPUT_MAX_LINES:]]
         self.output_text.config(state=tk.NORMAL)
-        self.output_text.insert(tk.END, data + "\n") # Added newline for better readability
+        self.output_text.insert(tk.END, "\n".join(lines) + "\n")
+        excess = int(self.output_text.index("end-1c").split(".")[0]) - 1 - OUTPUT_MAX_LINES
+        if excess > 0:
+            self.output_text.delete("1.0", f"{excess + 1}.0")
         self.output_text.config(state=tk.DISABLED)
+        if self.output_record_count > OUTPUT_MAX_LINES:
+            self.view_all_button.config(text=f"View All ({self.output_record_count} records)", state=tk.NORMAL)
+
+    def open_result_pager(self):
+        """Pages through the full output, read back from the spool file."""
+        pager = tk.Toplevel(self)
+        pager.title("Scraped Output")
+        pager.geometry("800x600")
+
+        pager_text = scrolledtext.ScrolledText(pager, wrap=tk.WORD, state=tk.DISABLED)
+        pager_text.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        nav_frame = ttk.Frame(pager)
+        nav_frame.pack(fill="x", padx=10, pady=(0, 10))
+        page_var = tk.IntVar(value=0)
+        page_label = ttk.Label(nav_frame)
+
+        def show_page(page):
+            page_count = self.result_spool.page_count()
+            page = max(0, min(page, page_count - 1))
+            page_var.set(page)
+            pager_text.config(state=tk.NORMAL)
+            pager_text.delete(1.0, tk.END)
+            pager_text.insert(tk.END, "\n".join(map(self.result_schema.text_line, self.result_spool.read_page(page))))
+            pager_text.config(state=tk.DISABLED)
+            page_label.config(text=f"Page {page + 1} of {max(page_count, 1)}")
+
+        ttk.Button(nav_frame, text="First", command=lambda: show_page(0)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(nav_frame, text="< Previous", command=lambda: show_page(page_var.get() - 1)).pack(side=tk.LEFT, padx=2)
+        page_label.pack(side=tk.LEFT, padx=10)
+        ttk.Button(nav_frame, text="Next >", command=lambda: show_page(page_var.get() + 1)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(nav_frame, text="Last", command=lambda: show_page(self.result_spool.page_count() - 1)).pack(side=tk.LEFT, padx=2)
+        show_page(0)
 
     def show_error(self, message):
         """Displays an error message in the status bar and a messagebox."""
@@ -702,15 +744,25 @@ class WebScraperApp(tk.Tk):
 
     def scraping_finished(self):
         """Resets GUI elements after scraping is finished."""
-        self.status_label.config(text="Scraping complete!")
+        engine = self.scrape_thread.engine if self.scrape_thread else None
+        # The end-of-run figures (cache hits, throttling, export...) arrive just before this; keep them visible
+        summary = "; ".join(engine.summary) if engine else ""
+        self.status_label.config(text=f"Scraping complete! {summary}" if summary else "Scraping complete!")
         self.scrape_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.clear_button.config(state=tk.NORMAL)
         self.save_button.config(state=tk.NORMAL)
+        metrics = self.current_metrics()
+        if metrics:
+            self.metrics_label.config(text=metrics.summary_text())
+            self.export_metrics_button.config(state=tk.NORMAL)
 
     def on_closing(self):
         """Handles the closing of the application window."""
         self.stop_scraping()
+        if self.browser_pool:
+            self.browser_pool.close()
+        self.result_spool.close()
         if self.winfo_exists():
             try:
                 # Get the value of tor_port_var before potentially being destroyed
@@ -725,6 +777,9 @@ class WebScraperApp(tk.Tk):
         self.output_text.config(state=tk.NORMAL)
         self.output_text.delete(1.0, tk.END)
         self.output_text.config(state=tk.DISABLED)
+        self.result_spool.reset()
+        self.output_record_count = 0
+        self.view_all_button.config(text="View All", state=tk.DISABLED)
 
     def load_proxy_list(self):
         """Loads a list of proxies from a file."""
@@ -735,10 +790,9 @@ class WebScraperApp(tk.Tk):
         )
         if file_path:
             try:
-                with open(file_path, "r") as f:
-                    proxies = f.read().splitlines()
-                    self.proxy_list_var.set(",".join(proxies))
-                    messagebox.showinfo("Success", f"Loaded {len(proxies)} proxies")
+                proxies = load_proxy_file(file_path)
+                self.proxy_list_var.set(",".join(proxies))
+                messagebox.showinfo("Success", f"Loaded {len(proxies)} proxies")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load proxy list: {e}")
 
@@ -746,20 +800,25 @@ class WebScraperApp(tk.Tk):
         """Saves the scraped data to a file."""
         file_path = filedialog.asksaveasfilename(
             defaultextension=".txt",
-            filetypes=[("Markdown files", "*.md"), ("Text files", "*.txt"), ("All files", "*.*")],
+            filetypes=[("Markdown files", "*.md"), ("Text files", "*.txt"), ("CSV files", "*.csv"),
+                       ("JSON Lines files", "*.jsonl"), ("Parquet files", "*.parquet"), ("All files", "*.*")],
             initialdir=DEFAULT_SAVE_DIR
         )
         if file_path:
             try:
-                data_to_save = self.output_text.get(1.0, tk.END)
-                if file_path.endswith(".md"):
-                    # Format as Markdown (treat each line as a paragraph)
-                    lines = data_to_save.strip().split('\n')
-                    markdown_data = "\n\n".join(lines)
-                    data_to_save = markdown_data
-
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(data_to_save)
+                # The pane only shows the tail, so save from the spool file, one record at a time
+                extension = os.path.splitext(file_path)[1].lower()
+                if extension in [writer_class.extension for writer_class in EXPORT_FORMATS.values()]:
+                    fields = [f.strip() for f in self.export_fields_var.get().split(',') if f.strip()] or DEFAULT_FIELDS
+                    with open_writer(file_path, ["url", "page"] + fields, export_format_for(file_path)) as writer:
+                        writer.write(self.result_spool.iter_records())
+                else:
+                    # Markdown gets a paragraph per record, text files a line
+                    separator = "\n\n" if extension == ".md" else "\n"
+                    with open(file_path, "w", encoding="utf-8") as f:
+                        for element in self.result_spool.iter_records():
+                            if element.text or extension != ".md":
+                                f.write(self.result_schema.text_line(element) + separator)
                 messagebox.showinfo("Success", "Data saved successfully!")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save data: {e}")
@@ -768,7 +827,7 @@ class WebScraperApp(tk.Tk):
         """Opens the settings window."""
         settings_window = tk.Toplevel(self)
         settings_window.title("Settings")
-        settings_window.geometry("400x350")
+        settings_window.geometry("400x760")
         settings_window.resizable(False, False)
 
         # --- Settings Frame ---
@@ -792,6 +851,46 @@ class WebScraperApp(tk.Tk):
         ttk.Spinbox(settings_frame, from_=1, to=60, increment=1, textvariable=self.timeout_var, width=5,
                     command=lambda: self.show_hint("Maximum time to wait for a response from the server.")).pack(anchor="w")
 
+        # --- HTML Parser ---
+        ttk.Label(settings_frame, text="HTML Parser:").pack(anchor="w")
+        self.parser_var = tk.StringVar(value=self.settings.get("parser", "html.parser"))
+        ttk.Combobox(settings_frame, textvariable=self.parser_var, values=list(PARSERS), state="readonly", width=12).pack(anchor="w")
+        self.stream_parse_var = tk.BooleanVar(value=self.settings.get("stream_parse", False))
+        ttk.Checkbutton(settings_frame, text="Stream parsing (simple selectors only)", variable=self.stream_parse_var,
+                        command=lambda: self.show_hint("Extract matches while the page downloads instead of building the whole document tree.")).pack(anchor="w")
+
+        # --- Deduplication ---
+        self.dedup_records_var = tk.BooleanVar(value=self.settings.get("dedup_records", False))
+        ttk.Checkbutton(settings_frame, text="Drop duplicate records", variable=self.dedup_records_var,
+                        command=lambda: self.show_hint("Skip elements identical to ones already scraped, even repeated values in different rows.")).pack(anchor="w")
+        self.dedup_pages_var = tk.BooleanVar(value=self.settings.get("dedup_pages", True))
+        ttk.Checkbutton(settings_frame, text="Stop pagination on a repeated page", variable=self.dedup_pages_var,
+                        command=lambda: self.show_hint("Stop when a page returns the same content as an earlier page.")).pack(anchor="w")
+
+        # --- Checkpoints ---
+        self.checkpoint_var = tk.BooleanVar(value=self.settings.get("checkpoint", False))
+        ttk.Checkbutton(settings_frame, text="Resume interrupted jobs", variable=self.checkpoint_var,
+                        command=lambda: self.show_hint("Record progress so an interrupted crawl continues where it stopped when started again.")).pack(anchor="w")
+
+        # --- Response Cache ---
+        self.http_cache_var = tk.BooleanVar(value=self.settings.get("http_cache", False))
+        ttk.Checkbutton(settings_frame, text="Cache responses on disk", variable=self.http_cache_var,
+                        command=lambda: self.show_hint("Reuse fresh responses and revalidate stale ones with ETag/Last-Modified.")).pack(anchor="w")
+        ttk.Label(settings_frame, text="Cache Size Limit (MB):").pack(anchor="w")
+        self.cache_max_mb_var = tk.IntVar(value=self.settings.get("cache_max_mb", DEFAULT_CACHE_MAX_MB))
+        ttk.Spinbox(settings_frame, from_=10, to=10000, increment=10, textvariable=self.cache_max_mb_var, width=7).pack(anchor="w")
+
+        # --- Profiling ---
+        self.profile_var = tk.BooleanVar(value=self.settings.get("profile", False))
+        ttk.Checkbutton(settings_frame, text="Profile scrapes (time and memory per stage)", variable=self.profile_var,
+                        command=lambda: self.show_hint("Save a report and flame graph input next to the results; scraping runs slower while profiling.")).pack(anchor="w")
+
+        # --- Chrome Instances ---
+        ttk.Label(settings_frame, text="Chrome Instances (JS rendering):").pack(anchor="w")
+        self.browser_pool_size_var = tk.IntVar(value=self.settings.get("browser_pool_size", 2))
+        ttk.Spinbox(settings_frame, from_=1, to=16, increment=1, textvariable=self.browser_pool_size_var, width=5,
+                    command=lambda: self.show_hint("Number of headless Chrome instances kept warm for parallel rendering.")).pack(anchor="w")
+
         # --- Tor Control Port ---
         ttk.Label(settings_frame, text="Tor Control Port:").pack(anchor="w")
         self.tor_port_var_settings = tk.IntVar(value=self.settings.get("tor_port", DEFAULT_TOR_CONTROL_PORT)) # Use a separate variable for the settings window
@@ -811,6 +910,22 @@ class WebScraperApp(tk.Tk):
         self.tor_socks_port_var_settings = tk.IntVar(value=self.settings.get("tor_socks_port", TOR_SOCKS_PORT))
         ttk.Spinbox(tor_browser_frame, from_=1, to=65535, increment=1, textvariable=self.tor_socks_port_var_settings, width=7).grid(row=1, column=1, sticky="ew", padx=5, pady=2)
 
+        ttk.Label(tor_browser_frame, text="Extra SOCKS Ports:").grid(row=2, column=0, sticky="e", padx=5, pady=2)
+        self.tor_socks_ports_var_settings = tk.StringVar(value=self.settings.get("tor_socks_ports", ""))
+        ttk.Entry(tor_browser_frame, textvariable=self.tor_socks_ports_var_settings, width=15).grid(row=2, column=1, sticky="ew", padx=5, pady=2)
+
+        ttk.Label(tor_browser_frame, text="Isolated Circuits:").grid(row=3, column=0, sticky="e", padx=5, pady=2)
+        self.tor_isolation_var_settings = tk.IntVar(value=self.settings.get("tor_isolation_streams", 1))
+        ttk.Spinbox(tor_browser_frame, from_=1, to=32, increment=1, textvariable=self.tor_isolation_var_settings, width=7).grid(row=3, column=1, sticky="ew", padx=5, pady=2)
+
+        ttk.Label(tor_browser_frame, text="New Identity Every:").grid(row=4, column=0, sticky="e", padx=5, pady=2)
+        self.tor_rotate_every_var_settings = tk.IntVar(value=self.settings.get("tor_rotate_every", 0))
+        ttk.Spinbox(tor_browser_frame, from_=0, to=10000, increment=10, textvariable=self.tor_rotate_every_var_settings, width=7).grid(row=4, column=1, sticky="ew", padx=5, pady=2)
+
+        self.tor_rotate_on_block_var_settings = tk.BooleanVar(value=self.settings.get("tor_rotate_on_block", False))
+        ttk.Checkbutton(tor_browser_frame, text="New identity on 403/429", variable=self.tor_rotate_on_block_var_settings,
+                        command=lambda: self.show_hint("Request a new Tor identity when the site blocks or throttles the exit node.")).grid(row=5, column=0, columnspan=2, sticky="w", padx=5, pady=2)
+
         # --- Save Settings Button ---
         ttk.Button(settings_window, text="Save Settings", command=self.save_settings_from_window).pack(pady=20)
 
@@ -865,9 +980,28 @@ class WebScraperApp(tk.Tk):
         self.settings["rotate_user_agents"] = self.rotate_user_agents_var.get()
         self.settings["request_delay"] = self.request_delay_var.get()
         self.settings["timeout"] = self.timeout_var.get()
+        self.settings["browser_pool_size"] = self.browser_pool_size_var.get()
+        self.settings["parser"] = self.parser_var.get()
+        self.settings["stream_parse"] = self.stream_parse_var.get()
+        self.settings["dedup_records"] = self.dedup_records_var.get()
+        self.settings["dedup_pages"] = self.dedup_pages_var.get()
+        self.settings["checkpoint"] = self.checkpoint_var.get()
+        self.settings["profile"] = self.profile_var.get()
+        cache_settings = (self.settings.get("http_cache"), self.settings.get("cache_max_mb"))
+        self.settings["http_cache"] = self.http_cache_var.get()
+        self.settings["cache_max_mb"] = self.cache_max_mb_var.get()
+        if self.http_session and cache_settings != (self.settings["http_cache"], self.settings["cache_max_mb"]):
+            # The cache is mounted when the session is created; the next scrape builds a new one
+            if self.http_session.response_cache:
+                self.http_session.response_cache.close()
+            self.http_session = None
         self.settings["tor_port"] = self.tor_port_var_settings.get()
         self.settings["tor_socks_ip"] = self.tor_socks_ip_var_settings.get()
         self.settings["tor_socks_port"] = self.tor_socks_port_var_settings.get()
+        self.settings["tor_socks_ports"] = self.tor_socks_ports_var_settings.get().strip()
+        self.settings["tor_isolation_streams"] = self.tor_isolation_var_settings.get()
+        self.settings["tor_rotate_every"] = self.tor_rotate_every_var_settings.get()
+        self.settings["tor_rotate_on_block"] = self.tor_rotate_on_block_var_settings.get()
 
         with open(SETTINGS_FILE, "w") as f:
             json.dump(self.settings, f, indent=4)
@@ -910,20 +1044,6 @@ class WebScraperApp(tk.Tk):
 
 # --- Tor Network Control Functions ---
 
-def renew_tor_identity(password, port):
-    """Renews Tor's IP address."""
-    try:
-        with Controller.from_port(port=port) as controller:
-            if password:
-                controller.authenticate(password=password)
-            controller.signal(Signal.NEWNYM)
-            print("Tor identity renewed.")
-            time.sleep(5)
-            return True
-    except Exception as e:
-        print(f"Error renewing Tor identity: {e}")
-        return False
-
 def check_tor_connection():
     """Checks if the connection is going through Tor."""
     try:
@@ -0,0 +1,206 @@
+import random
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class MockSite:
+    """Local HTTP server serving generated pages for benchmarks.
+
+    ``/item/N`` pages hold ``elements`` matches of ``p.item`` padded to
+    about ``page_size`` bytes, link to ``links`` further items (for crawls)
+    and to ``?page=N`` pages up to ``pagination_depth``. Every response is
+    delayed by ``latency`` seconds plus up to ``jitter`` seconds, with a
+    fixed random seed so runs are reproducible.
+    """
+
+    def __init__(self, page_size=20000, elements=50, pagination_depth=5, links=5, latency=0.0, jitter=0.0,
+                 host='127.0.0.1', port=0, seed=1):
+        self.page_size = page_size
+        self.elements = elements
+        self.pagination_depth = pagination_depth
+        self.links = links
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.requests = 0
+        self.requests_lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, as real sites allow
+
+            def do_GET(self):
+                with site.requests_lock:
+                    site.requests += 1
+                site.wait()
+                body = site.page(self.path)
+                self.send_response(200 if body is not None else 404)
+                body = body if body is not None else b'not found'
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def urls(self, count):
+        return [f'{self.base_url}/item/{number}' for number in range(count)]
+
+    def wait(self):
+        if self.latency or self.jitter:
+            with self.random_lock:
+                delay = self.latency + self.random.uniform(0, self.jitter)
+            time.sleep(delay)
+
+    def page(self, path):
+        parts = urlsplit(path)
+        if not parts.path.startswith('/item/'):
+            return None
+        try:
+            number = int(parts.path[len('/item/'):])
+            page = int(parse_qs(parts.query).get('page', ['1'])[0])
+        except ValueError:
+            return None
+        items = ''.join(f'<p class="item" data-id="{number}-{page}-{index}">Item {number} page {page} element {index}</p>\n'
+                        for index in range(self.elements))
+        links = ''.join(f'<a class="link" href="/item/{number * self.links + index + 1}">next {index}</a>\n'
+                        for index in range(self.links))
+        pages = ''.join(f'<a class="pager" href="?page={index}">{index}</a>\n'
+                        for index in range(1, self.pagination_depth + 1))
+        html = (f'<html><head><title>Item {number}</title></head><body>\n<div class="items">\n{items}</div>\n'
+                f'<nav>{links}</nav>\n<div class="pagination">{pages}</div>\n')
+        padding = max(0, self.page_size - len(html) - len('</body></html>') - 9)
+        return (html + f'<!--{"x" * padding}-->' + '</body></html>').encode('utf-8')
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='mock-site', daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ReusableTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+class FakeSocksProxy:
+    """Minimal SOCKS5 proxy standing in for Tor in benchmarks.
+
+    Accepts anonymous and username/password logins (so circuit isolation
+    credentials work) and CONNECT to IPv4 addresses or host names. Each new
+    connection is delayed by ``connect_latency`` seconds to mimic building
+    a circuit.
+    """
+
+    def __init__(self, connect_latency=0.0, host='127.0.0.1', port=0):
+        self.connect_latency = connect_latency
+        self.connections = 0
+        self.connections_lock = threading.Lock()
+        proxy = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with proxy.connections_lock:
+                    proxy.connections += 1
+                upstream = proxy.negotiate(self.request)
+                if upstream:
+                    proxy.relay(self.request, upstream)
+
+        self.server = ReusableTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    @staticmethod
+    def recv_exact(sock, size):
+        data = b''
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("SOCKS client closed the connection")
+            data += chunk
+        return data
+
+    def negotiate(self, client):
+        """Run the SOCKS5 handshake; returns the connected upstream socket, or None"""
+        try:
+            _, method_count = self.recv_exact(client, 2)
+            methods = self.recv_exact(client, method_count)
+            if 2 in methods:
+                client.sendall(b'\x05\x02')
+                _, user_length = self.recv_exact(client, 2)
+                self.recv_exact(client, user_length)
+                password_length = self.recv_exact(client, 1)[0]
+                self.recv_exact(client, password_length)
+                client.sendall(b'\x01\x00')
+            else:
+                client.sendall(b'\x05\x00')
+            _, command, _, address_type = self.recv_exact(client, 4)
+            if address_type == 1:
+                host = socket.inet_ntoa(self.recv_exact(client, 4))
+            elif address_type == 3:
+                host = self.recv_exact(client, self.recv_exact(client, 1)[0]).decode('idna')
+            else:
+                client.sendall(b'\x05\x08\x00\x01' + bytes(6))
+                return None
+            port = struct.unpack('!H', self.recv_exact(client, 2))[0]
+            if command != 1:
+                client.sendall(b'\x05\x07\x00\x01' + bytes(6))
+                return None
+            if self.connect_latency:
+                time.sleep(self.connect_latency)
+            upstream = socket.create_connection((host, port))
+            client.sendall(b'\x05\x00\x00\x01' + bytes(6))
+            return upstream
+        except (OSError, ConnectionError):
+            return None
+
+    @staticmethod
+    def relay(client, upstream):
+        sockets = [client, upstream]
+        try:
+            while True:
+                readable, _, _ = select.select(sockets, [], [], 60)
+                if not readable:
+                    return
+                for sock in readable:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    (upstream if sock is client else client).sendall(data)
+        except OSError:
+            pass
+        finally:
+            upstream.close()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='fake-socks', daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
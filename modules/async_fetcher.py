@@ -0,0 +1,226 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+import requests
+from modules.http_pool import create_session
+from modules.metrics import Metrics
+from modules.rate_limit import AdaptiveRateLimiter, THROTTLE_STATUSES
+from modules.tor_circuits import EXIT_FAILURE_STATUSES
+
+
+class AsyncFetcher:
+    """Fetches many URLs concurrently on an asyncio event loop.
+
+    requests is blocking, so each request runs on a worker thread while the
+    event loop enforces a global concurrency limit and a per-host limit.
+    With ``autothrottle`` on (the default), the per-host limit is an
+    AdaptiveRateLimiter that slows down on 429/503 responses and honours
+    Retry-After; such responses are retried up to ``throttle_retries`` times.
+    ``get_headers`` and ``get_proxies`` are called once per request so user
+    agent rotation keeps working. When a ``route_pool`` (a TorCircuitPool or
+    ProxyPool) is given, each request checks out a route from it and reports
+    back its latency and outcome; a request that cannot reach its proxy is
+    retried through another route up to ``route_retries`` times.
+    Requests share one pooled keep-alive ``session``. With a
+    ``session_manager``, a response showing the login has lapsed triggers
+    one fresh login and a retry. Every request's total time, time to first
+    byte and body download time are recorded in ``metrics``.
+    ``on_response(url, status_code, latency)`` is called after every request,
+    with ``status_code`` None when the request failed before a response.
+    """
+
+    def __init__(self, settings, get_headers=None, get_proxies=None, route_pool=None, on_response=None,
+                 session=None, session_manager=None, metrics=None):
+        self.settings = settings
+        self.session = session or create_session(settings)
+        self.max_concurrency = max(1, int(settings.get('max_concurrency', 16)))
+        self.per_host_concurrency = max(1, int(settings.get('per_host_concurrency', 4)))
+        self.timeout = settings.get('timeout', 10)
+        self.get_headers = get_headers or (lambda: {})
+        self.get_proxies = get_proxies or (lambda: {})
+        self.route_pool = route_pool
+        self.on_response = on_response
+        self.session_manager = session_manager
+        self.metrics = metrics or Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                           thread_name_prefix='fetch')
+        self.process_executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                   thread_name_prefix='fetch-process')
+        self._process_limit = None
+        self._global_limit = None
+        self._host_limits = {}
+        self._rate_lock = None
+        self._next_start = 0.0
+        self.rate_limiter = AdaptiveRateLimiter(settings) if AdaptiveRateLimiter.is_enabled(settings) else None
+        self.throttle_retries = int(settings.get('throttle_retries', 2))
+        self.route_retries = int(settings.get('route_retries', 2))
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[host]
+
+    def _request(self, url, stream=False):
+        for attempt in range(self.route_retries + 1):
+            try:
+                return self._request_logged_in(url, stream)
+            except (requests.exceptions.ProxyError, requests.exceptions.ConnectTimeout):
+                if not self.route_pool or attempt == self.route_retries:
+                    raise
+
+    def _request_logged_in(self, url, stream=False):
+        if not self.session_manager:
+            return self._request_once(url, stream)
+        generation = self.session_manager.generation
+        try:
+            response = self._request_once(url, stream)
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or not self.session_manager.is_logged_out(e.response, read_body=not stream):
+                raise
+        else:
+            if not self.session_manager.is_logged_out(response, read_body=not stream):
+                return response
+            response.close()
+        self.session_manager.relogin(generation)
+        # The retry is recorded as a second attempt but runs in the caller's single host slot
+        return self._request_once(url, stream)
+
+    def _request_once(self, url, stream=False):
+        route = self.route_pool.acquire() if self.route_pool else None
+        proxies = route.proxies if route else self.get_proxies()
+        started = time.monotonic()
+        status_code = None
+        headers = None
+        response = None
+        try:
+            response = self.session.get(url, headers=self.get_headers(), proxies=proxies,
+                                        timeout=self.timeout, stream=stream)
+            status_code = response.status_code
+            headers = response.headers
+            if not response.ok:
+                response.close()
+            response.raise_for_status()
+            return response
+        finally:
+            latency = time.monotonic() - started
+            self.record_timing(response, latency, stream)
+            if self.rate_limiter:
+                self.rate_limiter.record(url, status_code, latency, headers)
+            if route:
+                ok = status_code is not None and status_code not in EXIT_FAILURE_STATUSES
+                self.route_pool.release(route, latency, ok)
+            if self.on_response:
+                self.on_response(url, status_code, latency)
+
+    def record_timing(self, response, latency, stream):
+        """Record one request's timings, split into time to first byte and body download"""
+        self.metrics.observe('fetch', latency)
+        self.metrics.count('requests')
+        if response is None or not response.ok:
+            self.metrics.count('errors')
+        if response is None:
+            return
+        # DNS, connection and proxy (SOCKS) setup are part of the time to first byte
+        ttfb = min(latency, response.elapsed.total_seconds())
+        self.metrics.observe('ttfb', ttfb)
+        if stream:
+            self.metrics.count('bytes', int(response.headers.get('Content-Length') or 0))
+        else:
+            self.metrics.observe('download', latency - ttfb)
+            self.metrics.count('bytes', len(response.content))
+
+    async def _wait_for_start(self, min_interval):
+        """Spaces request starts at least min_interval seconds apart"""
+        async with self._rate_lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_start - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = loop.time() + min_interval
+
+    async def fetch(self, url, min_interval=0, stream=False):
+        """Fetches one URL once a global and a per-host slot are free"""
+        if self.rate_limiter:
+            return await self._fetch_throttled(url, min_interval, stream)
+        async with self._global_limit, self._host_limit(url):
+            if min_interval:
+                await self._wait_for_start(min_interval)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, partial(self._request, url, stream))
+
+    async def _fetch_throttled(self, url, min_interval, stream):
+        """Fetches one URL through the adaptive per-host limiter, retrying when the host pushes back"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.throttle_retries + 1):
+            # Wait for the host before taking a global slot, so a paused host does not hold up others
+            await self.rate_limiter.acquire(url)
+            try:
+                async with self._global_limit:
+                    if min_interval:
+                        await self._wait_for_start(min_interval)
+                    # Route retries inside _request share this one host slot
+                    return await loop.run_in_executor(self.executor, partial(self._request, url, stream))
+            except requests.exceptions.HTTPError as e:
+                status_code = e.response.status_code if e.response is not None else None
+                if attempt == self.throttle_retries or status_code not in THROTTLE_STATUSES:
+                    raise
+            finally:
+                self.rate_limiter.release(url)
+
+    async def fetch_and_process(self, index, url, min_interval, stream, process):
+        """Fetches one URL, then hands the response (or exception) to ``process`` on a processing thread"""
+        # The slot is taken before fetching, so responses cannot pile up behind a blocked ``process``
+        async with self._process_limit:
+            try:
+                result = await self.fetch(url, min_interval, stream)
+            except Exception as e:
+                result = e
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.process_executor, process, index, result)
+
+    async def gather(self, urls, min_interval=0, stream=False, process=None):
+        """Fetches all URLs concurrently, returning responses or exceptions in input order"""
+        # Semaphores are created per run so they belong to the running loop
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        self._host_limits = {}
+        self._rate_lock = asyncio.Lock()
+        self._process_limit = asyncio.Semaphore(self.max_concurrency)
+        self._next_start = 0.0
+        if process:
+            fetches = (self.fetch_and_process(index, url, min_interval, stream, process) for index, url in enumerate(urls))
+        else:
+            fetches = (self.fetch(url, min_interval, stream) for url in urls)
+        return await asyncio.gather(*fetches, return_exceptions=True)
+
+    def fetch_all(self, urls, min_interval=0, stream=False, process=None):
+        """Blocking wrapper around gather for use from worker threads.
+
+        ``min_interval`` rate-limits request starts across the whole batch.
+        With ``stream`` the bodies are left unread for the caller to iterate.
+        With ``process``, ``process(index, response or exception)`` is called
+        as soon as each URL completes and its return value takes the
+        response's place in the results. It runs on its own threads, so a
+        slow ``process`` never occupies a fetch thread, but each URL holds
+        one of ``max_concurrency`` processing slots from the start of its
+        fetch until ``process`` returns. A blocked ``process`` therefore
+        stops new fetches from starting instead of letting responses queue
+        up in memory.
+        """
+        if not urls:
+            return []
+        return asyncio.run(self.gather(urls, min_interval, stream, process))
+
+    def fetch_one(self, url):
+        """Fetches a single URL, raising on failure"""
+        result = self.fetch_all([url])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self):
+        """Shuts down the worker threads"""
+        self.executor.shutdown(wait=False)
+        self.process_executor.shutdown(wait=False)
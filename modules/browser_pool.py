@@ -0,0 +1,167 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from modules.javascript_rendering import JavaScriptRenderer
+
+
+class BrowserPool:
+    """Pool of long-lived headless Chrome renderers with checkout/return semantics.
+
+    Drivers are started lazily up to ``browser_pool_size`` and reused across
+    pages and jobs. A driver is recycled after ``browser_max_pages`` renders
+    or once its Chrome processes' resident memory exceeds ``browser_max_memory_mb``.
+    Rendered pages, bytes transferred and responses served from Chrome's
+    cache are totalled across all drivers.
+    Changing the renderer settings (e.g. the proxy) with ``configure`` retires
+    the existing drivers, since Chrome's proxy is fixed at startup.
+    """
+
+    def __init__(self, settings, renderer_settings):
+        self.size = max(1, int(settings.get('browser_pool_size', 2)))
+        self.max_pages = int(settings.get('browser_max_pages', 100))
+        self.max_memory_mb = float(settings.get('browser_max_memory_mb', 1024))
+        self.renderer_settings = dict(renderer_settings)
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.generation = 0
+        self.closed = False
+        self._next_start = 0.0
+        self.pages_rendered = 0
+        self.bytes_transferred = 0
+        self.cache_hits = 0
+        self.metrics = None  # Set by the engine running on the pool
+
+    def configure(self, renderer_settings):
+        """Switch renderer settings, retiring drivers started with the old ones"""
+        with self.lock:
+            if dict(renderer_settings) == self.renderer_settings:
+                return
+            self.renderer_settings = dict(renderer_settings)
+            self.generation += 1
+        self._drain()
+
+    def checkout(self):
+        """Take an idle renderer, starting a new one if the pool is not full"""
+        while True:
+            with self.lock:
+                if self.closed:
+                    raise RuntimeError("Browser pool is closed")
+                try:
+                    return self.idle.get_nowait()
+                except queue.Empty:
+                    pass
+                if self.created < self.size:
+                    self.created += 1
+                    generation = self.generation
+                    renderer_settings = self.renderer_settings
+                    break
+            # Pool is full: wait for a renderer to come back (or be retired)
+            try:
+                return self.idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        try:
+            renderer = JavaScriptRenderer(renderer_settings)
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+        renderer.generation = generation
+        return renderer
+
+    def checkin(self, renderer):
+        """Return a renderer to the pool, recycling it if it is worn out"""
+        recycle = (self.closed
+                   or renderer.generation != self.generation
+                   or renderer.pages_rendered >= self.max_pages
+                   or (self.max_memory_mb and renderer.memory_usage_mb() >= self.max_memory_mb))
+        if recycle:
+            self._retire(renderer)
+        else:
+            self.idle.put(renderer)
+
+    @contextmanager
+    def renderer(self):
+        renderer = self.checkout()
+        try:
+            yield renderer
+        except Exception:
+            # A crashed driver cannot be reused; a page that merely failed to load can
+            if not self._is_alive(renderer):
+                self._retire(renderer)
+                renderer = None
+            raise
+        finally:
+            if renderer:
+                self.checkin(renderer)
+
+    def render_page(self, url, wait_selector=None):
+        """Render one page on any free renderer"""
+        with self.renderer() as renderer:
+            started = time.monotonic()
+            soup = renderer.render_page(url, wait_selector)
+            if self.metrics:
+                self.metrics.observe('render', time.monotonic() - started)
+                self.metrics.count('pages_rendered')
+                self.metrics.count('bytes', renderer.last_page_bytes)
+            with self.lock:
+                self.pages_rendered += 1
+                self.bytes_transferred += renderer.last_page_bytes
+                self.cache_hits += renderer.last_page_cached
+            return soup
+
+    def render_all(self, urls, min_interval=0, wait_selector=None):
+        """Render pages in parallel across the pool, returning soups or exceptions in URL order"""
+        if not urls:
+            return []
+
+        def render(url):
+            if min_interval:
+                self._wait_for_start(min_interval)
+            try:
+                return self.render_page(url, wait_selector)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self.size, len(urls)), thread_name_prefix='render') as executor:
+            return list(executor.map(render, urls))
+
+    def _wait_for_start(self, min_interval):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    @staticmethod
+    def _is_alive(renderer):
+        try:
+            renderer.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _retire(self, renderer):
+        with self.lock:
+            self.created -= 1
+        try:
+            renderer.close()
+        except Exception:
+            pass
+
+    def _drain(self):
+        while True:
+            try:
+                renderer = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            self._retire(renderer)
+
+    def close(self):
+        """Quit every idle driver; checked-out drivers quit when returned"""
+        self.closed = True
+        self._drain()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.expanduser("~"), ".web_scraper_checkpoints")
+
+
+def job_fingerprint(urls, schema, settings, output_path=None, export_path=None):
+    """Identifies a job by its inputs, so a rerun of the same job finds its checkpoint"""
+    job = {
+        'urls': list(urls),
+        'fields': schema.fields,
+        'pagination': bool(settings.get('pagination')),
+        'max_pages': settings.get('max_pages'),
+        'output_path': output_path and os.path.abspath(output_path),
+        'export_path': export_path and os.path.abspath(export_path),
+    }
+    return hashlib.sha256(json.dumps(job, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+
+def page_scope(url):
+    """Checkpoint scope of the page digests seen while paginating ``url``"""
+    return f'page:{url}'
+
+
+class CheckpointStore:
+    """Progress of one job in a SQLite file: completed URLs, pagination state and output offsets.
+
+    Updates are buffered and written in a single transaction once
+    ``checkpoint_every`` updates or ``checkpoint_interval`` seconds have
+    accumulated, so the hot path only appends to a list. The caller passes
+    the offsets its output files report once everything before them is on
+    disk: the text output and CSV/JSON Lines exports are flushed, and a
+    Parquet export finishes its current part file. A committed URL or page
+    is then durable in every output that reports an offset; a writer whose
+    ``tell`` returns None is not resumed and makes no such promise.
+    Deduplication sets attached with ``attach_seen`` are saved alongside,
+    so a resumed job still recognises records and pages it output before.
+    """
+
+    def __init__(self, settings, fingerprint):
+        directory = settings.get('checkpoint_dir') or DEFAULT_CHECKPOINT_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'{fingerprint}.sqlite3')
+        self.every = max(1, int(settings.get('checkpoint_every', 50)))
+        self.interval = float(settings.get('checkpoint_interval', 5.0))
+        self.resumed = os.path.exists(self.path)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS completed (url TEXT PRIMARY KEY)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS pagination "
+                        "(url TEXT PRIMARY KEY, current_page INTEGER, total_pages INTEGER)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS offsets (name TEXT PRIMARY KEY, value INTEGER)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen "
+                        "(scope TEXT, digest BLOB, PRIMARY KEY (scope, digest)) WITHOUT ROWID")
+        self.db.commit()
+        self.completed = {row[0] for row in self.db.execute("SELECT url FROM completed")}
+        self.pagination = {row[0]: (row[1], row[2]) for row in self.db.execute("SELECT * FROM pagination")}
+        self.offsets = dict(self.db.execute("SELECT name, value FROM offsets").fetchall())
+        self.pending_urls = []
+        self.pending_pages = {}
+        self.seen_sets = {}
+        self.pending_seen = []
+        self.last_commit = time.monotonic()
+
+    def is_done(self, url):
+        return url in self.completed
+
+    def mark_done(self, url):
+        self.completed.add(url)
+        self.pending_urls.append(url)
+        self.pending_pages.pop(url, None)
+        self.seen_sets.pop(page_scope(url), None)  # Its page digests are deleted on commit
+
+    def save_pagination(self, url, current_page, total_pages):
+        self.pagination[url] = (current_page, total_pages)
+        self.pending_pages[url] = (current_page, total_pages)
+
+    def attach_seen(self, scope, seen):
+        """Load the digests saved under ``scope`` into a ContentHashSet and save its new ones from now on"""
+        seen.load(row[0] for row in self.db.execute("SELECT digest FROM seen WHERE scope = ?", (scope,)))
+        seen.start_journal()
+        self.seen_sets[scope] = seen
+
+    def collect_seen(self):
+        """Take the digests added since the last commit; call before the output offsets are read"""
+        for scope, seen in list(self.seen_sets.items()):
+            self.pending_seen.extend((scope, digest) for digest in seen.take_new())
+
+    def due(self):
+        pending = len(self.pending_urls) + len(self.pending_pages)
+        return pending >= self.every or (pending and time.monotonic() - self.last_commit >= self.interval)
+
+    def commit(self, offsets):
+        """Write buffered progress together with the output offsets it corresponds to"""
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO completed VALUES (?)", ((url,) for url in self.pending_urls))
+            self.db.executemany("INSERT OR REPLACE INTO pagination VALUES (?, ?, ?)",
+                                ((url, page, total) for url, (page, total) in self.pending_pages.items()))
+            self.db.executemany("INSERT OR REPLACE INTO offsets VALUES (?, ?)",
+                                ((name, value) for name, value in offsets.items() if value is not None))
+            self.db.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?)", self.pending_seen)
+            self.db.executemany("DELETE FROM seen WHERE scope = ?", ((page_scope(url),) for url in self.pending_urls))
+        self.offsets.update({name: value for name, value in offsets.items() if value is not None})
+        self.pending_urls = []
+        self.pending_pages = {}
+        self.pending_seen = []
+        self.last_commit = time.monotonic()
+
+    def close(self):
+        self.db.close()
+
+    def discard(self):
+        """Delete the checkpoint once the job has finished"""
+        self.close()
+        os.remove(self.path)
@@ -0,0 +1,158 @@
+import hashlib
+import heapq
+import itertools
+import math
+import re
+import time
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Links to files that are never worth fetching as pages
+SKIPPED_EXTENSIONS = re.compile(
+    r'\.(?:jpe?g|png|gif|webp|svg|ico|bmp|css|js|woff2?|ttf|pdf|zip|gz|tar|rar|7z|exe|dmg|mp[34]|avi|mov|webm)$',
+    re.IGNORECASE)
+
+
+def normalize_url(url, base=None):
+    """Canonical form of an http(s) URL, or None for anything that is not a crawlable page.
+
+    Resolves ``url`` against ``base``, lowercases the scheme and host, drops
+    default ports, user info, fragments and utm_* tracking parameters, and
+    sorts the query, so that equivalent links share one seen-set entry.
+    """
+    try:
+        parts = urlsplit(urljoin(base, url.strip()) if base else url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+    netloc = host if port is None or port == DEFAULT_PORTS[scheme] else f'{host}:{port}'
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not key.lower().startswith('utm_')))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set: no false negatives, false positives at about ``error_rate``.
+
+    Memory is about 1.8 bytes (14.4 bits) per item at a 0.1% error rate, so ten million
+    URLs fit in ~18 MB. A false positive only means a URL is not crawled.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        """Add an item; returns False if it was (probably) already present"""
+        new = False
+        for position in self._positions(item):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class URLFrontier:
+    """Priority queue of URLs to crawl, with depth limits, link filters and per-host politeness.
+
+    URLs are queued per host and scored by depth (breadth first), plus
+    ``crawl_priority_boost`` for URLs matching ``crawl_priority_pattern``.
+    A link is queued when it is within ``crawl_max_depth``, on a seed host
+    (unless ``crawl_same_host`` is off), matches ``crawl_follow`` and not
+    ``crawl_exclude``, and has not been seen before. ``next_batch`` takes
+    at most ``per_host_concurrency`` URLs per host, or one per
+    ``crawl_delay`` seconds when a delay is set.
+    """
+
+    def __init__(self, settings):
+        self.max_depth = int(settings.get('crawl_max_depth', 2))
+        self.max_pages = int(settings.get('crawl_max_pages', 1000))
+        self.same_host = settings.get('crawl_same_host', True)
+        self.follow = re.compile(settings['crawl_follow']) if settings.get('crawl_follow') else None
+        self.exclude = re.compile(settings['crawl_exclude']) if settings.get('crawl_exclude') else None
+        self.priority_pattern = (re.compile(settings['crawl_priority_pattern'])
+                                 if settings.get('crawl_priority_pattern') else None)
+        self.priority_boost = float(settings.get('crawl_priority_boost', 1.0))
+        self.delay = float(settings.get('crawl_delay', 0))
+        self.per_host = 1 if self.delay else max(1, int(settings.get('per_host_concurrency', 4)))
+        self.seen = BloomFilter(int(settings.get('crawl_seen_capacity', 1000000)),
+                                float(settings.get('crawl_seen_error_rate', 0.001)))
+        self.hosts = {}
+        self.next_allowed = {}
+        self.seed_hosts = set()
+        self.order = itertools.count()
+        self.queued = 0
+
+    def __len__(self):
+        return self.queued
+
+    def add_seed(self, url):
+        url = normalize_url(url)
+        if url:
+            self.seed_hosts.add(urlsplit(url).hostname)
+            self.add(url, 0)
+
+    def should_follow(self, url):
+        if self.same_host and urlsplit(url).hostname not in self.seed_hosts:
+            return False
+        if SKIPPED_EXTENSIONS.search(urlsplit(url).path):
+            return False
+        if self.follow and not self.follow.search(url):
+            return False
+        return not (self.exclude and self.exclude.search(url))
+
+    def add_links(self, links, base, depth):
+        """Queue the links found on a page at ``depth``"""
+        if depth >= self.max_depth:
+            return
+        for link in links:
+            url = normalize_url(link, base)
+            if url and self.should_follow(url):
+                self.add(url, depth + 1)
+
+    def add(self, url, depth):
+        if not self.seen.add(url):
+            return
+        priority = depth - (self.priority_boost if self.priority_pattern and self.priority_pattern.search(url) else 0)
+        heapq.heappush(self.hosts.setdefault(urlsplit(url).hostname, []), (priority, next(self.order), url, depth))
+        self.queued += 1
+
+    def next_batch(self, limit):
+        """Highest-priority (url, depth) pairs from hosts that may be contacted now"""
+        now = time.monotonic()
+        ready = sorted((queue[0], host) for host, queue in self.hosts.items()
+                       if queue and self.next_allowed.get(host, 0) <= now)
+        batch = []
+        for _, host in ready:
+            queue = self.hosts[host]
+            for _ in range(min(self.per_host, limit - len(batch), len(queue))):
+                _, _, url, depth = heapq.heappop(queue)
+                batch.append((url, depth))
+            self.next_allowed[host] = now + self.delay
+            if len(batch) >= limit:
+                break
+        self.queued -= len(batch)
+        return batch
+
+    def wait_time(self):
+        """Seconds until some host with queued URLs may be contacted again"""
+        now = time.monotonic()
+        waits = [self.next_allowed.get(host, 0) - now for host, queue in self.hosts.items() if queue]
+        return max(0.0, min(waits)) if waits else 0.0
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+
+DIGEST_SIZE = 16
+DEFAULT_MEMORY_ITEMS = 1000000
+
+
+def content_hash(data):
+    """Short fixed-size digest of a body or record"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def record_hash(element):
+    """Digest of what an extracted element contributes to the output: field, tag, text and attributes"""
+    attrs = '\x1f'.join(f'{key}={value}' for key, value in sorted(element.attrs.items()))
+    return content_hash('\x1e'.join((element.field or '', element.name or '', element.text.strip(), attrs)))
+
+
+def page_hash(elements):
+    """Digest of a page's extracted elements, in page order"""
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for element in elements:
+        hasher.update(record_hash(element))
+    return hasher.digest()
+
+
+class ContentHashSet:
+    """Set of content digests, kept in memory and spilled to disk when it grows large.
+
+    Only 16-byte digests are stored, never the content itself. Once more than
+    ``dedup_memory_items`` digests are held in memory they are moved to a
+    SQLite file in ``dedup_dir`` (a temporary directory by default), and
+    lookups check both. After ``start_journal``, newly added digests are
+    also kept until ``take_new`` collects them, for saving elsewhere.
+    """
+
+    def __init__(self, settings=None):
+        settings = settings or {}
+        self.max_memory_items = int(settings.get('dedup_memory_items', DEFAULT_MEMORY_ITEMS))
+        self.spill_dir = settings.get('dedup_dir')
+        self.memory = set()
+        self.db = None
+        self.spill_path = None
+        self.lock = threading.Lock()
+        self.duplicates = 0
+        self.journal = None
+
+    def add(self, digest):
+        """Add a digest; returns False if it was already present"""
+        with self.lock:
+            if digest in self.memory or self._on_disk(digest):
+                self.duplicates += 1
+                return False
+            self._insert(digest)
+            if self.journal is not None:
+                self.journal.append(digest)
+            return True
+
+    def load(self, digests):
+        """Add previously saved digests, without counting or journalling them"""
+        with self.lock:
+            for digest in digests:
+                if digest not in self.memory and not self._on_disk(digest):
+                    self._insert(digest)
+
+    def start_journal(self):
+        with self.lock:
+            self.journal = []
+
+    def take_new(self):
+        """Digests added since the last call"""
+        with self.lock:
+            if self.journal is None:
+                return []
+            new, self.journal = self.journal, []
+            return new
+
+    def _insert(self, digest):
+        self.memory.add(digest)
+        if len(self.memory) > self.max_memory_items:
+            self._spill()
+
+    def __contains__(self, digest):
+        with self.lock:
+            return digest in self.memory or self._on_disk(digest)
+
+    def __len__(self):
+        with self.lock:
+            on_disk = self.db.execute("SELECT COUNT(*) FROM hashes").fetchone()[0] if self.db else 0
+            return len(self.memory) + on_disk
+
+    def _on_disk(self, digest):
+        return bool(self.db and self.db.execute("SELECT 1 FROM hashes WHERE digest = ?", (digest,)).fetchone())
+
+    def _spill(self):
+        if self.db is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            fd, self.spill_path = tempfile.mkstemp(prefix='dedup-', suffix='.sqlite3', dir=self.spill_dir)
+            os.close(fd)
+            self.db = sqlite3.connect(self.spill_path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS hashes (digest BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.db.executemany("INSERT OR IGNORE INTO hashes VALUES (?)", ((digest,) for digest in self.memory))
+        self.db.commit()
+        self.memory.clear()
+
+    def close(self):
+        """Drop the spill file, if any"""
+        with self.lock:
+            if self.db:
+                self.db.close()
+                self.db = None
+                os.remove(self.spill_path)
+            self.memory.clear()
+
+
+def drop_duplicate_records(elements, seen):
+    """Elements whose record digest is not yet in ``seen``, in order"""
+    return [element for element in elements if seen.add(record_hash(element))]
@@ -0,0 +1,593 @@
+import os
+import time
+import requests
+from modules.async_fetcher import AsyncFetcher
+from modules.checkpoint import CheckpointStore, job_fingerprint, page_scope
+from modules.exporters import DEFAULT_FIELDS, open_for_resume, open_writer
+from modules.dedup import ContentHashSet, drop_duplicate_records
+from modules.http_cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_MB
+from modules.http_pool import create_session
+from modules.metrics import Metrics
+from modules.profiling import ProfileSession
+from modules.parse_pool import ParsePool
+from modules.crawler import URLFrontier
+from modules.parsing import (ExtractionSchema, compile_selector, parse_document, release_document, extract_elements,
+                             stream_extract, StreamingNotSupported, STREAM_CHUNK_SIZE)
+from modules.network import TOR_SOCKS_PORT, build_proxies, get_random_user_agent
+from modules.proxy_pool import ProxyPool
+from modules.form_submission import LoginFailed
+from modules.session_manager import SessionManager
+from modules.tor_circuits import TorCircuitPool
+from modules.tor_control import TorIdentityRotator
+from modules.pagination_csv import PaginationHandler
+from modules.browser_pool import BrowserPool
+from modules.javascript_rendering import LIGHTWEIGHT_RESOURCE_TYPES
+
+
+class ScrapeEngine:
+    """GUI-free scraping engine shared by the Tkinter app and the CLI.
+
+    All configuration comes from a plain settings dict, so the engine can run
+    on machines without a display. Progress and status updates are reported
+    through optional callbacks. All requests go through one pooled
+    keep-alive ``session`` and JavaScript pages render on a ``browser_pool``;
+    callers may share both between runs to keep connections and Chrome warm.
+    Stage timings and counters of the current run are kept in ``metrics``.
+    """
+
+    def __init__(self, settings, on_progress=None, on_status=None, session=None, browser_pool=None):
+        self.settings = settings
+        self.session = session or create_session(settings)
+        self.on_progress = on_progress
+        self.on_status = on_status
+        self.running = True
+        self.errors = []
+        self.proxies = {}
+        self.browser_pool = browser_pool
+        self.owns_browser_pool = browser_pool is None
+        self.fetcher = None
+        self.parse_pool = None
+        self.circuit_pool = None
+        self.proxy_pool = None
+        self.identity_rotator = None
+        self.output = None
+        self.checkpoint = None
+        self.processed = 0  # URLs (or crawled pages) handled in the current run
+        self.metrics = Metrics()
+        self.profile_path = None
+        self.summary = []
+        self.metrics_written = 0.0
+        if settings.get("network_option") == "Tor Network":
+            self.circuit_pool = TorCircuitPool(settings)
+        elif settings.get("network_option") == "HTTP Proxy" and settings.get("proxy_list"):
+            self.proxy_pool = ProxyPool(settings)
+        self.session_manager = None
+        if SessionManager.is_enabled(settings):
+            self.session_manager = SessionManager(settings, self.session, get_proxies=self.get_proxies,
+                                                  on_status=self.report_status)
+
+    def stop(self):
+        """Stops the engine after the current page."""
+        self.running = False
+
+    def report_progress(self, value):
+        if self.on_progress:
+            self.on_progress(value)
+
+    def report_status(self, message):
+        if self.on_status:
+            self.on_status(message)
+
+    def report_summary(self, message):
+        """Report an end-of-run figure, also kept in ``summary`` for displays that show one final message"""
+        self.summary.append(message)
+        self.report_status(message)
+
+    def get_headers(self):
+        """Returns request headers for the next request"""
+        headers = {}
+        if self.settings.get("rotate_user_agents", False):
+            headers['User-Agent'] = get_random_user_agent()
+        return headers
+
+    def get_proxies(self):
+        """Returns the proxies dict for the configured network option"""
+        network_option = self.settings.get("network_option", "Own Network")
+        if self.proxy_pool:
+            # Requests pick their own proxy from the pool; this one is for the browser
+            return self.proxy_pool.best().proxies
+
+        return build_proxies(
+            network_option,
+            self.settings.get("proxy_address", ""),
+            self.settings.get("tor_socks_ip", "127.0.0.1"),
+            self.settings.get("tor_socks_port", TOR_SOCKS_PORT)
+        )
+
+    def init_renderer(self, proxies):
+        """Prepares the browser pool if rendering is enabled"""
+        if not self.settings.get("js_render"):
+            return
+        if self.settings.get("js_lightweight"):
+            block_types = set(self.settings.get("block_resource_types") or []) | set(LIGHTWEIGHT_RESOURCE_TYPES)
+            self.settings["block_resource_types"] = sorted(block_types)
+            self.settings["disable_images"] = True
+        renderer_settings = {
+            'timeout': self.settings.get("timeout", 10),
+            'render_wait': self.settings.get("render_wait", 2),
+            'wait_strategy': self.settings.get("wait_strategy", "fixed"),
+            'render_timeout': self.settings.get("render_timeout", self.settings.get("timeout", 10)),
+            'idle_time': self.settings.get("idle_time", 0.5),
+            'parser': self.settings.get("parser", "html.parser"),
+            'block_resource_types': list(self.settings.get("block_resource_types") or []),
+            'block_url_patterns': list(self.settings.get("block_url_patterns") or []),
+            'disable_images': self.settings.get("disable_images", False),
+            'measure_bytes': self.settings.get("measure_bytes", True),
+            'proxy': proxies.get('http') if proxies else None,
+            'chrome_driver_path': self.settings.get("chrome_driver_path")
+        }
+        if self.session_manager:
+            renderer_settings['cookies'] = self.session_manager.browser_cookies()
+        if self.settings.get("http_cache"):
+            renderer_settings['cache_dir'] = self.settings.get("cache_dir") or DEFAULT_CACHE_DIR
+            renderer_settings['cache_max_mb'] = self.settings.get("cache_max_mb", DEFAULT_CACHE_MAX_MB)
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool(self.settings, renderer_settings)
+        else:
+            self.browser_pool.configure(renderer_settings)
+        self.browser_pool.metrics = self.metrics
+
+    def init_identity_rotator(self):
+        """Connects the Tor identity rotator when a rotation policy is configured"""
+        if self.identity_rotator or not self.circuit_pool or not TorIdentityRotator.is_enabled(self.settings):
+            return
+        rotator = TorIdentityRotator(self.settings, self.circuit_pool, on_status=self.report_status)
+        try:
+            rotator.start()
+            self.identity_rotator = rotator
+        except Exception as e:
+            self.report_status(f"Tor identity rotation disabled: {e}")
+
+    def on_response(self, url, status_code, latency):
+        """Hook called by the fetcher after every request"""
+        if self.identity_rotator:
+            self.identity_rotator.record(status_code, latency)
+
+    def init_fetcher(self):
+        """Creates the concurrent fetcher shared by all requests of a run"""
+        if not self.parse_pool and ParsePool.is_enabled(self.settings):
+            self.parse_pool = ParsePool(self.settings, metrics=self.metrics)
+        if not self.fetcher:
+            self.init_identity_rotator()
+            if self.proxy_pool:
+                self.proxy_pool.start()
+            self.fetcher = AsyncFetcher(self.settings, get_headers=self.get_headers,
+                                        get_proxies=lambda: self.proxies,
+                                        route_pool=self.circuit_pool or self.proxy_pool,
+                                        on_response=self.on_response,
+                                        session=self.session,
+                                        session_manager=self.session_manager,
+                                        metrics=self.metrics)
+
+    def close(self):
+        """Releases the renderer and any other long-lived resources"""
+        if self.browser_pool and self.owns_browser_pool:
+            self.browser_pool.close()
+            self.browser_pool = None
+        if self.fetcher:
+            self.fetcher.close()
+            self.fetcher = None
+        if self.parse_pool:
+            self.parse_pool.close()
+            self.parse_pool = None
+        if self.identity_rotator:
+            self.identity_rotator.close()
+            self.identity_rotator = None
+        if self.proxy_pool:
+            self.proxy_pool.close()
+
+    def fetch_soup(self, url, schema):
+        """Fetches and parses a single page"""
+        if self.settings.get("js_render"):
+            return self.browser_pool.render_page(url, wait_selector=schema.selector)
+        response = self.fetcher.fetch_one(url)
+        return parse_document(response.content, self.settings, schema.selector)
+
+    def scrape_url(self, url, schema):
+        """Scrapes one URL, following pagination when enabled"""
+        if not self.settings.get("pagination"):
+            return self.extract(self.fetch_soup(url, schema), schema, url)
+
+        pagination_handler = PaginationHandler(url, schema, {
+            'pagination_selector': self.settings.get("pagination_selector", 'a[href*="page"]'),
+            'max_pages': self.settings.get("max_pages", 10),
+            'page_delay': self.settings.get("page_delay", 1.0),
+            'parser': self.settings.get("parser", "html.parser"),
+            'strain': self.settings.get("strain", True),
+            'dedup_pages': self.settings.get("dedup_pages", True),
+            'pagination_window': self.settings.get("pagination_window", 8),
+            'timeout': self.settings.get("timeout", 10),
+            'proxies': self.proxies
+        }, fetcher=self.fetcher, session=self.session, parse_pool=self.parse_pool,
+            browser_pool=self.browser_pool if self.settings.get("js_render") else None, metrics=self.metrics)
+        if self.output is None:
+            elements = pagination_handler.scrape_all_pages()
+        else:
+            # Pages are written as they arrive, so a checkpoint can record how far this URL got
+            elements = None
+            if self.checkpoint and url in self.checkpoint.pagination:
+                pagination_handler.restore(*self.checkpoint.pagination[url])
+            if self.checkpoint and pagination_handler.seen_pages is not None:
+                self.checkpoint.attach_seen(page_scope(url), pagination_handler.seen_pages)
+
+            def on_pages(page_elements):
+                self.output.emit(url, page_elements)
+                if self.checkpoint:
+                    self.checkpoint.save_pagination(url, pagination_handler.current_page,
+                                                    pagination_handler.total_pages)
+                    self.save_checkpoint()
+
+            pagination_handler.scrape_all_pages(on_pages)
+        if pagination_handler.reached_end:
+            self.report_status(f"Stopped after page {pagination_handler.current_page} of {url}: next page repeats an earlier one")
+        return elements
+
+    def prepare_batch(self):
+        """Picks the proxy for the next batch and makes sure the fetcher and renderer are ready"""
+        self.proxies = self.get_proxies()
+        self.init_renderer(self.proxies)
+        self.init_fetcher()
+
+    def scrape_batch(self, urls, schema):
+        """Scrapes a batch of URLs, returning (url, elements or exception) pairs in order.
+
+        Plain single-page URLs are fetched concurrently and rendered pages are
+        spread across the browser pool; paginated URLs fan out their own pages.
+        """
+        self.prepare_batch()
+
+        if self.settings.get("js_render") and not self.settings.get("pagination"):
+            return [(url, soup if isinstance(soup, Exception) else self.extract(soup, schema, url))
+                    for url, soup in zip(urls, self.browser_pool.render_all(urls, wait_selector=schema.selector))]
+
+        if self.settings.get("pagination"):
+            results = []
+            for url in urls:
+                if not self.running:
+                    break
+                try:
+                    results.append((url, self.scrape_url(url, schema)))
+                except Exception as e:
+                    results.append((url, e))
+            return results
+
+        stream = self.settings.get("stream_parse", False)
+        if self.parse_pool and not stream:
+            return [(url, elements) for url, (_, elements)
+                    in zip(urls, self.parse_pool.fetch_and_extract(self.fetcher, urls, schema))]
+
+        results = []
+        for url, response in zip(urls, self.fetcher.fetch_all(urls, stream=stream)):
+            if isinstance(response, Exception):
+                results.append((url, response))
+            elif stream:
+                results.append((url, self.extract_streaming(response, schema, url)))
+            else:
+                with self.metrics.timer('parse'):
+                    results.append((url, extract_elements(response.content, schema, self.settings, url)))
+        return results
+
+    def extract(self, soup, schema, url):
+        """Extract the schema's fields from a parsed page, timing it as parsing, then release the page"""
+        with self.metrics.timer('parse'):
+            try:
+                return schema.extract(soup, url)
+            finally:
+                release_document(soup)
+
+    def crawl_batch(self, urls, schema):
+        """Scrapes a batch of crawled pages, returning (elements or exception, page URL, links) in URL order"""
+        self.prepare_batch()
+        if self.settings.get("js_render"):
+            pages = [(url, soup, None) for url, soup in zip(urls, self.browser_pool.render_all(urls, wait_selector=schema.selector))]
+        else:
+            pages = [(url, response, None) if isinstance(response, Exception) else (response.url, None, response.content)
+                     for url, response in zip(urls, self.fetcher.fetch_all(urls))]
+        results = []
+        for page_url, soup, body in pages:
+            if isinstance(soup, Exception):
+                results.append((soup, page_url, []))
+                continue
+            with self.metrics.timer('parse'):
+                if soup is None:
+                    # Keep the links in the (possibly strained) tree alongside the schema's matches
+                    soup = parse_document(body, self.settings, f"{schema.selector}, a[href]")
+                links = [link.get('href') for link in compile_selector('a[href]').select(soup)]
+                results.append((schema.extract(soup, page_url), page_url, links))
+                release_document(soup)
+        return results
+
+    def list_batches(self, urls, schema):
+        """Yields (url, elements or exception) results for a fixed URL list, one batch at a time"""
+        batch_size = max(1, int(self.settings.get("batch_size", 64)))
+        for start in range(0, len(urls), batch_size):
+            if start:
+                time.sleep(self.settings.get("request_delay", 1.0))
+            batch = urls[start:start + batch_size]
+            try:
+                yield self.scrape_batch(batch, schema)
+            except requests.exceptions.RequestException as e:
+                yield [(url, e) for url in batch]
+
+    def crawl_batches(self, urls, schema):
+        """Yields results while crawling outwards from ``urls`` through a URLFrontier.
+
+        Every fetched page's links are normalized, filtered and queued one
+        level deeper; the crawl ends when the frontier is empty or
+        ``crawl_max_pages`` pages have been fetched.
+        """
+        frontier = URLFrontier(self.settings)
+        for url in urls:
+            frontier.add_seed(url)
+        batch_size = max(1, int(self.settings.get("batch_size", 64)))
+        crawled = 0
+        while len(frontier) and crawled < frontier.max_pages:
+            batch = frontier.next_batch(min(batch_size, frontier.max_pages - crawled))
+            if not batch:
+                time.sleep(frontier.wait_time())
+                continue
+            batch_urls = [url for url, _ in batch]
+            try:
+                pages = self.crawl_batch(batch_urls, schema)
+            except requests.exceptions.RequestException as e:
+                pages = [(e, url, []) for url in batch_urls]
+            results = []
+            for (url, depth), (elements, page_url, links) in zip(batch, pages):
+                frontier.add_links(links, page_url, depth)
+                results.append((url, elements))
+            crawled += len(batch)
+            self.report_status(f"Crawled {crawled} pages, {len(frontier)} queued")
+            yield results
+
+    def extract_streaming(self, response, schema, url):
+        """Extract matches while the body downloads, without building a tree"""
+        try:
+            # Download and parsing are interleaved, so both count as parsing here
+            with self.metrics.timer('parse'):
+                return list(stream_extract(response.iter_content(STREAM_CHUNK_SIZE), schema, url))
+        except StreamingNotSupported:
+            return extract_elements(response.content, schema, self.settings, url)
+        except Exception as e:
+            return e
+        finally:
+            response.close()
+
+    def open_checkpoint(self, urls, schema, output_path, export_path):
+        """Opens the job's checkpoint when checkpointing is enabled, reporting what is resumed.
+
+        Link crawls are not checkpointed, since their frontier is not persisted.
+        """
+        if not self.settings.get("checkpoint") or self.settings.get("crawl"):
+            return None
+        checkpoint = CheckpointStore(self.settings,
+                                     job_fingerprint(urls, schema, self.settings, output_path, export_path))
+        if checkpoint.resumed:
+            pages = sum(page for url, (page, _) in checkpoint.pagination.items() if not checkpoint.is_done(url))
+            self.report_status(f"Resuming: {len(checkpoint.completed)} of {len(urls)} URLs done"
+                               + (f", {pages} pages of unfinished URLs" if pages else ""))
+        return checkpoint
+
+    def write_metrics(self, force=False):
+        """Rewrite the ``metrics_path`` file at most every ``metrics_interval`` seconds, so headless runs can be watched"""
+        path = self.settings.get("metrics_path")
+        if not path:
+            return
+        if force or time.monotonic() - self.metrics_written >= float(self.settings.get("metrics_interval", 10)):
+            self.metrics.write(path, self.settings.get("metrics_format"))
+            self.metrics_written = time.monotonic()
+
+    def save_checkpoint(self, force=False):
+        """Commits buffered checkpoint updates once enough have accumulated"""
+        if self.checkpoint and (force or self.checkpoint.due()):
+            # Digests first: one saved after the offsets could outlive the truncated record it stands for
+            self.checkpoint.collect_seen()
+            self.checkpoint.commit(self.output.offsets())
+
+    def run(self, urls, selector, output_path=None, on_result=None, export_path=None, export_fields=None,
+            export_format=None):
+        """Scrapes every URL and streams the extracted records as they arrive.
+
+        ``selector`` is a CSS selector or an ``ExtractionSchema``; all schema
+        fields are extracted from a single fetch and parse of each page.
+
+        URLs are processed in batches of ``batch_size``; within a batch plain
+        pages are fetched concurrently. Each page's tree is released as soon
+        as its ``ExtractedElement`` records are taken out. Text lines are
+        appended to ``output_path`` and the records are passed to
+        ``on_result(url, elements)`` after each batch, so memory
+        does not grow with the number of URLs; paginated URLs are written
+        after every window of pages.
+        Elements are also appended to ``export_path`` (CSV, JSON Lines or
+        Parquet, by ``export_format`` or the file extension) as they arrive.
+        With ``dedup_records`` on (off by default), an element identical to
+        one already output (same field, tag, text and attributes) is dropped.
+        That also drops genuinely repeated values, such as equal cells in
+        different table rows, so it only suits records that identify
+        themselves (links, items with unique text).
+
+        With ``checkpoint`` on, completed URLs, pagination state and output
+        offsets are recorded as the job runs; running the same job again
+        skips what was done and continues the output files from the last
+        checkpoint, still recognising the records and repeated pages seen
+        before. The checkpoint is deleted once every URL has succeeded.
+
+        With ``login_url`` and ``login_username`` set, the session logs in
+        first, or reuses the cookies saved by an earlier job's login.
+        With ``profile`` on, the run is profiled (see ``ProfileSession``) and
+        the report and flame graph input are saved to ``profile_dir``, by
+        default next to the export or output file.
+        Returns the number of extracted elements.
+        """
+        if not self.settings.get("profile"):
+            return self._run(urls, selector, output_path, on_result, export_path, export_fields, export_format)
+        directory = self.settings.get("profile_dir") or os.path.dirname(export_path or output_path or "") or "."
+        profile = ProfileSession(self.settings, directory)
+        profile.start()
+        try:
+            return self._run(urls, selector, output_path, on_result, export_path, export_fields, export_format)
+        finally:
+            self.profile_path = profile.stop()
+            self.report_summary(f"Profile saved to {self.profile_path}")
+
+    def _run(self, urls, selector, output_path, on_result, export_path, export_fields, export_format):
+        self.running = True
+        self.errors = []
+        self.summary = []
+        self.processed = 0
+        self.metrics.reset()
+        schema = ExtractionSchema.coerce(selector)
+        total = len(urls)
+        if self.session_manager:
+            try:
+                self.session_manager.ensure_login()
+            except (LoginFailed, requests.exceptions.RequestException) as e:
+                self.errors.append((self.session_manager.login_url, f"Login failed: {e}"))
+                return 0
+        self.checkpoint = self.open_checkpoint(urls, schema, output_path, export_path)
+        resume_offsets = self.checkpoint.offsets if self.checkpoint and self.checkpoint.resumed else None
+        self.output = RunOutput(self.settings, schema, output_path, on_result, export_path, export_fields,
+                                export_format, resume_offsets, metrics=self.metrics)
+        if self.checkpoint and self.output.seen_records is not None:
+            self.checkpoint.attach_seen('records', self.output.seen_records)
+        pending = [url for url in urls if not (self.checkpoint and self.checkpoint.is_done(url))]
+        done = total - len(pending)
+        if self.settings.get("crawl"):
+            batches = self.crawl_batches(pending, schema)
+            total = int(self.settings.get("crawl_max_pages", 1000))
+        else:
+            batches = self.list_batches(pending, schema)
+        if self.session.response_cache:
+            self.session.response_cache.reset_stats()
+        self.report_progress(int(done * 100 / total) if total else 0)
+        try:
+            for results in batches:
+                for url, elements in results:
+                    done += 1
+                    self.processed += 1
+                    self.report_progress(min(100, int(done * 100 / total)))
+                    if isinstance(elements, requests.exceptions.RequestException):
+                        self.errors.append((url, f"Request Error: {elements}"))
+                        continue
+                    if isinstance(elements, Exception):
+                        self.errors.append((url, f"An unexpected error occurred: {elements}"))
+                        continue
+                    if elements is not None:  # Paginated URLs were written page by page
+                        self.output.emit(url, elements)
+                    if self.checkpoint:
+                        self.checkpoint.mark_done(url)
+
+                self.output.flush()
+                self.save_checkpoint()
+                self.write_metrics()
+                if not self.running:
+                    break
+        finally:
+            if self.checkpoint:
+                if self.running and not self.errors and self.checkpoint.completed.issuperset(urls):
+                    self.checkpoint.discard()
+                else:
+                    self.save_checkpoint(force=True)
+                    self.checkpoint.close()
+                    self.report_summary("Checkpoint saved; run the same job again to resume")
+                self.checkpoint = None
+            output, self.output = self.output, None
+            output.close()
+            if output.writer:
+                self.report_summary(f"Exported {output.writer.rows_written} records to {output.writer.path}")
+            if self.browser_pool and self.browser_pool.pages_rendered:
+                self.report_summary(f"Rendered {self.browser_pool.pages_rendered} pages, "
+                                   f"{self.browser_pool.bytes_transferred / 1024:.0f} KB transferred"
+                                   + (f", {self.browser_pool.cache_hits} from cache" if self.browser_pool.cache_hits else ""))
+            if self.session.response_cache:
+                self.report_summary(self.session.response_cache.stats_text())
+            throttle_stats = self.fetcher.rate_limiter.stats_text() if self.fetcher and self.fetcher.rate_limiter else None
+            if throttle_stats:
+                self.report_summary(throttle_stats)
+            if self.proxy_pool:
+                self.report_summary(self.proxy_pool.stats_text())
+            if output.seen_records is not None and output.seen_records.duplicates:
+                self.report_summary(f"Dropped {output.seen_records.duplicates} duplicate records")
+            if self.settings.get("metrics_path"):
+                self.write_metrics(force=True)
+                self.report_summary(f"Metrics written to {self.settings['metrics_path']}")
+            self.close()
+        return output.count
+
+
+class RunOutput:
+    """Where one run's elements go: the text file, the ``on_result`` callback and the export writer.
+
+    ``resume_offsets`` (from a checkpoint) truncates the text and export
+    files back to the last checkpoint and appends from there; otherwise
+    they are overwritten.
+    """
+
+    def __init__(self, settings, schema, output_path=None, on_result=None, export_path=None, export_fields=None,
+                 export_format=None, resume_offsets=None, metrics=None):
+        self.schema = schema
+        self.metrics = metrics or Metrics()
+        self.on_result = on_result
+        self.count = 0
+        self.seen_records = ContentHashSet(settings) if settings.get("dedup_records", False) else None
+        self.output_file = None
+        if output_path:
+            offset = None
+            if resume_offsets is not None and os.path.exists(output_path):
+                offset = min(resume_offsets.get('output', 0), os.path.getsize(output_path))
+            self.output_file = open_for_resume(output_path, offset)
+        self.writer = None
+        if export_path:
+            if not export_fields:
+                export_fields = (['field'] if schema.is_multi_field else []) + DEFAULT_FIELDS
+            self.writer = open_writer(export_path, export_fields, export_format,
+                                      settings.get("export_flush_every", 1000),
+                                      resume_offsets.get('export', 0) if resume_offsets is not None else None)
+
+    def emit(self, url, elements):
+        """Write one URL's (or one window of pages') elements everywhere they go"""
+        with self.metrics.timer('export'):
+            self.write(url, elements)
+
+    def write(self, url, elements):
+        if self.seen_records is not None:
+            elements = drop_duplicate_records(elements, self.seen_records)
+        self.count += len(elements)
+        self.metrics.count('elements', len(elements))
+        if self.output_file:
+            self.output_file.writelines(f"{self.schema.text_line(element)}\n" for element in elements)
+        if self.on_result:
+            self.on_result(url, elements)
+        if self.writer:
+            self.writer.write(elements)
+
+    def flush(self):
+        if self.output_file:
+            self.output_file.flush()
+        if self.writer:
+            self.writer.flush()
+
+    def offsets(self):
+        """Flush, then return how far each resumable file has been written"""
+        self.flush()
+        return {
+            'output': self.output_file.tell() if self.output_file else None,
+            'export': self.writer.tell() if self.writer else None,
+        }
+
+    def close(self):
+        if self.output_file:
+            self.output_file.close()
+        if self.writer:
+            self.writer.close()
+        if self.seen_records is not None:
+            self.seen_records.close()
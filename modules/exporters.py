@@ -0,0 +1,219 @@
+import csv
+import json
+import os
+
+DEFAULT_FIELDS = ['text', 'href']
+DEFAULT_FLUSH_EVERY = 1000
+
+
+def field_value(element, field):
+    """Value of one export column: the element's text, schema field, tag name, source URL, page number or an attribute"""
+    if field == 'text':
+        return element.text.strip()
+    if field == 'field':
+        return element.field or ''
+    if field in ('tag', 'name'):
+        return element.name
+    if field == 'url':
+        return element.url or ''
+    if field == 'page':
+        return str(element.page)
+    return element.get(field, '')
+
+
+class ExportWriter:
+    """Appends extracted elements to a file as they arrive.
+
+    Each element becomes one row of ``fields``. Rows are handed to the
+    backend as soon as they are written and flushed to disk every
+    ``flush_every`` rows and on ``flush``, so memory stays flat however many
+    elements are exported. Formats whose ``tell`` returns an offset can
+    resume an interrupted export from it.
+    """
+    extension = None
+
+    def __init__(self, path, fields=None, flush_every=DEFAULT_FLUSH_EVERY, resume_offset=None):
+        self.path = path
+        self.fields = list(fields or DEFAULT_FIELDS)
+        self.flush_every = max(1, int(flush_every))
+        self.rows_written = 0
+        self.pending = 0
+
+    def write(self, elements):
+        for element in elements:
+            self.write_row({field: field_value(element, field) for field in self.fields})
+            self.rows_written += 1
+            self.pending += 1
+            if self.pending >= self.flush_every:
+                self.flush()
+
+    def write_row(self, row):
+        raise NotImplementedError
+
+    def tell(self):
+        """Offset of everything flushed so far (bytes for text formats), or None if the format cannot be resumed"""
+        return None
+
+    def flush(self):
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CSVWriter(ExportWriter):
+    extension = '.csv'
+
+    def __init__(self, path, fields=None, flush_every=DEFAULT_FLUSH_EVERY, resume_offset=None):
+        super().__init__(path, fields, flush_every)
+        self.file = open_for_resume(path, resume_offset, newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fields)
+        if not self.file.tell():
+            self.writer.writeheader()
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+
+    def flush(self):
+        super().flush()
+        self.file.flush()
+
+    def tell(self):
+        self.flush()
+        return self.file.tell()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+
+class JSONLWriter(ExportWriter):
+    """One JSON object per line"""
+    extension = '.jsonl'
+
+    def __init__(self, path, fields=None, flush_every=DEFAULT_FLUSH_EVERY, resume_offset=None):
+        super().__init__(path, fields, flush_every)
+        self.file = open_for_resume(path, resume_offset)
+
+    def write_row(self, row):
+        self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def flush(self):
+        super().flush()
+        self.file.flush()
+
+    def tell(self):
+        self.flush()
+        return self.file.tell()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+
+class ParquetWriter(ExportWriter):
+    """Columnar Parquet via pyarrow.
+
+    Rows are buffered and written as one row group per ``flush_every`` rows
+    (and on close); many tiny row groups would make the file slow to read.
+    A Parquet file is only readable once its footer is written, so ``tell``
+    finishes the current file and later rows go on in ``<name>.partN.parquet``
+    files next to it. The offset it returns is the number of finished files;
+    resuming from it deletes any part written after it.
+    """
+    extension = '.parquet'
+
+    def __init__(self, path, fields=None, flush_every=DEFAULT_FLUSH_EVERY, resume_offset=None):
+        super().__init__(path, fields, flush_every)
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([(field, pyarrow.string()) for field in self.fields])
+        self.parts = resume_offset or 0
+        self.writer = None
+        self.columns = {field: [] for field in self.fields}
+        # Parts past the resume point hold rows the checkpoint never saw; a fresh export drops all old parts
+        part = self.parts
+        while part == 0 or os.path.exists(self.part_path(part)):
+            if os.path.exists(self.part_path(part)):
+                os.remove(self.part_path(part))
+            part += 1
+
+    def part_path(self, part):
+        if not part:
+            return self.path
+        root, extension = os.path.splitext(self.path)
+        return f'{root}.part{part}{extension}'
+
+    def write_row(self, row):
+        for field in self.fields:
+            self.columns[field].append(row[field])
+
+    def flush(self):
+        if self.pending >= self.flush_every:
+            self.write_row_group()
+
+    def write_row_group(self):
+        self.pending = 0
+        if self.columns[self.fields[0]]:
+            if self.writer is None:
+                self.writer = self.pyarrow.parquet.ParquetWriter(self.part_path(self.parts), self.schema)
+            self.writer.write_table(self.pyarrow.table(self.columns, schema=self.schema))
+            self.columns = {field: [] for field in self.fields}
+
+    def finish_part(self):
+        """Write buffered rows and the footer of the current part"""
+        self.write_row_group()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.parts += 1
+
+    def tell(self):
+        """Number of finished part files; every row written so far is in one of them"""
+        self.finish_part()
+        return self.parts
+
+    def close(self):
+        self.finish_part()
+        if not self.parts:  # Nothing written: still leave a readable, empty file
+            self.pyarrow.parquet.ParquetWriter(self.path, self.schema).close()
+
+
+def open_for_resume(path, resume_offset=None, newline=None):
+    """Open a text file for writing; with ``resume_offset``, keep its first bytes and append after them"""
+    if resume_offset is not None and os.path.exists(path):
+        with open(path, 'r+b') as f:
+            f.truncate(resume_offset)
+        return open(path, 'a', newline=newline, encoding='utf-8')
+    return open(path, 'w', newline=newline, encoding='utf-8')
+
+
+EXPORT_FORMATS = {
+    'csv': CSVWriter,
+    'jsonl': JSONLWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def export_format_for(path):
+    """Export format implied by a file name, defaulting to CSV"""
+    extension = os.path.splitext(path)[1].lower()
+    for name, writer_class in EXPORT_FORMATS.items():
+        if extension == writer_class.extension or extension == '.' + name:
+            return name
+    return 'csv'
+
+
+def open_writer(path, fields=None, export_format=None, flush_every=DEFAULT_FLUSH_EVERY, resume_offset=None):
+    """Open an export writer for ``path``; the format comes from the extension unless given.
+
+    ``resume_offset`` (from ``tell``) continues an interrupted export.
+    """
+    return EXPORT_FORMATS[export_format or export_format_for(path)](path, fields, flush_every, resume_offset)
@@ -1,58 +1,99 @@
-import requests
-from bs4 import BeautifulSoup
+import re
 from urllib.parse import urljoin
+from modules.http_pool import create_session
+from modules.parsing import parse_document
+
+USERNAME_FIELDS = ('username', 'user', 'email', 'login')
+LOGGED_IN_MARKERS = ('logout', 'log out', 'sign out', 'welcome')
+# Login pages carry per-session CSRF tokens, and the response cache does not key on cookies
+NO_STORE = {'Cache-Control': 'no-store'}
+PASSWORD_INPUT = re.compile(rb'<input[^>]+type\s*=\s*["\']?password', re.IGNORECASE)
+
+
+class LoginFailed(Exception):
+    """The login form could not be found or did not accept the credentials"""
+
 
 class FormSubmitter:
-    def __init__(self, settings):
+    def __init__(self, settings, session=None, proxies=None):
         self.settings = settings
-        self.session = requests.Session()
-        
+        self.session = session or create_session(settings)
+        self.proxies = proxies or {}
+
     def detect_login_form(self, url):
-        """Detect login form on a page"""
-        response = self.session.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        forms = soup.find_all('form')
+        """Detect login forms (forms with a password field) on a page"""
+        response = self.session.get(url, headers=NO_STORE, proxies=self.proxies, timeout=self.settings.get('timeout', 10))
+        response.raise_for_status()
+        soup = parse_document(response.content, self.settings, 'form')
+
         login_forms = []
-        
-        for form in forms:
+        for form in soup.find_all('form'):
             inputs = form.find_all('input')
-            has_username = any(i.get('name', '').lower() in ['username', 'email', 'login'] for i in inputs)
-            has_password = any(i.get('type') == 'password' for i in inputs)
-            
-            if has_username and has_password:
-                login_forms.append({
-                    'action': urljoin(url, form.get('action', '')),
-                    'method': form.get('method', 'get').upper(),
-                    'inputs': {i.get('name'): i.get('value', '') for i in inputs if i.get('name')}
-                })
-                
+            password_field = next((i.get('name') for i in inputs if i.get('type') == 'password' and i.get('name')), None)
+            if not password_field:
+                continue
+            text_fields = [i.get('name') for i in inputs
+                           if i.get('name') and i.get('type', 'text') in ('text', 'email')]
+            username_field = next((name for name in text_fields if name.lower() in USERNAME_FIELDS),
+                                  text_fields[0] if text_fields else None)
+            login_forms.append({
+                'action': urljoin(response.url, form.get('action', '')),
+                'method': form.get('method', 'get').upper(),
+                # Hidden fields such as CSRF tokens are sent back unchanged
+                'inputs': {i.get('name'): i.get('value', '') for i in inputs if i.get('name')},
+                'username_field': username_field,
+                'password_field': password_field,
+            })
+
         return login_forms
-        
+
     def submit_login_form(self, form_data, credentials):
         """Submit login form with credentials"""
-        # Update form data with credentials
-        form_data['inputs'].update({
-            'username': credentials.get('username'),
-            'password': credentials.get('password')
-        })
-        
+        inputs = dict(form_data['inputs'])
+        if form_data.get('username_field'):
+            inputs[form_data['username_field']] = credentials.get('username')
+        inputs[form_data.get('password_field') or 'password'] = credentials.get('password')
+
         if form_data['method'] == 'POST':
             response = self.session.post(
                 form_data['action'],
-                data=form_data['inputs'],
-                headers={'Referer': form_data['action']}
+                data=inputs,
+                headers={'Referer': form_data['action']},
+                proxies=self.proxies,
+                timeout=self.settings.get('timeout', 10)
             )
         else:
             response = self.session.get(
                 form_data['action'],
-                params=form_data['inputs']
+                params=inputs,
+                headers=NO_STORE,
+                proxies=self.proxies,
+                timeout=self.settings.get('timeout', 10)
             )
-            
+
+        return response
+
+    def is_logged_in(self, response, check_text=None):
+        """Check if login was successful.
+
+        With ``check_text``, the page must contain it; otherwise the page
+        must either mention logging out / a welcome, or no longer show a
+        password field.
+        """
+        if not response.ok:
+            return False
+        if check_text:
+            return check_text.lower() in response.text.lower()
+        text = response.text.lower()
+        return any(marker in text for marker in LOGGED_IN_MARKERS) or not PASSWORD_INPUT.search(response.content)
+
+    def login(self, url, credentials, check_text=None):
+        """Find the login form on ``url`` and submit it, raising LoginFailed if that does not log in"""
+        forms = self.detect_login_form(url)
+        if not forms:
+            raise LoginFailed(f"No login form found on {url}")
+        response = self.submit_login_form(forms[0], credentials)
+        response.raise_for_status()
+        if not self.is_logged_in(response, check_text):
+            raise LoginFailed("The site did not accept the credentials")
         return response
-        
-    def is_logged_in(self, response):
-        """Check if login was successful"""
-        # Implement custom logic to check for login success
-        # This could be checking for a specific element, cookie, or redirect
-        return 'logout' in response.text.lower() or 'welcome' in response.text.lower()
\ No newline at end of file
@@ -0,0 +1,219 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.response import HTTPResponse
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".web_scraper_cache")
+DEFAULT_CACHE_MAX_MB = 500
+DEFAULT_KEY_HEADERS = ('Accept', 'Accept-Language')
+
+
+def parse_cache_control(value):
+    """Parse a Cache-Control header into a dict of directive -> value (or True)"""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else True
+    return directives
+
+
+class ResponseCache:
+    """Persistent HTTP response cache stored in a SQLite file.
+
+    Entries are keyed by URL plus the request's cookies and the headers
+    named in ``cache_key_headers`` and in the response's Vary header, so a
+    page fetched under one login (or none) is never replayed to another. Freshness follows
+    Cache-Control (no-store, no-cache, max-age) and Expires; stale entries with
+    an ETag or Last-Modified are revalidated with a conditional request.
+    The total body size is capped at ``cache_max_mb`` by evicting the least
+    recently used entries.
+    """
+
+    def __init__(self, settings):
+        self.directory = settings.get('cache_dir') or DEFAULT_CACHE_DIR
+        self.max_bytes = int(float(settings.get('cache_max_mb', DEFAULT_CACHE_MAX_MB)) * 1024 * 1024)
+        self.min_ttl = float(settings.get('cache_min_ttl', 0))
+        self.key_headers = tuple(settings.get('cache_key_headers') or DEFAULT_KEY_HEADERS)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(self.directory, 'responses.sqlite3'), check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, body BLOB,
+            size INTEGER, stored_at REAL, expires_at REAL, last_access REAL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS vary (url TEXT PRIMARY KEY, headers TEXT)")
+        self.db.commit()
+
+    def key_for(self, request, vary=None):
+        """Cache key from the URL and the headers that select a representation"""
+        if vary is None:
+            with self.lock:
+                row = self.db.execute("SELECT headers FROM vary WHERE url = ?", (request.url,)).fetchone()
+            vary = json.loads(row[0]) if row else []
+        names = {'cookie'} | {name.lower() for name in self.key_headers} | {name.lower() for name in vary}
+        parts = [request.url] + [f'{name}={request.headers.get(name, "")}' for name in sorted(names)]
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, headers, body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+                self.db.commit()
+        if not row:
+            return None
+        return {'status': row[0], 'headers': json.loads(row[1]), 'body': row[2], 'expires_at': row[3]}
+
+    def freshness_lifetime(self, headers):
+        """Seconds the response may be served without revalidation, or None if it must not be stored"""
+        directives = parse_cache_control(headers.get('Cache-Control'))
+        if 'no-store' in directives:
+            return None
+        if 'no-cache' in directives:
+            return 0
+        for name in ('s-maxage', 'max-age'):
+            if name in directives:
+                try:
+                    return max(float(directives[name]), self.min_ttl)
+                except ValueError:
+                    break
+        if headers.get('Expires'):
+            try:
+                expires = parsedate_to_datetime(headers['Expires']).timestamp()
+                return max(expires - time.time(), self.min_ttl)
+            except (TypeError, ValueError):
+                return self.min_ttl
+        return self.min_ttl
+
+    def store(self, request, response):
+        """Store a 200 response if its headers allow it"""
+        lifetime = self.freshness_lifetime(response.headers)
+        if lifetime is None or response.status_code != 200:
+            return
+        vary = [name.strip() for name in response.headers.get('Vary', '').split(',') if name.strip()]
+        if '*' in vary:
+            return
+        if vary:
+            with self.lock:
+                self.db.execute("INSERT OR REPLACE INTO vary (url, headers) VALUES (?, ?)",
+                                (request.url, json.dumps(vary)))
+                self.db.commit()
+        key = self.key_for(request, vary)
+        body = response.content
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, request.url, response.status_code,
+                 json.dumps(dict(response.headers)), body, len(body), now, now + lifetime, now))
+            self.evict_locked()
+            self.db.commit()
+
+    def refresh(self, key, headers):
+        """Extend an entry's freshness after a 304 Not Modified"""
+        lifetime = self.freshness_lifetime(headers) or 0
+        now = time.time()
+        with self.lock:
+            self.db.execute("UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                            (now + lifetime, now, key))
+            self.db.commit()
+
+    def evict_locked(self):
+        """Drop least recently used entries until the cache fits its size limit"""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        while total > self.max_bytes:
+            row = self.db.execute("SELECT key, size FROM responses ORDER BY last_access LIMIT 1").fetchone()
+            if not row:
+                break
+            self.db.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            total -= row[1]
+
+    def record(self, outcome):
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits = self.revalidated = self.misses = 0
+
+    def stats_text(self):
+        return f"Cache: {self.hits} hits, {self.revalidated} revalidated, {self.misses} misses"
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class CachingAdapter(HTTPAdapter):
+    """Transport adapter that answers GET requests from a ResponseCache when it can.
+
+    A request sent with ``Cache-Control: no-store`` bypasses the cache, one
+    with ``no-cache`` always goes to the server (conditionally if possible).
+    """
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, stream=False, **kwargs):
+        directives = parse_cache_control(request.headers.get('Cache-Control'))
+        if request.method != 'GET' or 'no-store' in directives:
+            return super().send(request, stream=stream, **kwargs)
+
+        key = self.cache.key_for(request)
+        entry = self.cache.get(key)
+        if entry and entry['expires_at'] > time.time() and 'no-cache' not in directives:
+            self.cache.record('hits')
+            return self.build_response_from_cache(request, entry)
+
+        if entry:
+            headers = CaseInsensitiveDict(entry['headers'])
+            if headers.get('ETag'):
+                request.headers['If-None-Match'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+        response = super().send(request, stream=stream, **kwargs)
+        if entry and response.status_code == 304:
+            response.close()
+            self.cache.refresh(key, response.headers)
+            self.cache.record('revalidated')
+            return self.build_response_from_cache(request, entry)
+
+        self.cache.record('misses')
+        # Streamed bodies are left for the caller to read and are not stored
+        if not stream:
+            self.cache.store(request, response)
+        return response
+
+    @staticmethod
+    def build_response_from_cache(request, entry):
+        """A Response for a cached entry that can be read, streamed and closed like one from the network"""
+        response = Response()
+        response.status_code = entry['status']
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        # The body is stored decoded, so raw must not decode it again
+        response.raw = HTTPResponse(body=io.BytesIO(entry['body']), headers=entry['headers'], status=entry['status'],
+                                    preload_content=False, decode_content=False)
+        response._content = entry['body']
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.from_cache = True
+        return response
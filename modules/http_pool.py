@@ -0,0 +1,38 @@
+import requests
+from requests.adapters import HTTPAdapter
+from modules.http_cache import CachingAdapter, ResponseCache
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def create_session(settings, proxies=None):
+    """Creates a keep-alive session with a connection pool sized from settings.
+
+    ``pool_connections`` is the number of per-host (and per-proxy) pools kept
+    open, ``pool_maxsize`` the number of connections kept alive in each. The
+    adapter also caches one proxy manager per proxy URL, so SOCKS and HTTP
+    proxy connections are reused in the same way as direct ones.
+
+    With ``http_cache`` enabled, GET requests go through an on-disk
+    ResponseCache, available afterwards as ``session.response_cache``.
+    """
+    per_host = int(settings.get('per_host_concurrency', 0) or 0)
+    pool_settings = dict(
+        pool_connections=int(settings.get('pool_connections', DEFAULT_POOL_CONNECTIONS)),
+        pool_maxsize=max(int(settings.get('pool_maxsize', DEFAULT_POOL_MAXSIZE)), per_host),
+        max_retries=int(settings.get('max_retries', 0))
+    )
+    session = requests.Session()
+    session.response_cache = None
+    if settings.get('http_cache'):
+        session.response_cache = ResponseCache(settings)
+        adapter = CachingAdapter(session.response_cache, **pool_settings)
+    else:
+        adapter = HTTPAdapter(**pool_settings)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    if proxies:
+        session.proxies.update(proxies)
+    return session
@@ -3,13 +3,55 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from bs4 import BeautifulSoup
+import json
+import os
 import time
 
+# Render completion strategies
+WAIT_FIXED = 'fixed'
+WAIT_SELECTOR = 'selector'
+WAIT_NETWORK_IDLE = 'network_idle'
+WAIT_DOM_STABLE = 'dom_stable'
+WAIT_STRATEGIES = (WAIT_FIXED, WAIT_SELECTOR, WAIT_NETWORK_IDLE, WAIT_DOM_STABLE)
+
+# URL patterns blocked for each resource type (CDP Network.setBlockedURLs wildcards).
+# Matching is by URL only: fonts, media and stylesheets served without one of
+# these extensions still load. Real resourceType filtering needs CDP Fetch
+# interception, whose paused requests ChromeDriver has no way to answer.
+RESOURCE_TYPE_PATTERNS = {
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp', '*.avif'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'media': ['*.mp4', '*.webm', '*.ogg', '*.mp3', '*.wav', '*.m4a', '*.avi', '*.mov'],
+    'stylesheet': ['*.css'],
+    'tracker': [
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*scorecardresearch.com*',
+        '*adservice.google.*', '*googlesyndication.com*', '*quantserve.com*',
+    ],
+}
+
+# Blocked by the "lightweight" mode
+LIGHTWEIGHT_RESOURCE_TYPES = ['image', 'font', 'media', 'tracker']
+
+# Records the time of the last DOM mutation in window.__lastMutation
+DOM_OBSERVER_SCRIPT = """
+window.__lastMutation = performance.now();
+if (!window.__mutationObserver) {
+    window.__mutationObserver = new MutationObserver(function() { window.__lastMutation = performance.now(); });
+    window.__mutationObserver.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+"""
+
 class JavaScriptRenderer:
     def __init__(self, settings):
         self.settings = settings
         self.driver = None
+        self.pages_rendered = 0
+        self.last_page_bytes = 0
+        self.last_page_cached = 0
+        self.total_bytes = 0
         self.init_driver()
         
     def init_driver(self):
@@ -22,29 +64,164 @@ class JavaScriptRenderer:
         
         if self.settings.get('proxy'):
             options.add_argument(f'--proxy-server={self.settings["proxy"]}')
+
+        if self.settings.get('disable_images') or 'image' in (self.settings.get('block_resource_types') or []):
+            # Catches images whatever their URL, unlike the extension patterns
+            options.add_argument('--blink-settings=imagesEnabled=false')
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+        if self.settings.get('cache_dir'):
+            # Chrome keeps its own HTTP cache; a fixed directory lets it persist across drivers and runs
+            options.add_argument(f'--disk-cache-dir={os.path.join(self.settings["cache_dir"], "chrome")}')
+            options.add_argument(f'--disk-cache-size={int(self.settings.get("cache_max_mb", 500)) * 1024 * 1024}')
+
+        if self.uses_network_log():
+            # CDP network events are read back from the performance log
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
             
         self.driver = webdriver.Chrome(
             service=Service(self.settings.get('chrome_driver_path')),
             options=options
         )
+
+        blocked_urls = self.blocked_url_patterns()
+        if blocked_urls:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_urls})
+
+        if self.settings.get('cookies'):
+            # Logged-in session cookies shared with the HTTP session
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': self.settings['cookies']})
+
+    def uses_network_log(self):
+        return self.settings.get('wait_strategy') == WAIT_NETWORK_IDLE or self.settings.get('measure_bytes', True)
+
+    def blocked_url_patterns(self):
+        """URL patterns to block from the resource type and custom pattern settings"""
+        patterns = []
+        for resource_type in self.settings.get('block_resource_types') or []:
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+        patterns.extend(self.settings.get('block_url_patterns') or [])
+        return patterns
         
-    def render_page(self, url):
-        """Render a page with JavaScript"""
+    def render_page(self, url, wait_selector=None):
+        """Render a page with JavaScript.
+
+        How long to wait after the page loads depends on ``wait_strategy``:
+        a fixed ``render_wait`` sleep, until ``wait_selector`` matches, until
+        the network has been idle, or until the DOM stops changing. Every
+        strategy gives up after ``render_timeout`` seconds and returns
+        whatever has rendered by then.
+        """
         try:
+            strategy = self.settings.get('wait_strategy', WAIT_FIXED)
+            if self.uses_network_log():
+                self.read_network_events()  # Discard events from the previous page
+            self.last_page_bytes = 0
+            self.last_page_cached = 0
             self.driver.get(url)
             # Wait for page to load completely
             WebDriverWait(self.driver, self.settings.get('timeout', 10)).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
-            # Additional wait for dynamic content
-            time.sleep(self.settings.get('render_wait', 2))
+            self.wait_for_content(strategy, wait_selector)
+            if self.uses_network_log():
+                self.read_network_events()
+                self.total_bytes += self.last_page_bytes
             
             # Get the page source after rendering
             page_source = self.driver.page_source
-            return BeautifulSoup(page_source, 'html.parser')
+            return BeautifulSoup(page_source, self.settings.get('parser', 'html.parser'))
             
         except Exception as e:
             raise Exception(f"JavaScript rendering failed: {str(e)}")
+        finally:
+            self.pages_rendered += 1
+
+    def wait_for_content(self, strategy, wait_selector=None):
+        """Wait until the page is considered rendered, or the hard timeout expires"""
+        timeout = self.settings.get('render_timeout', self.settings.get('timeout', 10))
+        if strategy == WAIT_SELECTOR and wait_selector:
+            try:
+                WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector))
+                )
+            except TimeoutException:
+                pass
+        elif strategy == WAIT_NETWORK_IDLE:
+            self.wait_for_network_idle(timeout)
+        elif strategy == WAIT_DOM_STABLE:
+            self.wait_for_dom_stable(timeout)
+        else:
+            # Additional wait for dynamic content
+            time.sleep(self.settings.get('render_wait', 2))
+
+    def wait_for_network_idle(self, timeout):
+        """Wait until no request has been in flight for ``idle_time`` seconds"""
+        idle_time = self.settings.get('idle_time', 0.5)
+        deadline = time.monotonic() + timeout
+        in_flight = set()
+        idle_since = time.monotonic()
+        while time.monotonic() < deadline:
+            for method, request_id in self.read_network_events():
+                if method == 'Network.requestWillBeSent':
+                    in_flight.add(request_id)
+                elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                    in_flight.discard(request_id)
+                else:
+                    continue
+                idle_since = time.monotonic()
+            if not in_flight and time.monotonic() - idle_since >= idle_time:
+                return
+            time.sleep(0.05)
+
+    def read_network_events(self):
+        """Drain CDP network events from the performance log, counting transferred bytes and cache hits"""
+        events = []
+        for entry in self.driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method = message.get('method', '')
+            if not method.startswith('Network.'):
+                continue
+            params = message.get('params', {})
+            if method == 'Network.loadingFinished':
+                self.last_page_bytes += int(params.get('encodedDataLength', 0))
+            elif method == 'Network.requestServedFromCache':
+                self.last_page_cached += 1
+            events.append((method, params.get('requestId')))
+        return events
+
+    def wait_for_dom_stable(self, timeout):
+        """Wait until the DOM has not changed for ``idle_time`` seconds"""
+        idle_time = self.settings.get('idle_time', 0.5)
+        deadline = time.monotonic() + timeout
+        self.driver.execute_script(DOM_OBSERVER_SCRIPT)
+        while time.monotonic() < deadline:
+            quiet_ms = self.driver.execute_script("return performance.now() - window.__lastMutation;")
+            if quiet_ms is not None and quiet_ms >= idle_time * 1000:
+                return
+            time.sleep(0.05)
+
+    def memory_usage_mb(self):
+        """Resident memory of the Chrome processes started by this driver, in MB (0 if unavailable).
+
+        Summed over every process under chromedriver (browser, renderers,
+        GPU), so it includes the DOM, images and caches the JavaScript heap
+        leaves out. Needs psutil.
+        """
+        try:
+            import psutil
+            chromedriver = psutil.Process(self.driver.service.process.pid)
+            total = 0
+            for process in chromedriver.children(recursive=True):
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    pass  # Exited while being measured
+            return total / (1024 * 1024)
+        except Exception:
+            return 0
             
     def close(self):
         """Close the web driver"""
@@ -0,0 +1,175 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Pipeline stages timed per request or page
+STAGES = ('fetch', 'ttfb', 'download', 'parse', 'render', 'export')
+PERCENTILES = (0.5, 0.95, 0.99)
+# Counters and their Prometheus help text
+COUNTERS = {
+    'requests': 'HTTP requests made',
+    'errors': 'Requests that failed or returned an error status',
+    'bytes': 'Response bytes received, including rendered pages',
+    'pages_rendered': 'Pages rendered in headless Chrome',
+    'elements': 'Elements written to the output',
+}
+
+
+class Histogram:
+    """Durations in logarithmic buckets, each 10% wider than the last.
+
+    Bucket ``i`` holds values up to ``MIN_SECONDS * GROWTH ** i``. Memory
+    stays constant however many values are observed, and percentiles are
+    accurate to within one bucket (about 5%).
+    """
+    MIN_SECONDS = 1e-4
+    GROWTH = 1.1
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0 if seconds <= self.MIN_SECONDS else math.ceil(math.log(seconds / self.MIN_SECONDS, self.GROWTH))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction):
+        """Geometric middle of the bucket holding the given fraction of values"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.max, self.MIN_SECONDS * self.GROWTH ** max(0.0, index - 0.5))
+        return self.max
+
+    def cumulative_buckets(self):
+        """(upper bound, values at or below it) for every occupied bucket, in increasing order"""
+        total = 0
+        buckets = []
+        for index in sorted(self.buckets):
+            total += self.buckets[index]
+            buckets.append((self.MIN_SECONDS * self.GROWTH ** index, total))
+        return buckets
+
+
+class Metrics:
+    """Timings and counters of one scrape run, shared by all of its threads.
+
+    Stages are timed with ``timer`` or ``observe``; totals are kept with
+    ``count``. ``snapshot`` gives percentiles and rates for live displays,
+    and ``write`` saves them as JSON or Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.monotonic()
+            self.histograms = {}
+            self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram()
+            self.histograms[stage].observe(seconds)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def snapshot(self):
+        """Counters, per-second rates and per-stage latency percentiles as a plain dict"""
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            stages = {}
+            for stage in sorted(self.histograms, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES)):
+                histogram = self.histograms[stage]
+                stages[stage] = {
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'mean': histogram.sum / histogram.count if histogram.count else 0.0,
+                    'max': histogram.max,
+                    'buckets': histogram.cumulative_buckets(),
+                    **{f'p{round(fraction * 100)}': histogram.percentile(fraction) for fraction in PERCENTILES},
+                }
+            return {
+                'elapsed': elapsed,
+                'counters': dict(self.counters),
+                'rates': {f'{name}_per_second': value / elapsed if elapsed else 0.0
+                          for name, value in self.counters.items()},
+                'stages': stages,
+            }
+
+    def summary_text(self):
+        """A few lines for the live metrics panel"""
+        snapshot = self.snapshot()
+        counters, rates = snapshot['counters'], snapshot['rates']
+        lines = [f"{rates['requests_per_second']:.1f} req/s, {counters['requests']} requests, "
+                 f"{counters['errors']} errors, {counters['bytes'] / 1048576:.1f} MB "
+                 f"({rates['bytes_per_second'] / 1024:.0f} KB/s), {counters['elements']} elements"]
+        for stage, stats in snapshot['stages'].items():
+            lines.append(f"{stage:<9}" + "  ".join(f"p{round(fraction * 100)} {format_seconds(stats[f'p{round(fraction * 100)}'])}"
+                                                   for fraction in PERCENTILES) + f"  (n={stats['count']})")
+        return "\n".join(lines)
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix='web_scraper'):
+        snapshot = self.snapshot()
+        lines = [f'# HELP {prefix}_elapsed_seconds Time since the run started',
+                 f'# TYPE {prefix}_elapsed_seconds gauge',
+                 f'{prefix}_elapsed_seconds {snapshot["elapsed"]:.3f}']
+        for name, value in snapshot['counters'].items():
+            metric = f'{prefix}_{name}_total'
+            lines += [f'# HELP {metric} {COUNTERS.get(name, name)}', f'# TYPE {metric} counter', f'{metric} {value}']
+        metric = f'{prefix}_stage_seconds'
+        lines += [f'# HELP {metric} Time spent per request or page in each pipeline stage', f'# TYPE {metric} histogram']
+        for stage, stats in snapshot['stages'].items():
+            for bound, count in stats['buckets']:
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound:.6g}"}} {count}')
+            lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {stats["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {stats["count"]}')
+        # Percentiles as computed here, for dashboards that do not aggregate the buckets
+        metric = f'{prefix}_stage_percentile_seconds'
+        lines += [f'# HELP {metric} Latency percentiles of each pipeline stage', f'# TYPE {metric} gauge']
+        for stage, stats in snapshot['stages'].items():
+            for fraction in PERCENTILES:
+                lines.append(f'{metric}{{stage="{stage}",quantile="{fraction}"}} {stats[f"p{round(fraction * 100)}"]:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, metrics_format=None):
+        """Save the metrics as JSON (``.json``) or Prometheus text (anything else), replacing the file atomically"""
+        metrics_format = metrics_format or ('json' if path.lower().endswith('.json') else 'prometheus')
+        text = self.to_json() if metrics_format == 'json' else self.to_prometheus()
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temporary, path)
+
+
+def format_seconds(seconds):
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.2f}s"
@@ -0,0 +1,33 @@
+import random
+
+# --- Constants ---
+TOR_SOCKS_PORT = 9150  # Default Tor Browser SOCKS port
+DEFAULT_TOR_CONTROL_PORT = 9051  # Default Tor Control port
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15",
+    "Mozilla/5.0 (iPad; CPU OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1 Mobile/15E148 Safari/604.1"
+]
+
+
+def get_random_user_agent():
+    """Returns a random user agent from a predefined list."""
+    return random.choice(USER_AGENTS)
+
+
+def build_proxies(network_option, proxy_address="", tor_socks_ip="127.0.0.1", tor_socks_port=TOR_SOCKS_PORT):
+    """Builds a requests-style proxies dict for the selected network option."""
+    if network_option == "HTTP Proxy" and proxy_address:
+        return {
+            'http': f'http://{proxy_address}',
+            'https': f'http://{proxy_address}'
+        }
+    if network_option == "Tor Network":
+        return {
+            'http': f'socks5h://{tor_socks_ip}:{tor_socks_port}',
+            'https': f'socks5h://{tor_socks_ip}:{tor_socks_port}'
+        }
+    return {}
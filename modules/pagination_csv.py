@@ -1,68 +1,203 @@
-import csv
-import math
+import time
 from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
-from bs4 import BeautifulSoup
+from modules.dedup import ContentHashSet, content_hash
+from modules.http_pool import create_session
+from modules.metrics import Metrics
+from modules.parsing import ExtractionSchema, compile_selector, extract_elements, parse_document, release_document
 
 class PaginationHandler:
-    def __init__(self, base_url, selector, settings):
+    def __init__(self, base_url, selector, settings, fetcher=None, session=None, parse_pool=None, browser_pool=None,
+                 metrics=None):
         self.base_url = base_url
-        self.selector = selector
+        self.schema = ExtractionSchema.coerce(selector)
+        self.selector = self.schema.selector
         self.settings = settings
+        self.fetcher = fetcher
+        self.parse_pool = parse_pool
+        self.browser_pool = browser_pool
         self.current_page = 1
         self.total_pages = 1
-        self.session = requests.Session()
+        self.session = session or (fetcher.session if fetcher else create_session(settings))
+        self.seen_pages = ContentHashSet(settings) if settings.get('dedup_pages', True) else None
+        self.reached_end = False
+        self.first_page_done = False
+        self.metrics = metrics or Metrics()
         
     def detect_pagination(self, soup):
         """Detect pagination pattern from the first page"""
-        pagination_links = soup.select(self.settings.get('pagination_selector', 'a[href*="page"]'))
+        pagination_links = compile_selector(self.settings.get('pagination_selector', 'a[href*="page"]')).select(soup)
         if pagination_links:
-            last_page_link = pagination_links[-1]['href']
+            last_page_link = pagination_links[-1].get('href', '')
             parsed = urlparse(last_page_link)
             query = parse_qs(parsed.query)
             if 'page' in query:
-                self.total_pages = int(query['page'][0])
+                try:
+                    self.total_pages = int(query['page'][0])
+                except ValueError:
+                    pass
             return True
         return False
 
-    def get_next_page_url(self):
-        """Generate URL for the next page"""
-        if self.current_page >= self.total_pages:
-            return None
-            
+    def get_max_pages(self):
+        """Upper bound on the number of pages to scrape"""
+        max_pages = self.settings.get('max_pages')
+        return min(self.total_pages, int(max_pages)) if max_pages else self.total_pages
+
+    def get_page_url(self, page):
+        """Generate URL for the given page number"""
         parsed = urlparse(self.base_url)
         query = parse_qs(parsed.query)
-        query['page'] = [str(self.current_page + 1)]
+        query['page'] = [str(page)]
         new_query = urlencode(query, doseq=True)
         return urlunparse(parsed._replace(query=new_query))
 
-    def scrape_page(self, url):
+    def get_next_page_url(self):
+        """Generate URL for the next page"""
+        if self.current_page >= self.get_max_pages():
+            return None
+        return self.get_page_url(self.current_page + 1)
+
+    def get_all_page_urls(self):
+        """Generate URLs for every remaining page after the current one, in page order"""
+        return [self.get_page_url(page) for page in range(self.current_page + 1, self.get_max_pages() + 1)]
+
+    def is_repeat_page(self, body):
+        """Remember a page body, returning True if an earlier page had exactly the same content"""
+        if self.seen_pages is None or body is None:
+            return False
+        return not self.seen_pages.add(content_hash(body))
+
+    def scrape_page(self, url, page=1):
         """Scrape a single page"""
-        response = self.session.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        return soup.select(self.selector)
+        return self.parse_and_select(self.fetch_body(url), url, page)
+
+    def fetch_body(self, url):
+        """Fetch the raw body of a single page"""
+        if self.fetcher:
+            return self.fetcher.fetch_one(url).content
+        return self.session.get(url, timeout=self.settings.get('timeout', 10),
+                                proxies=self.settings.get('proxies')).content
+
+    def fetch_page(self, url, selector=None):
+        """Fetch and parse a single page, keeping only what ``selector`` can match"""
+        return parse_document(self.fetch_body(url), self.settings, selector)
+
+    def select(self, soup, url=None, page=1):
+        """Extract every schema field from a parsed page"""
+        return self.schema.extract(soup, url, page)
 
-    def scrape_all_pages(self):
-        """Scrape all pages"""
+    def timed_select(self, soup, url, page):
+        """Extract from an already parsed (rendered) page, timing it as parsing"""
+        with self.metrics.timer('parse'):
+            return self.select(soup, url, page)
+
+    def parse_and_select(self, body, url, page):
+        """Parse a page body and extract every schema field"""
+        with self.metrics.timer('parse'):
+            return extract_elements(body, self.schema, self.settings, url, page)
+
+    def fetch_pages(self, urls, first_page):
+        """Yield (body, elements or exception) for each URL in order; ``first_page`` is the first URL's page number.
+
+        Rendered pages are hashed by their final HTML, since Chrome does not
+        expose the raw body.
+        """
+        page_delay = self.settings.get('page_delay', 0)
+        if self.browser_pool:
+            rendered = self.browser_pool.render_all(urls, min_interval=page_delay, wait_selector=self.selector)
+            for index, soup in enumerate(rendered):
+                if isinstance(soup, Exception):
+                    yield None, soup
+                    continue
+                page_data = self.timed_select(soup, urls[index], first_page + index)
+                body = str(soup)
+                release_document(soup)
+                yield body, page_data
+            return
+        if not self.fetcher:
+            for index, url in enumerate(urls):
+                if index:
+                    time.sleep(page_delay)
+                body = self.fetch_body(url)
+                yield body, self.parse_and_select(body, url, first_page + index)
+            return
+        if self.parse_pool:
+            pages = self.parse_pool.fetch_and_extract(self.fetcher, urls, self.schema, first_page, page_delay)
+        else:
+            responses = self.fetcher.fetch_all(urls, min_interval=page_delay)
+            pages = [(response, response if isinstance(response, Exception)
+                      else self.parse_and_select(response.content, urls[index], first_page + index))
+                     for index, response in enumerate(responses)]
+        for response, page_data in pages:
+            yield (None if isinstance(response, Exception) else response.content), page_data
+
+    def scrape_pages(self, urls):
+        """Scrape several pages, returning elements per page in URL order.
+
+        Many sites serve the last page again for out-of-range page numbers, so
+        the first page whose body repeats an earlier page ends the scrape:
+        ``reached_end`` is set and that page and any after it are left out.
+        """
+        results = []
+        for body, page_data in self.fetch_pages(urls, self.current_page + 1):
+            if isinstance(page_data, Exception):
+                raise page_data
+            if self.is_repeat_page(body):
+                self.reached_end = True
+                break
+            results.append(page_data)
+        return results
+
+    def restore(self, current_page, total_pages):
+        """Continue from a checkpoint: the first ``current_page`` pages are already done"""
+        self.current_page = current_page
+        self.total_pages = total_pages
+        self.first_page_done = True
+
+    def scrape_all_pages(self, on_pages=None):
+        """Scrape all pages.
+
+        The first page is fetched on its own to detect the page count; the
+        remaining pages are then fetched concurrently, started at most once
+        per ``page_delay`` seconds, and returned in page order. With page
+        deduplication on they are fetched in windows of ``pagination_window``
+        pages, so a repeated page stops the scrape without fetching the rest.
+
+        With ``on_pages``, elements are handed over after the first page and
+        after each window instead of being collected and returned;
+        ``current_page`` tells how far the scrape has got at each call.
+        """
         all_data = []
-        while self.current_page <= self.total_pages:
-            page_data = self.scrape_page(self.base_url)
-            all_data.extend(page_data)
-            self.current_page += 1
-            self.base_url = self.get_next_page_url()
-            if not self.base_url:
+        emit = on_pages or all_data.extend
+        page_delay = self.settings.get('page_delay', 0)
+        if not self.first_page_done:
+            if self.browser_pool:
+                first_page = self.browser_pool.render_page(self.base_url, wait_selector=self.selector)
+                body = str(first_page)
+                first_data = self.timed_select(first_page, self.base_url, 1)
+            else:
+                # The first page also needs the pagination links
+                pagination_selector = self.settings.get('pagination_selector', 'a[href*="page"]')
+                body = self.fetch_body(self.base_url)
+                with self.metrics.timer('parse'):
+                    first_page = parse_document(body, self.settings, f"{self.selector}, {pagination_selector}")
+                    first_data = self.select(first_page, self.base_url, 1)
+            self.detect_pagination(first_page)
+            release_document(first_page)
+            self.is_repeat_page(body)
+            self.first_page_done = True
+            emit(first_data)
+
+        urls = self.get_all_page_urls()
+        window = max(1, len(urls) if self.seen_pages is None else int(self.settings.get('pagination_window', 8)))
+        for start in range(0, len(urls), window):
+            if start and page_delay:
+                time.sleep(page_delay)
+            pages = self.scrape_pages(urls[start:start + window])
+            self.current_page += len(pages)
+            emit([element for page_data in pages for element in page_data])
+            if self.reached_end:
                 break
+        if self.seen_pages is not None:
+            self.seen_pages.close()
         return all_data
-
-class CSVExporter:
-    @staticmethod
-    def export(data, filename, fields=None):
-        """Export scraped data to CSV"""
-        if not fields:
-            fields = ['text', 'href'] if hasattr(data[0], 'href') else ['text']
-            
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fields)
-            writer.writeheader()
-            for item in data:
-                row = {field: getattr(item, field, '') for field in fields}
-                writer.writerow(row)
\ No newline at end of file
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from modules.metrics import Metrics
+from modules.parsing import extract_elements
+
+# Only these settings are sent to worker processes
+PARSE_SETTINGS = ('parser', 'strain')
+
+
+def timed_extract(content, schema, settings, url=None, page=1):
+    """extract_elements in a worker, returning the elements and the time it took"""
+    started = time.perf_counter()
+    elements = extract_elements(content, schema, settings, url, page)
+    return elements, time.perf_counter() - started
+
+
+class ParsePool:
+    """Runs HTML parsing and selector extraction on a pool of worker processes.
+
+    Workers receive raw response bytes and return detached ``ExtractedElement``
+    records, so no bs4 tree crosses the process boundary. At most
+    ``parse_queue`` documents may be waiting or in progress; ``submit`` blocks
+    beyond that, which holds the fetch stage back and keeps memory bounded.
+    Time spent parsing in the workers is recorded in ``metrics``.
+    """
+
+    def __init__(self, settings, metrics=None):
+        self.workers = int(settings.get('parse_workers') or os.cpu_count() or 1)
+        self.max_pending = int(settings.get('parse_queue') or self.workers * 2)
+        self.parse_settings = {key: settings[key] for key in PARSE_SETTINGS if key in settings}
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.metrics = metrics or Metrics()
+
+    @staticmethod
+    def is_enabled(settings):
+        return int(settings.get('parse_workers', 0) or 0) > 0
+
+    def submit(self, content, schema, url=None, page=1):
+        """Queue one document for extraction, waiting for a free slot first; the future gives (elements, seconds)"""
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(timed_extract, content, schema, self.parse_settings, url, page)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def fetch_and_extract(self, fetcher, urls, schema, first_page=None, min_interval=0):
+        """Fetch ``urls`` with an AsyncFetcher, submitting each body for extraction as soon as it arrives.
+
+        Returns (response or exception, elements or exception) pairs in URL
+        order. Parsing overlaps the rest of the batch's downloads, and while
+        all ``parse_queue`` slots are taken ``submit`` blocks, which keeps
+        the fetcher from starting more requests. Records are tagged
+        with their URL and, for the pages of one paginated URL, page numbers
+        counting up from ``first_page``.
+        """
+        def submit(index, response):
+            if isinstance(response, Exception):
+                return response, response
+            future = self.submit(response.content, schema, urls[index], first_page + index if first_page else 1)
+            return response, future
+
+        results = []
+        for pair in fetcher.fetch_all(urls, min_interval, process=submit):
+            if isinstance(pair, Exception):  # submit itself failed
+                results.append((pair, pair))
+                continue
+            response, future = pair
+            if isinstance(future, Exception):
+                results.append((response, future))
+                continue
+            try:
+                elements, seconds = future.result()
+                self.metrics.observe('parse', seconds)
+                results.append((response, elements))
+            except Exception as e:
+                results.append((response, e))
+        return results
+
+    def close(self):
+        """Cancel queued documents and wait for the worker processes to exit"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,338 @@
+import re
+import sys
+from functools import lru_cache
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+
+PARSERS = ('html.parser', 'lxml')
+DEFAULT_PARSER = 'html.parser'
+STREAM_CHUNK_SIZE = 64 * 1024
+PRESERVE_WHITESPACE_TAGS = ('pre', 'textarea')
+
+# One compound selector: optional tag, then any number of #id, .class and [attr] parts
+SIMPLE_SELECTOR = re.compile(r'^(?P<tag>[a-zA-Z][a-zA-Z0-9-]*)?(?P<rest>(?:#[\w-]+|\.[\w-]+|\[[^\]]+\])*)$')
+SELECTOR_PART = re.compile(r'#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)|\[(?P<attr>[^\]]+)\]')
+ATTRIBUTE_CONDITION = re.compile(r'^\s*(?P<name>[\w-]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?P<value>"[^"]*"|\'[^\']*\'|[^\s"\']+))?\s*$')
+
+
+class StreamingNotSupported(Exception):
+    """Raised when a selector is too complex for the streaming extractor"""
+
+
+class SimpleSelector:
+    """A compound selector without combinators or pseudo-classes, e.g. a.nav[href^='/']"""
+
+    def __init__(self, tag, ids, classes, attributes):
+        self.tag = tag
+        self.ids = ids
+        self.classes = classes
+        self.attributes = attributes
+
+    def matches(self, tag, attrs):
+        if self.tag and tag != self.tag:
+            return False
+        if any(attrs.get('id') != element_id for element_id in self.ids):
+            return False
+        if self.classes:
+            element_classes = attrs.get('class', '').split()
+            if any(cls not in element_classes for cls in self.classes):
+                return False
+        for name, op, value in self.attributes:
+            actual = attrs.get(name)
+            if actual is None:
+                return False
+            if op and not attribute_matches(actual, op, value):
+                return False
+        return True
+
+
+def attribute_matches(actual, op, value):
+    if op == '=':
+        return actual == value
+    if op == '~=':
+        return value in actual.split()
+    if op == '|=':
+        return actual == value or actual.startswith(value + '-')
+    if op == '^=':
+        return actual.startswith(value)
+    if op == '$=':
+        return actual.endswith(value)
+    if op == '*=':
+        return value in actual
+    return False
+
+
+def compile_simple_selector(selector):
+    """Compile a comma-separated list of simple selectors, or return None if any part is complex"""
+    compiled = []
+    for part in selector.split(','):
+        part = part.strip()
+        match = SIMPLE_SELECTOR.match(part)
+        if not part or not match:
+            return None
+        ids, classes, attributes = [], [], []
+        for piece in SELECTOR_PART.finditer(match.group('rest')):
+            if piece.group('id'):
+                ids.append(piece.group('id'))
+            elif piece.group('cls'):
+                classes.append(piece.group('cls'))
+            else:
+                condition = ATTRIBUTE_CONDITION.match(piece.group('attr'))
+                if not condition:
+                    return None
+                value = condition.group('value')
+                if value and value[0] in '"\'':
+                    value = value[1:-1]
+                attributes.append((condition.group('name').lower(), condition.group('op'), value))
+        tag = match.group('tag')
+        compiled.append(SimpleSelector(tag.lower() if tag else None, ids, classes, attributes))
+    return compiled
+
+
+def strainer_for_selector(selector):
+    """Build a SoupStrainer that keeps only the tags the selector can match.
+
+    Only used when every part of the selector is a simple compound selector
+    with a tag name; anything relying on ancestors or siblings (combinators,
+    pseudo-classes) needs the full tree, so None is returned.
+    """
+    if not selector:
+        return None
+    compiled = compile_simple_selector(selector)
+    if not compiled or any(part.tag is None for part in compiled):
+        return None
+    return SoupStrainer(sorted({part.tag for part in compiled}))
+
+
+def parse_document(content, settings=None, selector=None):
+    """Parse HTML with the configured backend, pre-filtered by the selector when possible"""
+    settings = settings or {}
+    parser = settings.get('parser', DEFAULT_PARSER)
+    strainer = strainer_for_selector(selector) if settings.get('strain', True) else None
+    return BeautifulSoup(content, parser, parse_only=strainer)
+
+
+def release_document(soup):
+    """Free a parsed page's tree now rather than at the next garbage collection.
+
+    Every node links to its parent and neighbours, so a dropped tree is only
+    reclaimed by the cycle collector, by which time many more pages may have
+    piled up. Clearing each node along the parse order chain breaks those
+    cycles (``Tag.decompose`` on the document itself stops at the root).
+    """
+    if soup is None:
+        return
+    element = soup.contents[0] if soup.contents else None
+    while element is not None:
+        following = element.next_element
+        element.__dict__.clear()
+        element = following
+    soup.__dict__.clear()
+
+
+@lru_cache(maxsize=256)
+def compile_selector(selector):
+    """Compile a CSS selector once; later lookups come from the cache"""
+    return soupsieve.compile(selector)
+
+
+class ExtractionSchema:
+    """Named fields, each a CSS selector, extracted together in one pass over a document.
+
+    A plain selector string becomes a single-field schema, so every code path
+    can take either. Only the field selectors are stored; compiled selectors
+    come from the ``compile_selector`` cache, which keeps schemas cheap to
+    pickle for parse workers.
+    """
+
+    def __init__(self, fields):
+        self.fields = {name: selector for name, selector in fields.items() if selector}
+        if not self.fields:
+            raise ValueError("An extraction schema needs at least one field")
+
+    @classmethod
+    def coerce(cls, value):
+        if isinstance(value, ExtractionSchema):
+            return value
+        return cls({value: value})
+
+    @property
+    def selector(self):
+        """All fields combined into one selector, for strainers and render waits"""
+        return ', '.join(self.fields.values())
+
+    @property
+    def is_multi_field(self):
+        return len(self.fields) > 1
+
+    def matchers(self):
+        return [(name, compile_selector(selector)) for name, selector in self.fields.items()]
+
+    def select(self, soup):
+        """Matching tags in document order, as (field, tag) pairs"""
+        matchers = self.matchers()
+        if len(matchers) == 1:
+            name, matcher = matchers[0]
+            return [(name, tag) for tag in matcher.select(soup)]
+        matches = []
+        for tag in soup.find_all(True):
+            for name, matcher in matchers:
+                if matcher.match(tag):
+                    matches.append((name, tag))
+        return matches
+
+    def extract(self, soup, url=None, page=1):
+        """Detached records for every match, tagged with their field name and the page they came from"""
+        return [ExtractedElement.from_tag(tag, field, url, page) for field, tag in self.select(soup)]
+
+    def text_line(self, element):
+        """An element as a line of text output, prefixed with its field name when there are several fields"""
+        return f"{element.field}: {element.text}" if self.is_multi_field else element.text
+
+    def __repr__(self):
+        return f'ExtractionSchema({self.fields!r})'
+
+
+def select_elements(content, selector, settings=None):
+    """Parse a document and apply the selector"""
+    return parse_document(content, settings, selector).select(selector)
+
+
+def extract_elements(content, schema, settings=None, url=None, page=1):
+    """Parse a document once and return detached records for every schema field, releasing the tree"""
+    schema = ExtractionSchema.coerce(schema)
+    soup = parse_document(content, settings, schema.selector)
+    try:
+        return schema.extract(soup, url, page)
+    finally:
+        release_document(soup)
+
+
+class ExtractedElement:
+    """Text and attributes of a matched element, detached from any parse tree.
+
+    Every extraction path produces these records, and the output, export
+    and GUI consume them. ``url`` is the page the element was found on and
+    ``page`` its 1-based page number within a paginated URL. Text is kept
+    stripped. Attributes are stored as a flat (name, value, ...) tuple with
+    interned names instead of a dict per record, so a record costs little
+    more than its strings. Records are picklable and can be read through
+    the same ``text``/``get`` interface as a bs4 Tag.
+    """
+    __slots__ = ('name', 'text', 'attr_items', 'field', 'url', 'page')
+
+    def __init__(self, name, text, attrs, field=None, url=None, page=1):
+        self.name = sys.intern(name) if name else name
+        self.text = text.strip()
+        self.attr_items = tuple(item for key, value in attrs.items()
+                                for item in (sys.intern(key), ' '.join(value) if isinstance(value, list) else value))
+        self.field = field
+        self.url = url
+        self.page = page
+
+    @classmethod
+    def from_tag(cls, tag, field=None, url=None, page=1):
+        return cls(tag.name, tag.text, tag.attrs, field, url, page)
+
+    @property
+    def attrs(self):
+        return dict(zip(self.attr_items[::2], self.attr_items[1::2]))
+
+    def get(self, key, default=None):
+        items = self.attr_items
+        for index in range(0, len(items), 2):
+            if items[index] == key:
+                return items[index + 1]
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self):
+        return {'name': self.name, 'text': self.text, 'attrs': self.attrs, 'field': self.field,
+                'url': self.url, 'page': self.page}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['text'], data['attrs'], data.get('field'), data.get('url'), data.get('page', 1))
+
+    def __repr__(self):
+        return f'ExtractedElement({self.name!r}, {self.text[:40]!r})'
+
+
+def whitespace_string(text, preserve=False):
+    """A text node as bs4 keeps it: whitespace-only strings become one newline or space outside <pre>/<textarea>"""
+    if not text or preserve or text.strip():
+        return text or ''
+    return '\n' if '\n' in text else ' '
+
+
+def element_text(element, preserve=None):
+    """Text of an lxml element, matching what ``Tag.text`` returns for the same markup"""
+    if preserve is None:
+        preserve = any(ancestor.tag in PRESERVE_WHITESPACE_TAGS for ancestor in element.iterancestors())
+    preserve = preserve or element.tag in PRESERVE_WHITESPACE_TAGS
+    parts = [whitespace_string(element.text, preserve)] if isinstance(element.tag, str) else []
+    for child in element:
+        if isinstance(child.tag, str):
+            parts.append(element_text(child, preserve))
+        parts.append(whitespace_string(child.tail, preserve))
+    return ''.join(parts)
+
+
+def stream_extract(chunks, schema, url=None, page=1):
+    """Yield matches for a simple selector while the document is still being read.
+
+    ``chunks`` is any iterable of bytes, e.g. ``response.iter_content()``.
+    Elements are handed out as soon as their closing tag has been parsed and
+    are then cleared, together with already processed siblings, so memory
+    stays bounded by the nesting depth rather than the document size. Nested
+    matches are yielded inner first.
+    """
+    schema = ExtractionSchema.coerce(schema)
+    fields = []
+    for name, selector in schema.fields.items():
+        compiled = compile_simple_selector(selector)
+        if not compiled:
+            raise StreamingNotSupported(f"Selector is too complex to stream: {selector}")
+        fields.append((name, compiled))
+    all_parts = [part for _, compiled in fields for part in compiled]
+    candidate_tags = None if any(part.tag is None for part in all_parts) else {part.tag for part in all_parts}
+    parser = etree.HTMLPullParser(events=('end',))
+
+    def matching_fields(element):
+        tag = element.tag
+        if not isinstance(tag, str) or (candidate_tags is not None and tag not in candidate_tags):
+            return []
+        attrs = dict(element.attrib)
+        return [name for name, compiled in fields if any(part.matches(tag, attrs) for part in compiled)]
+
+    def drain():
+        for _, element in parser.read_events():
+            if not isinstance(element.tag, str):
+                continue
+            names = matching_fields(element)
+            if names:
+                text = element_text(element)
+                attrs = dict(element.attrib)
+                for name in names:
+                    yield ExtractedElement(element.tag, text, attrs, name, url, page)
+            # Ancestors that will match later still need their descendants' text
+            if any(matching_fields(ancestor) for ancestor in element.iterancestors()):
+                continue
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+            yield from drain()
+    parser.close()
+    yield from drain()
@@ -0,0 +1,187 @@
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+# Where time and memory go, recognised by the files on the stack. A stack
+# counts towards the first category any of its frames belongs to, so time
+# Chrome spends on the network still counts as rendering.
+CATEGORIES = (
+    ('render', 'Rendering (JavaScriptRenderer.render_page)', ('/javascript_rendering.py', '/selenium/')),
+    ('export', 'Export (ExportWriter.write, output file)', ('/exporters.py', '/pyarrow/')),
+    ('select', 'Selector matching (soup.select)', ('/soupsieve/', '/bs4/css.py')),
+    ('parse', 'HTML parsing (BeautifulSoup, lxml)', ('/bs4/', '/lxml/', '/html/parser.py', '/html5lib/')),
+    ('network', 'Network waits (connect, TLS, SOCKS, transfer)',
+     ('/socket.py', '/ssl.py', '/urllib3/', '/requests/', '/http/client.py', '/socks.py')),
+    ('wait', 'Idle (waiting for work or for other threads)',
+     ('/threading.py', '/queue.py', '/selectors.py', '/asyncio/', '/concurrent/futures/')),
+)
+OTHER = 'other'
+REPORT_CATEGORIES = CATEGORIES + ((OTHER, 'Other Python code', ()),)
+THREAD_NUMBER = re.compile(r'[-_]\d+(?:_\d+)?$|\s*\(.*\)$')
+
+
+def categorize(filenames):
+    """Category key of a stack, given the file names of its frames"""
+    for key, _, fragments in CATEGORIES:
+        if any(fragment in filename for filename in filenames for fragment in fragments):
+            return key
+    return OTHER
+
+
+class StackSampler:
+    """Records the call stack of every thread ``interval`` seconds apart.
+
+    cProfile only sees the thread it was enabled on, while a scrape runs on
+    fetch, render and event-loop threads; sampling covers all of them.
+    Stacks are counted in collapsed form (thread;outer;...;inner), the input
+    format of flamegraph.pl, inferno and speedscope.
+
+    While tracemalloc is tracing, a snapshot is also taken every
+    ``memory_interval`` seconds whenever traced memory has reached a new
+    high, so allocations can be attributed near the peak rather than after
+    everything has been freed. Slow snapshots are spaced further apart.
+    """
+
+    def __init__(self, interval=0.005, memory_interval=1.0):
+        self.interval = interval
+        self.memory_interval = memory_interval
+        self.memory_high = 0
+        self.memory_snapshot = None
+        self.stacks = Counter()
+        self.categories = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        next_memory_check = time.monotonic()
+        while not self.stopped.wait(self.interval):
+            if tracemalloc.is_tracing() and time.monotonic() >= next_memory_check:
+                started = time.monotonic()
+                self.check_memory()
+                # Snapshots of a large heap hold the GIL for a while; keep them under a tenth of the run
+                next_memory_check = time.monotonic() + max(self.memory_interval, 10 * (time.monotonic() - started))
+            names = {thread.ident: THREAD_NUMBER.sub('', thread.name) for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                labels, filenames = [], []
+                while frame is not None:
+                    filename = frame.f_code.co_filename.replace(os.sep, '/')
+                    filenames.append(filename)
+                    labels.append(f'{os.path.basename(filename)}:{frame.f_code.co_name}')
+                    frame = frame.f_back
+                labels.append(names.get(ident, 'thread'))
+                self.stacks[';'.join(reversed(labels))] += 1
+                self.categories[categorize(filenames)] += 1
+            self.samples += 1
+
+    def check_memory(self):
+        current = tracemalloc.get_traced_memory()[0]
+        if current > self.memory_high:
+            self.memory_high = current
+            self.memory_snapshot = tracemalloc.take_snapshot()
+
+    def write_folded(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class ProfileSession:
+    """Profiles one scrape run: stack sampling, cProfile and tracemalloc.
+
+    ``stop`` writes ``<name>.folded`` (collapsed stacks for flame graphs),
+    ``<name>.prof`` (cProfile of the thread driving the run, for pstats or
+    snakeviz) and ``<name>.txt``, a report of where time and memory went.
+    """
+
+    def __init__(self, settings, directory=None):
+        self.directory = directory or '.'
+        self.sampler = StackSampler(float(settings.get('profile_interval', 0.005)))
+        self.trace_memory = settings.get('profile_memory', True)
+        self.memory_frames = int(settings.get('profile_memory_frames', 8))
+        self.profiler = cProfile.Profile()
+        self.base = os.path.join(self.directory, datetime.now().strftime('scrape-profile-%Y%m%d-%H%M%S'))
+        self.started = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.trace_memory:
+            tracemalloc.start(self.memory_frames)
+        self.started = time.perf_counter()
+        self.sampler.start()
+        self.profiler.enable()
+
+    def stop(self):
+        """Stop profiling and write the output files; returns the report's path"""
+        self.profiler.disable()
+        self.sampler.stop()
+        elapsed = time.perf_counter() - self.started
+        memory = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            if self.sampler.memory_snapshot is None:
+                self.sampler.check_memory()
+            memory = (peak, self.sampler.memory_high, self.sampler.memory_snapshot)
+            tracemalloc.stop()
+        self.sampler.write_folded(f'{self.base}.folded')
+        self.profiler.dump_stats(f'{self.base}.prof')
+        with open(f'{self.base}.txt', 'w', encoding='utf-8') as f:
+            f.write(self.report(elapsed, memory))
+        return f'{self.base}.txt'
+
+    def report(self, elapsed, memory):
+        lines = [f'Scrape profile, {elapsed:.2f}s wall time, {self.sampler.samples} samples '
+                 f'every {self.sampler.interval * 1000:g}ms', '']
+        total = sum(self.sampler.categories.values())
+        busy = total - self.sampler.categories['wait']
+        lines.append('Time by stage (thread samples; "of busy" leaves out idle threads):')
+        for key, label, _ in REPORT_CATEGORIES:
+            count = self.sampler.categories[key]
+            share = f'{count / total:6.1%}' if total else '     -'
+            busy_share = f'{count / busy:6.1%} of busy' if busy and key != 'wait' else ''
+            lines.append(f'  {label:<48} {share}  {busy_share}')
+        lines.append('  Parse worker processes (parse_workers) are not sampled.')
+        lines.append('')
+        lines.append('Hottest stacks:')
+        for stack, count in self.sampler.stacks.most_common(10):
+            frames = stack.split(';')
+            lines.append(f'  {count:6d}  {frames[0]}: ' + ' > '.join(frames[-4:]))
+        if memory:
+            peak, high, snapshot = memory
+            lines.append('')
+            lines.append(f'Memory: peak {peak / 1048576:.1f} MB traced; '
+                         f'by allocation site at the largest snapshot ({high / 1048576:.1f} MB):')
+            by_category = Counter()
+            for statistic in snapshot.statistics('traceback'):
+                filenames = [frame.filename.replace(os.sep, '/') for frame in statistic.traceback]
+                by_category[categorize(filenames)] += statistic.size
+            for key, label, _ in REPORT_CATEGORIES:
+                if by_category[key]:
+                    lines.append(f'  {label:<48} {by_category[key] / 1048576:8.2f} MB')
+            lines.append('Largest allocation sites:')
+            for statistic in snapshot.statistics('lineno')[:10]:
+                frame = statistic.traceback[0]
+                lines.append(f'  {statistic.size / 1024:10.1f} KB  {statistic.count:8d} blocks  '
+                             f'{frame.filename}:{frame.lineno}')
+        lines.append('')
+        lines.append(f'Flame graph input: {self.base}.folded (flamegraph.pl, inferno-flamegraph or speedscope)')
+        lines.append(f'Call statistics of the driving thread: {self.base}.prof (python -m pstats, snakeviz)')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,210 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+DEFAULT_CHECK_URL = "https://api.ipify.org?format=json"
+
+
+def normalize_proxy(proxy):
+    """Proxy URL for a ``host:port`` or ``scheme://[user:pass@]host:port`` entry, or None for blanks and comments"""
+    proxy = proxy.strip()
+    if not proxy or proxy.startswith('#'):
+        return None
+    return proxy if '://' in proxy else f'http://{proxy}'
+
+
+def load_proxy_file(path):
+    """Proxies listed one per line in a file; blank lines and # comments are skipped"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if normalize_proxy(line)]
+
+
+class PooledProxy:
+    """One proxy with decayed latency and success statistics"""
+
+    def __init__(self, url, decay=0.3):
+        self.url = url
+        self.decay = decay
+        self.latency = None
+        self.success = 1.0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.in_flight = 0
+        self.quarantined_until = 0.0
+        self.quarantines = 0
+        self.last_used = 0.0
+
+    @property
+    def proxies(self):
+        return {'http': self.url, 'https': self.url}
+
+    def record(self, latency, ok):
+        """Fold one request into the moving averages; returns True when the proxy should be quarantined"""
+        self.requests += 1
+        self.last_used = time.monotonic()
+        self.success += self.decay * ((1.0 if ok else 0.0) - self.success)
+        if ok:
+            self.consecutive_errors = 0
+            self.latency = latency if self.latency is None else self.latency + self.decay * (latency - self.latency)
+            return False
+        self.errors += 1
+        self.consecutive_errors += 1
+        return True
+
+    def weight(self, default_latency):
+        """Selection weight: high for fast, reliable and idle proxies"""
+        latency = self.latency if self.latency is not None else default_latency
+        return self.success ** 2 / max(latency, 0.01) / (1 + self.in_flight)
+
+    def __repr__(self):
+        return f'PooledProxy({self.url}, latency={self.latency}, success={self.success:.2f})'
+
+
+class ProxyPool:
+    """Shares a list of HTTP/SOCKS proxies across concurrent requests, favouring healthy ones.
+
+    Every request reports back its latency and outcome; both are kept as
+    moving averages (``proxy_decay``) so old results fade out. Proxies are
+    picked at random weighted by success rate and speed, so load spreads
+    across the pool instead of piling onto the single fastest proxy. After
+    ``proxy_max_errors`` consecutive failures a proxy is quarantined for
+    ``proxy_quarantine`` seconds, doubling on each repeat up to
+    ``proxy_max_quarantine``. A background thread checks quarantined and
+    idle proxies against ``proxy_check_url`` every ``proxy_check_interval``
+    seconds, so live requests are never spent on probing.
+    """
+
+    def __init__(self, settings):
+        self.timeout = settings.get('timeout', 10)
+        decay = float(settings.get('proxy_decay', 0.3))
+        self.proxies = []
+        for proxy in settings.get('proxy_list') or []:
+            url = normalize_proxy(proxy)
+            if url and url not in (p.url for p in self.proxies):
+                self.proxies.append(PooledProxy(url, decay))
+        self.max_errors = max(1, int(settings.get('proxy_max_errors', 2)))
+        self.quarantine = float(settings.get('proxy_quarantine', 30))
+        self.max_quarantine = float(settings.get('proxy_max_quarantine', 600))
+        self.check_url = settings.get('proxy_check_url') or DEFAULT_CHECK_URL
+        self.check_interval = float(settings.get('proxy_check_interval', 60))
+        self.check_workers = max(1, int(settings.get('proxy_check_workers', 8)))
+        self.lock = threading.Lock()
+        self.stopped = None
+        self.checker = None
+
+    def __len__(self):
+        return len(self.proxies)
+
+    def available(self):
+        now = time.monotonic()
+        return [proxy for proxy in self.proxies if proxy.quarantined_until <= now]
+
+    def acquire(self):
+        """Check out a proxy, picked at random weighted by its health.
+
+        When every proxy is quarantined, the one whose quarantine ends first
+        is used rather than failing the request outright.
+        """
+        with self.lock:
+            candidates = self.available()
+            if candidates:
+                measured = [proxy.latency for proxy in candidates if proxy.latency is not None]
+                # Unmeasured proxies are assumed average so they get their share of trials
+                default_latency = sum(measured) / len(measured) if measured else 1.0
+                weights = [proxy.weight(default_latency) for proxy in candidates]
+                proxy = random.choices(candidates, weights)[0] if sum(weights) else random.choice(candidates)
+            else:
+                proxy = min(self.proxies, key=lambda p: p.quarantined_until)
+            proxy.in_flight += 1
+            return proxy
+
+    def best(self):
+        """The healthiest available proxy, without checking it out"""
+        with self.lock:
+            candidates = self.available() or self.proxies
+            measured = [proxy.latency for proxy in candidates if proxy.latency is not None]
+            default_latency = sum(measured) / len(measured) if measured else 1.0
+            return max(candidates, key=lambda proxy: proxy.weight(default_latency))
+
+    def release(self, proxy, latency, ok=True):
+        """Return a proxy and record how the request went"""
+        with self.lock:
+            proxy.in_flight -= 1
+            self.record(proxy, latency, ok)
+
+    def record(self, proxy, latency, ok):
+        # A proxy coming out of quarantine goes straight back in on its first failure
+        max_errors = 1 if proxy.quarantines else self.max_errors
+        if proxy.record(latency, ok) and proxy.consecutive_errors >= max_errors:
+            proxy.quarantines += 1
+            duration = min(self.max_quarantine, self.quarantine * 2 ** (proxy.quarantines - 1))
+            proxy.quarantined_until = time.monotonic() + duration
+            proxy.consecutive_errors = 0
+        elif ok:
+            proxy.quarantined_until = 0.0
+            proxy.quarantines = 0
+
+    def check(self, proxy):
+        """Probe one proxy outside the request path and record the result"""
+        started = time.monotonic()
+        try:
+            response = requests.get(self.check_url, proxies=proxy.proxies, timeout=self.timeout,
+                                    headers={'Cache-Control': 'no-store'})
+            ok = response.ok
+        except requests.exceptions.RequestException:
+            ok = False
+        with self.lock:
+            self.record(proxy, time.monotonic() - started, ok)
+
+    def due_for_check(self):
+        """Quarantined proxies whose quarantine has expired, and proxies no request has used lately"""
+        now = time.monotonic()
+        with self.lock:
+            return [proxy for proxy in self.proxies if not proxy.in_flight and (
+                (proxy.quarantines and proxy.quarantined_until <= now)
+                or now - proxy.last_used >= self.check_interval)]
+
+    def start(self):
+        """Start the background health checks, if an interval is set"""
+        if self.checker or self.check_interval <= 0 or not self.proxies:
+            return
+        self.stopped = threading.Event()
+        self.checker = threading.Thread(target=self._check_loop, args=(self.stopped,), name='proxy-check', daemon=True)
+        self.checker.start()
+
+    def _check_loop(self, stopped):
+        with ThreadPoolExecutor(max_workers=self.check_workers, thread_name_prefix='proxy-check') as executor:
+            while not stopped.wait(min(self.check_interval, self.quarantine)):
+                list(executor.map(self.check, self.due_for_check()))
+
+    def close(self):
+        """Stop the background health checks; the statistics are kept for the next run"""
+        if self.stopped:
+            self.stopped.set()
+        self.checker = None
+
+    def stats(self):
+        """Per-proxy statistics for status displays"""
+        now = time.monotonic()
+        with self.lock:
+            return [{
+                'proxy': proxy.url,
+                'latency': proxy.latency,
+                'success': proxy.success,
+                'requests': proxy.requests,
+                'errors': proxy.errors,
+                'quarantined': proxy.quarantined_until > now,
+            } for proxy in self.proxies]
+
+    def stats_text(self):
+        stats = self.stats()
+        quarantined = sum(1 for proxy in stats if proxy['quarantined'])
+        used = sorted((proxy for proxy in stats if proxy['requests']), key=lambda proxy: -proxy['requests'])
+        text = f"Proxies: {len(stats) - quarantined} healthy, {quarantined} quarantined"
+        if used:
+            text += "; busiest " + ", ".join(f"{proxy['proxy']} ({proxy['requests']} requests, "
+                                             f"{proxy['success']:.0%} ok)" for proxy in used[:3])
+        return text
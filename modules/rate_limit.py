@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Responses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostThrottle:
+    """Token bucket and concurrency limit for one host, tuned from its responses.
+
+    Tokens refill at one per ``delay`` seconds up to a burst of
+    ``concurrency``. Successful responses move ``delay`` towards
+    latency / ``target_concurrency`` (AutoThrottle) and raise the concurrency
+    limit by one after a full round of successes. A 429/503 or connection
+    failure doubles the delay and halves the concurrency limit, and a
+    Retry-After header pauses the host for the time it asks for.
+    """
+
+    def __init__(self, settings):
+        self.max_concurrency = max(1, int(settings.get('per_host_concurrency', 4)))
+        self.concurrency = self.max_concurrency
+        self.target_concurrency = float(settings.get('throttle_target_concurrency', self.max_concurrency))
+        self.min_delay = float(settings.get('throttle_min_delay', 0))
+        self.max_delay = float(settings.get('throttle_max_delay', 60))
+        self.delay = max(self.min_delay, float(settings.get('throttle_start_delay', 0)))
+        self.tokens = float(self.concurrency)
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self.successes = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a slot and a token; returns 0 on success, otherwise seconds to wait before trying again"""
+        with self.lock:
+            now = time.monotonic()
+            if self.delay:
+                self.tokens = min(self.concurrency, self.tokens + (now - self.last_refill) / self.delay)
+            else:
+                self.tokens = self.concurrency
+            self.last_refill = now
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.in_flight >= self.concurrency:
+                return 0.05  # Woken up again once a request has finished
+            if self.tokens < 1:
+                return (1 - self.tokens) * self.delay
+            self.tokens -= 1
+            self.in_flight += 1
+            return 0
+
+    def release(self):
+        """Free the slot taken by ``try_acquire``"""
+        with self.lock:
+            self.in_flight -= 1
+
+    def record(self, status_code, latency, retry_after=None):
+        """Adapt the delay and concurrency limit to one response (or failed attempt)"""
+        with self.lock:
+            if status_code is None or status_code in THROTTLE_STATUSES:
+                self.throttled += 1
+                self.successes = 0
+                self.delay = min(self.max_delay, max(self.delay * 2, self.min_delay, 0.25))
+                self.concurrency = max(1, self.concurrency // 2)
+                self.tokens = min(self.tokens, 0.0)
+                if retry_after is not None:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + min(retry_after, self.max_delay))
+                return
+            target_delay = latency / self.target_concurrency
+            new_delay = max(target_delay, (self.delay + target_delay) / 2)
+            if status_code >= 400:
+                # Error pages are often fast; they must not speed the crawl up
+                new_delay = max(new_delay, self.delay)
+            self.delay = min(self.max_delay, max(self.min_delay, new_delay))
+            self.successes += 1
+            if self.successes >= self.concurrency and self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                self.successes = 0
+
+
+class AdaptiveRateLimiter:
+    """Per-host HostThrottles shared by all requests of a fetcher.
+
+    State is kept in plain thread-safe objects rather than asyncio
+    primitives, so it carries over between the event loops of successive
+    ``fetch_all`` batches.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled(settings):
+        return settings.get('autothrottle', True)
+
+    def host(self, url):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostThrottle(self.settings)
+            return self.hosts[host]
+
+    async def acquire(self, url):
+        """Wait until the URL's host may receive another request"""
+        throttle = self.host(url)
+        while True:
+            wait = throttle.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, url):
+        """Free the slot taken by ``acquire``; call exactly once per successful ``acquire``"""
+        self.host(url).release()
+
+    def record(self, url, status_code, latency, headers=None):
+        """Adapt the host's limits to one attempt; a slot may see several (proxy or login retries)"""
+        retry_after = parse_retry_after(headers.get('Retry-After')) if headers else None
+        self.host(url).record(status_code, latency, retry_after)
+
+    def stats_text(self):
+        """Summary of hosts that had to be slowed down, or None"""
+        throttled = [(host, throttle) for host, throttle in self.hosts.items() if throttle.throttled]
+        if not throttled:
+            return None
+        return "Throttled " + ", ".join(
+            f"{host} {throttle.throttled}x (now {throttle.delay:.2f}s delay, {throttle.concurrency} parallel)"
+            for host, throttle in throttled)
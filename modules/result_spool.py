@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+from modules.parsing import ExtractedElement
+
+
+class ResultSpool:
+    """Scraped records streamed to a temporary JSON Lines file and read back a page at a time.
+
+    The scrape thread ``append``s each batch of ``ExtractedElement`` records
+    as it arrives; ``read_page`` indexes the byte offset of every
+    ``page_size``-th record as the file grows, so paging through millions of
+    records never loads more than one page. ``iter_records`` reads them all
+    back one at a time, for saving in any format.
+    """
+
+    def __init__(self, page_size=1000, directory=None):
+        self.page_size = page_size
+        fd, self.path = tempfile.mkstemp(prefix='scrape-', suffix='.jsonl', dir=directory)
+        os.close(fd)
+        self.file = None
+        self.reset()
+
+    def reset(self):
+        """Empty the file and the page index"""
+        if self.file:
+            self.file.close()
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.page_offsets = []
+        self.indexed_bytes = 0
+        self.line_count = 0
+
+    def append(self, elements):
+        self.file.writelines(json.dumps(element.to_dict(), ensure_ascii=False) + '\n' for element in elements)
+        self.file.flush()
+
+    def _index(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.indexed_bytes)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Partially written; picked up on the next call
+                if self.line_count % self.page_size == 0:
+                    self.page_offsets.append(self.indexed_bytes)
+                self.indexed_bytes += len(line)
+                self.line_count += 1
+
+    def page_count(self):
+        self._index()
+        return len(self.page_offsets)
+
+    def read_page(self, page):
+        """Records of one page (0-based)"""
+        self._index()
+        if not 0 <= page < len(self.page_offsets):
+            return []
+        records = []
+        with open(self.path, 'rb') as f:
+            f.seek(self.page_offsets[page])
+            for line in f:
+                if len(records) == self.page_size or not line.endswith(b'\n'):
+                    break
+                records.append(ExtractedElement.from_dict(json.loads(line)))
+        return records
+
+    def iter_records(self):
+        """Every complete record written so far"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.endswith('\n'):
+                    yield ExtractedElement.from_dict(json.loads(line))
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
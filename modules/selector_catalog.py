@@ -0,0 +1,91 @@
+# --- Enhanced CSS Selectors ---
+CSS_SELECTORS = {
+    "Whole Website": {
+        "Entire Page": "*"
+    },
+    "Basic Elements": {
+        "All Elements": "*",
+        "Headings (h1-h6)": "h1, h2, h3, h4, h5, h6",
+        "Paragraphs (p)": "p",
+        "Spans (span)": "span",
+        "Divs (div)": "div",
+        "Links (a)": "a",
+        "Images (img)": "img",
+        "Forms (form)": "form",
+        "Buttons (button)": "button",
+        "Inputs (input)": "input",
+        "Textareas (textarea)": "textarea",
+    },
+    "Headings": {
+        "Heading 1 (h1)": "h1",
+        "Heading 2 (h2)": "h2",
+        "Heading 3 (h3)": "h3",
+        "Heading 4 (h4)": "h4",
+        "Heading 5 (h5)": "h5",
+        "Heading 6 (h6)": "h6",
+    },
+    "Text": {
+        "Paragraphs": "p",
+        "Strong Text (strong)": "strong",
+        "Emphasized Text (em)": "em",
+        "Line Breaks (br)": "br",
+    },
+    "Lists": {
+        "Unordered Lists (ul)": "ul",
+        "Ordered Lists (ol)": "ol",
+        "List Items (li)": "li",
+    },
+    "Tables": {
+        "Tables": "table",
+        "Table Headers (th)": "th",
+        "Table Rows (tr)": "tr",
+        "Table Data Cells (td)": "td",
+    },
+    "Media": {
+        "Links": "a",
+        "Images": "img",
+        "Audio (audio)": "audio",
+        "Video (video)": "video",
+    },
+    "Attributes": {
+        "Links with href attribute": "a[href]",
+        "Images with src attribute": "img[src]",
+        "Elements with specific id": "#example-id",  # Replace example-id
+        "Elements with specific class": ".example-class",  # Replace example-class
+        "Elements with data attribute": "[data-value]", # Example data attribute
+        "Links with rel='nofollow'": "a[rel='nofollow']",
+        "Images with alt text": "img[alt]",
+    },
+    "Combinators": {
+        "Child elements": "parent > child",
+        "Descendant elements": "ancestor descendant",
+        "Adjacent sibling elements": "previous + next",
+        "General sibling elements": "element ~ siblings",
+    },
+    "Pseudo-classes": {
+        "First child": ":first-child",
+        "Last child": ":last-child",
+        "Nth child (even)": ":nth-child(even)",
+        "Nth child (odd)": ":nth-child(odd)",
+        "Hover state": ":hover",
+        "Focus state": ":focus",
+    },
+    "Forms": {
+        "Input fields": "input[type='text']",
+        "Password fields": "input[type='password']",
+        "Submit buttons": "input[type='submit'], button[type='submit']",
+        "Checkboxes": "input[type='checkbox']",
+        "Radio buttons": "input[type='radio']",
+        "Select dropdowns": "select",
+        "Option elements": "option",
+    },
+    "Custom": ""
+}
+
+
+def find_selector(label):
+    """Look up a selector by its label in any category, e.g. "Links (a)" -> "a" """
+    for category, selectors in CSS_SELECTORS.items():
+        if isinstance(selectors, dict) and label in selectors:
+            return selectors[label]
+    return None
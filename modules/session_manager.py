@@ -0,0 +1,133 @@
+import hashlib
+import os
+import threading
+import time
+from http.cookiejar import LoadError, MozillaCookieJar
+from urllib.parse import urlsplit
+from modules.form_submission import FormSubmitter
+
+DEFAULT_SESSION_DIR = os.path.join(os.path.expanduser("~"), ".web_scraper_sessions")
+
+
+class SessionManager:
+    """Logs in once and keeps the session's cookies on disk between jobs.
+
+    The cookie jar of a login (per login URL and username) is saved under
+    ``session_dir`` in Mozilla cookies.txt format. A later job loads it
+    instead of logging in again, unless every cookie in it has expired or it
+    is older than ``login_max_age`` seconds. The cookies live on the shared
+    ``session``, so every fetch uses them, and ``browser_cookies`` hands them
+    to Chrome. Whether a response shows the login has lapsed is decided by
+    ``is_logged_out``; the fetcher then calls ``relogin`` and retries.
+    """
+
+    def __init__(self, settings, session, get_proxies=None, on_status=None):
+        self.settings = settings
+        self.session = session
+        self.get_proxies = get_proxies or (lambda: {})
+        self.on_status = on_status
+        self.login_url = settings['login_url']
+        self.credentials = {'username': settings.get('login_username'), 'password': settings.get('login_password')}
+        self.check_text = settings.get('login_check_text')
+        self.max_age = float(settings.get('login_max_age', 12 * 3600))
+        directory = settings.get('session_dir') or DEFAULT_SESSION_DIR
+        key = hashlib.sha256(f"{self.login_url}\0{self.credentials['username']}".encode('utf-8')).hexdigest()[:32]
+        self.path = os.path.join(directory, f'{key}.cookies.txt')
+        self.login_path = urlsplit(self.login_url).path.rstrip('/')
+        self.logged_in = False
+        self.generation = 0  # Bumped on every login so concurrent relogin calls log in only once
+        self.logins = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled(settings):
+        return bool(settings.get('login_url') and settings.get('login_username'))
+
+    def report_status(self, message):
+        if self.on_status:
+            self.on_status(message)
+
+    def ensure_login(self):
+        """Make sure the session is logged in, reusing the saved cookies when they are still valid"""
+        with self.lock:
+            if self.logged_in:
+                return
+            if self.load():
+                self.logged_in = True
+                self.report_status("Reusing saved login session")
+                return
+            self.login()
+
+    def relogin(self, generation):
+        """Log in again after a response showed the session had lapsed.
+
+        ``generation`` is the value read before that request; if another
+        thread has logged in since, its login is used instead of a new one.
+        """
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.report_status("Login session expired; logging in again")
+            self.session.cookies.clear()
+            self.login()
+
+    def login(self):
+        FormSubmitter(self.settings, self.session, self.get_proxies()).login(
+            self.login_url, self.credentials, self.check_text)
+        self.logged_in = True
+        self.generation += 1
+        self.logins += 1
+        self.save()
+        self.report_status("Logged in")
+
+    def is_logged_out(self, response, read_body=True):
+        """Whether a response shows the login has lapsed: a 401, a redirect to the login page,
+        or (when ``login_check_text`` is set and the body may be read) a page without that text"""
+        if response.status_code == 401:
+            return True
+        if response.history and urlsplit(response.url).path.rstrip('/') == self.login_path:
+            return True
+        if self.check_text and read_body and response.ok:
+            return self.check_text.lower() not in response.text.lower()
+        return False
+
+    def load(self):
+        """Copy unexpired saved cookies into the session; returns False if there are none worth using"""
+        if not os.path.exists(self.path) or time.time() - os.path.getmtime(self.path) > self.max_age:
+            return False
+        jar = MozillaCookieJar(self.path)
+        try:
+            jar.load(ignore_discard=True)  # Expired cookies are dropped while loading
+        except (LoadError, OSError):
+            return False
+        if not len(jar):
+            return False
+        for cookie in jar:
+            self.session.cookies.set_cookie(cookie)
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        jar = MozillaCookieJar(self.path)
+        for cookie in self.session.cookies:
+            jar.set_cookie(cookie)
+        jar.save(ignore_discard=True)
+        os.chmod(self.path, 0o600)  # The cookies grant access to the account
+
+    def discard(self):
+        """Forget the saved login, so the next job logs in afresh"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def browser_cookies(self):
+        """The session's cookies as Chrome DevTools Network.setCookies entries"""
+        cookies = []
+        for cookie in self.session.cookies:
+            entry = {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain,
+                     'path': cookie.path, 'secure': cookie.secure}
+            if cookie.expires:
+                entry['expires'] = cookie.expires
+            cookies.append(entry)
+        return cookies
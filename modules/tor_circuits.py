@@ -0,0 +1,123 @@
+import random
+import threading
+import uuid
+from modules.network import TOR_SOCKS_PORT
+
+# Status codes that usually mean the exit node is blocked or throttled
+EXIT_FAILURE_STATUSES = (403, 429, 503)
+
+
+class TorCircuit:
+    """One Tor circuit, reached through a SOCKS port and optional isolation credentials"""
+
+    def __init__(self, host, port, username=None, password=None, smoothing=0.3):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.smoothing = smoothing
+        self.latency = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.in_flight = 0
+
+    @property
+    def proxy_url(self):
+        # Tor isolates streams with different SOCKS credentials (IsolateSOCKSAuth)
+        credentials = f'{self.username}:{self.password}@' if self.username else ''
+        return f'socks5h://{credentials}{self.host}:{self.port}'
+
+    @property
+    def proxies(self):
+        return {'http': self.proxy_url, 'https': self.proxy_url}
+
+    def record(self, latency, ok):
+        """Update latency and error statistics after a request"""
+        self.requests += 1
+        if ok:
+            self.consecutive_errors = 0
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+        else:
+            self.errors += 1
+            self.consecutive_errors += 1
+
+    def score(self, timeout):
+        """Lower is healthier; unmeasured circuits score 0 so they get tried"""
+        if self.latency is None and not self.errors:
+            return self.in_flight
+        latency = self.latency if self.latency is not None else timeout
+        error_rate = self.errors / self.requests if self.requests else 0
+        return (latency * (1 + 2 * error_rate) + self.consecutive_errors * timeout) * (1 + self.in_flight)
+
+    def __repr__(self):
+        return f'TorCircuit({self.host}:{self.port}, user={self.username}, latency={self.latency}, errors={self.errors})'
+
+
+class TorCircuitPool:
+    """Spreads requests across several Tor circuits and routes to the healthiest ones.
+
+    Circuits come from every port in ``tor_socks_ports`` (falling back to
+    ``tor_socks_port``), each multiplied by ``tor_isolation_streams`` distinct
+    SOCKS credentials so Tor builds a separate circuit for each.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.timeout = settings.get('timeout', 10)
+        host = settings.get('tor_socks_ip', '127.0.0.1')
+        ports = parse_ports(settings.get('tor_socks_ports')) or [settings.get('tor_socks_port', TOR_SOCKS_PORT)]
+        streams = max(1, int(settings.get('tor_isolation_streams', 1)))
+        self.lock = threading.Lock()
+        self.circuits = []
+        for port in ports:
+            for stream in range(streams):
+                if streams > 1:
+                    self.circuits.append(TorCircuit(host, port, f'circuit{stream}', uuid.uuid4().hex))
+                else:
+                    self.circuits.append(TorCircuit(host, port))
+
+    def acquire(self):
+        """Check out the healthiest circuit, breaking ties at random"""
+        with self.lock:
+            scores = [(circuit.score(self.timeout), random.random(), circuit) for circuit in self.circuits]
+            circuit = min(scores, key=lambda item: item[:2])[2]
+            circuit.in_flight += 1
+            return circuit
+
+    def release(self, circuit, latency, ok=True):
+        """Return a circuit and record how the request went"""
+        with self.lock:
+            circuit.in_flight -= 1
+            circuit.record(latency, ok)
+
+    def reset_credentials(self):
+        """Give every isolated circuit fresh credentials so Tor builds new circuits"""
+        with self.lock:
+            for circuit in self.circuits:
+                if circuit.username:
+                    circuit.password = uuid.uuid4().hex
+                circuit.latency = None
+                circuit.requests = circuit.errors = circuit.consecutive_errors = 0
+
+    def stats(self):
+        """Per-circuit statistics for status displays"""
+        with self.lock:
+            return [{
+                'proxy': f'{circuit.host}:{circuit.port}' + (f' ({circuit.username})' if circuit.username else ''),
+                'latency': circuit.latency,
+                'requests': circuit.requests,
+                'errors': circuit.errors,
+            } for circuit in self.circuits]
+
+
+def parse_ports(value):
+    """Accepts a list of ports or a comma-separated string"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [int(port) for port in value if str(port).strip()]
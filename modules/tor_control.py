@@ -0,0 +1,126 @@
+import threading
+from stem import Signal
+from stem.control import Controller, EventType
+from modules.network import DEFAULT_TOR_CONTROL_PORT
+
+BLOCKED_STATUSES = (403, 429)
+
+
+class TorIdentityRotator:
+    """Issues NEWNYM over one long-lived control connection when the rotation policy triggers.
+
+    Policy (all optional):
+    - ``tor_rotate_every``: rotate after this many requests
+    - ``tor_rotate_on_block``: rotate on 403/429 responses
+    - ``tor_rotate_latency_factor``: rotate when a request takes this many
+      times longer than the running average
+
+    Rotation never blocks the caller. When Tor's NEWNYM rate limit is still
+    active the signal is scheduled for when it expires, and the new identity
+    is confirmed by Tor's SIGNAL event rather than by sleeping. Streams that
+    are already open keep their circuit, so in-flight fetches are unaffected.
+    """
+
+    def __init__(self, settings, circuit_pool=None, on_status=None):
+        self.settings = settings
+        self.circuit_pool = circuit_pool
+        self.on_status = on_status
+        self.rotate_every = int(settings.get('tor_rotate_every', 0) or 0)
+        self.rotate_on_block = bool(settings.get('tor_rotate_on_block', False))
+        self.latency_factor = float(settings.get('tor_rotate_latency_factor', 0) or 0)
+        self.lock = threading.Lock()
+        self.controller = None
+        self.pending = None
+        self.requests_since_rotation = 0
+        self.average_latency = None
+        self.latency_samples = 0
+        self.rotations = 0
+        self.rotated = threading.Event()
+
+    @staticmethod
+    def is_enabled(settings):
+        return bool(settings.get('tor_rotate_every') or settings.get('tor_rotate_on_block')
+                    or settings.get('tor_rotate_latency_factor'))
+
+    def start(self):
+        """Open and authenticate the control connection and subscribe to SIGNAL events"""
+        self.controller = Controller.from_port(port=int(self.settings.get('tor_port', DEFAULT_TOR_CONTROL_PORT)))
+        password = self.settings.get('tor_password')
+        if password:
+            self.controller.authenticate(password=password)
+        else:
+            self.controller.authenticate()
+        self.controller.add_event_listener(self._on_signal, EventType.SIGNAL)
+
+    def close(self):
+        """Cancel any scheduled rotation and close the control connection"""
+        with self.lock:
+            if self.pending:
+                self.pending.cancel()
+                self.pending = None
+        if self.controller:
+            self.controller.close()
+            self.controller = None
+
+    def record(self, status_code, latency):
+        """Feed one request outcome into the rotation policy"""
+        reason = None
+        with self.lock:
+            self.requests_since_rotation += 1
+            if self.rotate_on_block and status_code in BLOCKED_STATUSES:
+                reason = f'HTTP {status_code}'
+            elif self.rotate_every and self.requests_since_rotation >= self.rotate_every:
+                reason = f'{self.requests_since_rotation} requests'
+            elif self.latency_factor and status_code is not None:
+                if (self.latency_samples >= 5
+                        and latency > self.latency_factor * self.average_latency):
+                    reason = f'latency spike ({latency:.1f}s)'
+                self.latency_samples += 1
+                if self.average_latency is None:
+                    self.average_latency = latency
+                else:
+                    self.average_latency += 0.2 * (latency - self.average_latency)
+        if reason:
+            self.request_rotation(reason)
+
+    def request_rotation(self, reason=''):
+        """Ask for a new identity without blocking; repeated requests coalesce"""
+        if not self.controller:
+            return
+        with self.lock:
+            if self.pending:
+                return
+            wait = 0 if self.controller.is_newnym_available() else self.controller.get_newnym_wait()
+            self.pending = threading.Timer(wait, self._send_newnym, args=(reason,))
+            self.pending.daemon = True
+            self.pending.start()
+
+    def _send_newnym(self, reason):
+        try:
+            if self.controller:
+                self.controller.signal(Signal.NEWNYM)
+                with self.lock:
+                    # Counted from the signal, so requests made before Tor's SIGNAL event cannot trigger another
+                    self.requests_since_rotation = 0
+                    self.average_latency = None
+                    self.latency_samples = 0
+                self._report(f'Requested new Tor identity ({reason})' if reason else 'Requested new Tor identity')
+        except Exception as e:
+            self._report(f'Tor identity rotation failed: {e}')
+        finally:
+            with self.lock:
+                self.pending = None
+
+    def _on_signal(self, event):
+        """Called on stem's event thread once Tor has acted on a signal"""
+        if event.signal != Signal.NEWNYM:
+            return
+        with self.lock:
+            self.rotations += 1
+        if self.circuit_pool:
+            self.circuit_pool.reset_credentials()
+        self.rotated.set()
+
+    def _report(self, message):
+        if self.on_status:
+            self.on_status(message)
@@ -0,0 +1,76 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from mock_site import MockSite
+from modules.async_fetcher import AsyncFetcher
+from modules.http_pool import create_session
+from modules.proxy_pool import ProxyPool
+from modules.session_manager import SessionManager
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_route_retries_release_each_host_slot_once():
+    site = MockSite().start()
+    try:
+        settings = {'proxy_list': [f'127.0.0.1:{closed_port()}', f'127.0.0.1:{closed_port()}'],
+                    'route_retries': 2, 'timeout': 2, 'throttle_max_delay': 0.05}
+        fetcher = AsyncFetcher(settings, route_pool=ProxyPool(settings))
+        results = fetcher.fetch_all(site.urls(3))
+        fetcher.close()
+    finally:
+        site.close()
+    assert all(isinstance(result, requests.exceptions.ProxyError) for result in results)
+    assert [throttle.in_flight for throttle in fetcher.rate_limiter.hosts.values()] == [0]
+    # Every failed attempt still slows the host down
+    assert all(throttle.throttled == 9 for throttle in fetcher.rate_limiter.hosts.values())
+
+
+def test_relogin_retry_releases_host_slot_once(tmp_path):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/login':
+                self.reply(200, b'<form method="post" action="/login"><input name="username">'
+                                b'<input type="password" name="password"></form>')
+            elif 'session=ok' in self.headers.get('Cookie', ''):
+                self.reply(200, b'<p>Welcome back</p><a href="/logout">Log out</a>')
+            else:
+                self.reply(401, b'login required')
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            self.reply(200, b'<p>Welcome</p><a href="/logout">Log out</a>', {'Set-Cookie': 'session=ok; Path=/'})
+
+        def reply(self, status, body, headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        settings = {'login_url': f'{base_url}/login', 'login_username': 'user', 'login_password': 'secret',
+                    'session_dir': str(tmp_path)}
+        session = create_session(settings)
+        session_manager = SessionManager(settings, session)
+        fetcher = AsyncFetcher(settings, session=session, session_manager=session_manager)
+        results = fetcher.fetch_all([f'{base_url}/page/{number}' for number in range(3)])
+        fetcher.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert [result.status_code for result in results] == [200, 200, 200]
+    assert session_manager.logins >= 1
+    assert [throttle.in_flight for throttle in fetcher.rate_limiter.hosts.values()] == [0]
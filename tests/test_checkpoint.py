@@ -0,0 +1,38 @@
+from modules.checkpoint import CheckpointStore, page_scope
+from modules.dedup import ContentHashSet
+from modules.engine import RunOutput
+from modules.parsing import ExtractionSchema, extract_elements
+
+LINKS = b'<a href="/a">A</a><a href="/b">B</a>'
+
+
+def run_once(settings, url, body):
+    """One interrupted run: emit one page's records, commit the checkpoint and stop"""
+    schema = ExtractionSchema.coerce('a')
+    checkpoint = CheckpointStore(settings, 'job')
+    output = RunOutput(settings, schema)
+    checkpoint.attach_seen('records', output.seen_records)
+    output.emit(url, extract_elements(body, schema))
+    checkpoint.collect_seen()
+    checkpoint.commit(output.offsets())
+    checkpoint.close()
+    output.close()
+    return output.count
+
+
+def test_record_digests_survive_a_resume(tmp_path):
+    settings = {'checkpoint_dir': str(tmp_path), 'dedup_records': True}
+    assert run_once(settings, 'http://example.com/1', LINKS) == 2
+    assert run_once(settings, 'http://example.com/2', LINKS + b'<a href="/c">C</a>') == 1
+
+
+def test_page_digests_are_dropped_with_their_url(tmp_path):
+    checkpoint = CheckpointStore({'checkpoint_dir': str(tmp_path)}, 'job')
+    seen = ContentHashSet()
+    checkpoint.attach_seen(page_scope('http://example.com/'), seen)
+    seen.add(b'page one digest!')
+    checkpoint.collect_seen()
+    checkpoint.mark_done('http://example.com/')
+    checkpoint.commit({})
+    assert checkpoint.db.execute("SELECT COUNT(*) FROM seen").fetchone()[0] == 0
+    checkpoint.close()
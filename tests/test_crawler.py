@@ -0,0 +1,51 @@
+from modules.crawler import BloomFilter, URLFrontier, normalize_url
+
+
+def test_normalize_url():
+    assert normalize_url('HTTP://User:pw@Example.COM:80/a?b=2&utm_source=x&a=1#top') == 'http://example.com/a?a=1&b=2'
+    assert normalize_url('https://example.com:8443') == 'https://example.com:8443/'
+    assert normalize_url('../c?q=', 'http://example.com/a/b/') == 'http://example.com/a/c?q='
+    assert normalize_url('mailto:someone@example.com') is None
+    assert normalize_url('javascript:void(0)', 'http://example.com/') is None
+    assert normalize_url('http://[bad') is None
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(10000)
+    added = sum(bloom.add(f'http://example.com/{n}') for n in range(10000))
+    assert added > 9950  # An add can only be refused as a false positive
+    assert not bloom.add('http://example.com/0')
+    assert all(f'http://example.com/{n}' in bloom for n in range(10000))
+    assert sum(f'http://other.example/{n}' in bloom for n in range(10000)) < 50
+    assert 1.7 < len(bloom.bits) / 10000 < 1.9  # About 1.8 bytes per item at 0.1%
+
+
+def test_frontier_orders_each_host_breadth_first_and_caps_per_host():
+    frontier = URLFrontier({'per_host_concurrency': 2, 'crawl_max_depth': 3, 'crawl_same_host': False})
+    frontier.add_seed('http://a.example/')
+    frontier.add_seed('http://b.example/')
+    frontier.add_links(['/deep1', '/deep2'], 'http://a.example/x', 1)
+    frontier.add_links(['/near', '/near'], 'http://a.example/', 0)
+    batch = frontier.next_batch(10)
+    assert batch == [('http://a.example/', 0), ('http://a.example/near', 1), ('http://b.example/', 0)]
+    assert frontier.next_batch(10) == [('http://a.example/deep1', 2), ('http://a.example/deep2', 2)]
+    assert len(frontier) == 0
+
+
+def test_frontier_filters_links():
+    frontier = URLFrontier({'crawl_max_depth': 1, 'crawl_exclude': 'logout', 'crawl_priority_pattern': 'item'})
+    frontier.add_seed('http://a.example/')
+    frontier.next_batch(10)
+    frontier.add_links(['/page', '/item/1', '/logout', '/img.png', 'http://b.example/'], 'http://a.example/', 0)
+    frontier.add_links(['/too-deep'], 'http://a.example/page', 1)
+    assert frontier.next_batch(1) == [('http://a.example/item/1', 1)]
+    assert frontier.next_batch(10) == [('http://a.example/page', 1)]
+
+
+def test_frontier_spaces_out_requests_with_crawl_delay():
+    frontier = URLFrontier({'crawl_delay': 60})
+    frontier.add_seed('http://a.example/1')
+    frontier.add_seed('http://a.example/2')
+    assert frontier.next_batch(10) == [('http://a.example/1', 0)]
+    assert frontier.next_batch(10) == []
+    assert frontier.wait_time() > 59
@@ -0,0 +1,21 @@
+from modules.engine import RunOutput
+from modules.parsing import ExtractionSchema, extract_elements
+
+TABLE = b'''<table><tr><td>Widget</td><td>$10</td><td>Yes</td></tr>
+<tr><td>Gadget</td><td>$10</td><td>Yes</td></tr></table>'''
+
+
+def test_repeated_values_are_kept_by_default():
+    schema = ExtractionSchema.coerce('td')
+    output = RunOutput({}, schema)
+    output.emit('http://example.com/', extract_elements(TABLE, schema))
+    output.close()
+    assert output.count == 6
+
+
+def test_dedup_records_is_opt_in():
+    schema = ExtractionSchema.coerce('td')
+    output = RunOutput({'dedup_records': True}, schema)
+    output.emit('http://example.com/', extract_elements(TABLE, schema))
+    output.close()
+    assert output.count == 4
@@ -0,0 +1,18 @@
+from modules.engine import RunOutput
+from modules.parsing import ExtractionSchema, extract_elements
+
+TABLE = b'<table><tr><td>Widget</td><td>$10</td></tr></table>'
+
+
+def test_text_output_is_replaced_unless_resuming(tmp_path):
+    schema = ExtractionSchema.coerce('td')
+    path = str(tmp_path / 'out.txt')
+    for _ in range(2):
+        output = RunOutput({}, schema, output_path=path)
+        output.emit('http://example.com/', extract_elements(TABLE, schema))
+        output.close()
+    assert open(path, encoding='utf-8').read().count('Widget') == 1
+    output = RunOutput({}, schema, output_path=path, resume_offsets={'output': 7})
+    output.emit('http://example.com/', extract_elements(TABLE, schema))
+    output.close()
+    assert open(path, encoding='utf-8').read().count('Widget') == 2
@@ -0,0 +1,40 @@
+import pyarrow.parquet
+from modules.exporters import open_writer
+from modules.parsing import ExtractedElement
+
+
+def rows(*texts):
+    return [ExtractedElement('a', text, {'href': f'/{text}'}) for text in texts]
+
+
+def read_parts(tmp_path):
+    return [pyarrow.parquet.read_table(path).column('text').to_pylist()
+            for path in sorted(tmp_path.glob('out*.parquet'))]
+
+
+def test_parquet_tell_makes_written_rows_durable(tmp_path):
+    path = str(tmp_path / 'out.parquet')
+    writer = open_writer(path, flush_every=1000)
+    writer.write(rows('one', 'two'))
+    offset = writer.tell()
+    writer.write(rows('lost'))
+    writer.tell()
+    writer.write(rows('also lost'))  # Crash: never closed
+    assert read_parts(tmp_path) == [['one', 'two'], ['lost']]
+
+    writer = open_writer(path, flush_every=1000, resume_offset=offset)
+    writer.write(rows('three'))
+    writer.close()
+    assert read_parts(tmp_path) == [['one', 'two'], ['three']]
+
+
+def test_fresh_parquet_export_drops_old_parts(tmp_path):
+    path = str(tmp_path / 'out.parquet')
+    writer = open_writer(path)
+    writer.write(rows('old'))
+    writer.tell()
+    writer.write(rows('old part'))
+    writer.close()
+    writer = open_writer(path)
+    writer.close()
+    assert read_parts(tmp_path) == [[]]
@@ -0,0 +1,74 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from mock_site import MockSite
+from modules.async_fetcher import AsyncFetcher
+from modules.engine import ScrapeEngine
+from modules.http_pool import create_session
+from modules.session_manager import SessionManager
+
+
+def test_cache_hit_through_streaming_parser(tmp_path):
+    site = MockSite(elements=3).start()
+    try:
+        settings = {'http_cache': True, 'cache_dir': str(tmp_path), 'cache_min_ttl': 60, 'request_delay': 0}
+        urls = site.urls(2)
+        assert ScrapeEngine(dict(settings)).run(urls, 'p.item') == 6
+        requests_before = site.requests
+        engine = ScrapeEngine(dict(settings, stream_parse=True))
+        count = engine.run(urls, 'p.item')
+    finally:
+        site.close()
+    assert engine.errors == []
+    assert count == 6
+    assert site.requests == requests_before  # Both pages came from the cache
+
+
+def test_relogin_bypasses_the_page_cached_while_logged_out(tmp_path):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/login':
+                self.reply(b'<form method="post" action="/login"><input name="username">'
+                           b'<input type="password" name="password"></form>')
+            elif 'session=ok' in self.headers.get('Cookie', ''):
+                self.reply(b'<p>Welcome back</p>')
+            else:
+                self.reply(b'<p>Please log in</p>')
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            self.reply(b'<p>Welcome</p>', {'Set-Cookie': 'session=ok; Path=/'})
+
+        def reply(self, body, headers=None):
+            self.send_response(200)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    settings = {'http_cache': True, 'cache_dir': str(tmp_path / 'cache'), 'cache_min_ttl': 60,
+                'login_url': f'{base_url}/login', 'login_username': 'user', 'login_password': 'secret',
+                'login_check_text': 'Welcome', 'session_dir': str(tmp_path / 'sessions')}
+    try:
+        # An earlier job cached the page while its session had already expired
+        stale = create_session(settings)
+        stale.cookies.set('session', 'expired')
+        assert 'Please log in' in stale.get(f'{base_url}/page').text
+
+        session = create_session(settings)
+        session.cookies.set('session', 'expired')
+        session_manager = SessionManager(settings, session)
+        fetcher = AsyncFetcher(settings, session=session, session_manager=session_manager)
+        response = fetcher.fetch_one(f'{base_url}/page')
+        fetcher.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert session_manager.logins == 1
+    assert 'Welcome back' in response.text
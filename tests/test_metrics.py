@@ -0,0 +1,76 @@
+import json
+import re
+import pytest
+from modules.metrics import Histogram, Metrics
+
+SAMPLE = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>[^}]*)\})? (?P<value>\S+)$')
+
+
+def test_percentiles_are_within_one_bucket():
+    histogram = Histogram()
+    for millis in range(1, 1001):
+        histogram.observe(millis / 1000)
+    for fraction in (0.5, 0.95, 0.99):
+        assert histogram.percentile(fraction) == pytest.approx(fraction, rel=0.1)
+    assert histogram.count == 1000 and histogram.sum == pytest.approx(500.5)
+
+
+def test_percentile_edges():
+    histogram = Histogram()
+    assert histogram.percentile(0.5) == 0.0
+    histogram.observe(0)
+    histogram.observe(2.0)
+    assert histogram.percentile(0.5) <= Histogram.MIN_SECONDS
+    assert histogram.percentile(1.0) == pytest.approx(2.0, rel=0.06)
+    assert histogram.percentile(1.0) <= histogram.max
+
+
+def test_values_fall_at_or_below_their_bucket_bound():
+    histogram = Histogram()
+    for seconds in (0.00005, 0.0001, 0.00011, 0.05, 0.05, 3.0):
+        histogram.observe(seconds)
+    buckets = histogram.cumulative_buckets()
+    assert [count for _, count in buckets] == [2, 3, 5, 6]
+    assert buckets[0][0] == Histogram.MIN_SECONDS
+    assert 0.05 <= buckets[2][0] < 0.05 * Histogram.GROWTH
+    assert 3.0 <= buckets[3][0] < 3.0 * Histogram.GROWTH
+
+
+def test_prometheus_exposition_is_a_valid_histogram():
+    metrics = Metrics()
+    metrics.count('requests', 3)
+    for seconds in (0.01, 0.2, 0.2, 1.5):
+        metrics.observe('fetch', seconds)
+    metrics.observe('parse', 0.003)
+    text = metrics.to_prometheus()
+    assert text.endswith('\n')
+    samples = []
+    types = {}
+    for line in text.splitlines():
+        if line.startswith('# TYPE'):
+            _, _, name, kind = line.split()
+            types[name] = kind
+        elif not line.startswith('#'):
+            match = SAMPLE.match(line)
+            assert match, line
+            samples.append((match['name'], match['labels'] or '', float(match['value'])))
+    assert types['web_scraper_stage_seconds'] == 'histogram'
+    assert ('web_scraper_requests_total', '', 3) in samples
+
+    buckets = [(labels, value) for name, labels, value in samples
+               if name == 'web_scraper_stage_seconds_bucket' and 'stage="fetch"' in labels]
+    bounds = [float(re.search(r'le="([^"]+)"', labels)[1]) for labels, _ in buckets]
+    counts = [value for _, value in buckets]
+    assert bounds[-1] == float('inf') and bounds == sorted(bounds)
+    assert counts == sorted(counts) and counts[-1] == 4
+    assert ('web_scraper_stage_seconds_count', 'stage="fetch"', 4) in samples
+    assert ('web_scraper_stage_seconds_sum', 'stage="fetch"', pytest.approx(1.91)) in samples
+    assert any(name == 'web_scraper_stage_seconds_count' and labels == 'stage="parse"' for name, labels, _ in samples)
+
+
+def test_json_snapshot_round_trips():
+    metrics = Metrics()
+    metrics.observe('parse', 0.02)
+    snapshot = json.loads(metrics.to_json())
+    assert snapshot['stages']['parse']['count'] == 1
+    assert snapshot['stages']['parse']['buckets'][-1][1] == 1
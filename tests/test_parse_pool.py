@@ -0,0 +1,24 @@
+import requests
+from mock_site import MockSite
+from modules.async_fetcher import AsyncFetcher
+from modules.parse_pool import ParsePool
+from modules.parsing import ExtractionSchema
+from tests.test_async_fetcher import closed_port
+
+
+def test_fetch_and_extract_with_one_parse_slot():
+    site = MockSite(elements=3).start()
+    pool = ParsePool({'parse_workers': 1, 'parse_queue': 1})
+    fetcher = AsyncFetcher({'max_concurrency': 4, 'throttle_max_delay': 0.05})
+    urls = site.urls(5) + [f'http://127.0.0.1:{closed_port()}/']
+    try:
+        results = pool.fetch_and_extract(fetcher, urls, ExtractionSchema.coerce('p.item'), first_page=1)
+    finally:
+        fetcher.close()
+        pool.close()
+        site.close()
+    for index, (response, elements) in enumerate(results[:5]):
+        assert response.status_code == 200
+        assert [(element.url, element.page) for element in elements] == [(urls[index], index + 1)] * 3
+    response, elements = results[5]
+    assert isinstance(response, requests.exceptions.ConnectionError) and elements is response
@@ -0,0 +1,131 @@
+import argparse
+import pytest
+from bs4 import BeautifulSoup
+from cli import build_schema
+from modules.exporters import field_value
+from modules.parsing import (ExtractionSchema, StreamingNotSupported, extract_elements, parse_document,
+                             stream_extract, strainer_for_selector)
+
+PAGE = b'''<html><head><title>Shop</title></head><body>
+<div class="item featured" id="first"><section class="item">Outer <span class="price">$1</span>
+  <section class="item inner">Inner</section></section></div>
+<ul><li><a href="/a" rel="next">A</a></li><li><a href="https://example.com/b" data-kind="ext ad">B</a></li></ul>
+<p class="note">Note</p><span lang="en-US">Hello</span>
+</body></html>'''
+
+SELECTORS = [
+    'section.item',
+    'div.item, a',
+    'a[href^="/"], a[href$=".com/b"], a[data-kind~="ad"]',
+    'a[rel], span[lang|="en"], p[class*="ote"]',
+    '#first, span.price',
+    'div.featured.item',
+]
+
+
+def full_parse(selector):
+    """What a plain, unstrained BeautifulSoup parse selects"""
+    soup = BeautifulSoup(PAGE, 'html.parser')
+    return sorted((tag.name, tag.text.strip()) for tag in soup.select(selector))
+
+
+def records(elements):
+    return sorted((element.name, element.text) for element in elements)
+
+
+@pytest.mark.parametrize('parser', ['html.parser', 'lxml'])
+@pytest.mark.parametrize('selector', SELECTORS)
+def test_strained_parse_matches_full_parse(selector, parser):
+    if parser == 'lxml':
+        expected = sorted((tag.name, tag.text.strip()) for tag in BeautifulSoup(PAGE, 'lxml').select(selector))
+    else:
+        expected = full_parse(selector)
+    assert records(extract_elements(PAGE, selector, {'parser': parser})) == expected
+
+
+@pytest.mark.parametrize('selector', SELECTORS)
+def test_stream_extract_matches_full_parse(selector):
+    chunks = [PAGE[start:start + 37] for start in range(0, len(PAGE), 37)]
+    assert records(stream_extract(chunks, selector)) == sorted(
+        (tag.name, tag.text.strip()) for tag in BeautifulSoup(PAGE, 'lxml').select(selector))
+
+
+def test_nested_matches_stream_inner_first_with_full_text():
+    texts = [element.text for element in stream_extract([PAGE], 'section.item')]
+    assert texts[0] == 'Inner'
+    assert texts[1].startswith('Outer $1') and texts[1].endswith('Inner')
+
+
+@pytest.mark.parametrize('selector', ['ul > li > a', 'li:first-child a', 'div section', '.price', 'a, p + span'])
+def test_complex_selectors_fall_back_to_a_full_parse(selector):
+    assert strainer_for_selector(selector) is None
+    assert records(extract_elements(PAGE, selector)) == full_parse(selector)
+
+
+@pytest.mark.parametrize('selector', ['ul > li > a', 'li:first-child a', 'div section'])
+def test_complex_selectors_are_not_streamed(selector):
+    with pytest.raises(StreamingNotSupported):
+        list(stream_extract([PAGE], selector))
+
+
+def test_strainer_keeps_only_named_tags():
+    soup = parse_document(PAGE, {}, 'a[href], span.price')
+    assert sorted({tag.name for tag in soup.find_all(True)}) == ['a', 'span']
+    assert len(parse_document(PAGE, {'strain': False}, 'a').find_all('section')) == 2
+
+
+def test_stream_extract_keeps_whitespace_like_beautifulsoup():
+    page = b'<div class="c">a <b>b</b>\n   <i>c</i></div><pre>x <span class="c">\n  y <b>z</b>\n  </span></pre>'
+    expected = [tag.text.strip() for tag in BeautifulSoup(page, 'lxml').select('.c')]
+    assert sorted(element.text for element in stream_extract([page], '.c')) == sorted(expected)
+
+
+CATALOG = b'''<div class="product"><h2>Widget</h2><span class="price">$10</span><a href="/w">More</a></div>
+<div class="product"><h2>Gadget</h2><a href="/g">More</a></div>
+<div class="product"><h2>Gizmo</h2><span class="price">$30</span><img src="/z.png" alt="Gizmo photo"></div>'''
+
+
+def test_fields_come_out_in_document_order_when_a_record_lacks_one():
+    schema = ExtractionSchema({'name': 'h2', 'price': 'span.price', 'link': 'a[href]'})
+    elements = extract_elements(CATALOG, schema, url='http://example.com/', page=2)
+    assert [(element.field, element.text) for element in elements] == [
+        ('name', 'Widget'), ('price', '$10'), ('link', 'More'),
+        ('name', 'Gadget'), ('link', 'More'),
+        ('name', 'Gizmo'), ('price', '$30')]
+    assert {(element.url, element.page) for element in elements} == {('http://example.com/', 2)}
+    assert [schema.text_line(element) for element in elements[:2]] == ['name: Widget', 'price: $10']
+
+
+def test_attribute_fields_keep_their_attributes_for_export():
+    schema = ExtractionSchema({'link': 'a[href^="/"]', 'image': 'img[alt]'})
+    elements = extract_elements(CATALOG, schema)
+    rows = [{field: field_value(element, field) for field in ('field', 'tag', 'href', 'src', 'alt')}
+            for element in elements]
+    assert rows == [
+        {'field': 'link', 'tag': 'a', 'href': '/w', 'src': '', 'alt': ''},
+        {'field': 'link', 'tag': 'a', 'href': '/g', 'src': '', 'alt': ''},
+        {'field': 'image', 'tag': 'img', 'href': '', 'src': '/z.png', 'alt': 'Gizmo photo'}]
+
+
+def test_one_field_matching_a_tag_twice_and_overlapping_fields():
+    schema = ExtractionSchema({'any': 'h2, span', 'price': '.price'})
+    fields = [(element.field, element.text) for element in extract_elements(CATALOG, schema)]
+    assert fields[:3] == [('any', 'Widget'), ('any', '$10'), ('price', '$10')]
+
+
+def test_plain_selector_is_the_single_field_shape():
+    schema = ExtractionSchema.coerce('span.price')
+    assert schema.fields == {'span.price': 'span.price'} and not schema.is_multi_field
+    assert ExtractionSchema.coerce(schema) is schema
+    elements = extract_elements(CATALOG, 'span.price')
+    assert [schema.text_line(element) for element in elements] == ['$10', '$30']
+    assert [element.field for element in elements] == ['span.price', 'span.price']
+    with pytest.raises(ValueError):
+        ExtractionSchema({'empty': ''})
+
+
+def test_cli_keeps_a_lone_selector_as_a_string():
+    args = argparse.Namespace(selector='a', field=[])
+    assert build_schema(args) == 'a'
+    schema = build_schema(argparse.Namespace(selector='a', field=['price=span.price']))
+    assert schema.fields == {'selector': 'a', 'price': 'span.price'}
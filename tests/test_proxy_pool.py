@@ -0,0 +1,65 @@
+import random
+import time
+from mock_site import MockSite
+from modules.proxy_pool import ProxyPool
+from tests.test_async_fetcher import closed_port
+
+
+def test_consecutive_failures_quarantine_a_proxy_with_growing_backoff():
+    pool = ProxyPool({'proxy_list': ['127.0.0.1:1', '127.0.0.1:2'], 'proxy_max_errors': 2, 'proxy_quarantine': 30})
+    bad, good = pool.proxies
+    pool.record(bad, 1.0, False)
+    pool.record(bad, 1.0, True)  # A success resets the run of errors
+    pool.record(bad, 1.0, False)
+    assert pool.available() == [bad, good]
+    pool.record(bad, 1.0, False)
+    assert pool.available() == [good]
+    assert bad.quarantined_until - time.monotonic() > 29
+    assert all(pool.acquire() is good for _ in range(20))
+
+    bad.quarantined_until = 0.0  # Quarantine over: one more failure sends it straight back, for twice as long
+    pool.record(bad, 1.0, False)
+    assert bad.quarantined_until - time.monotonic() > 59
+
+
+def test_health_check_readmits_a_quarantined_proxy():
+    site = MockSite(elements=1).start()  # Answers absolute-URL requests, so it works as an HTTP proxy
+    try:
+        pool = ProxyPool({'proxy_list': [site.base_url, f'127.0.0.1:{closed_port()}'], 'proxy_max_errors': 1,
+                          'proxy_check_url': 'http://example.invalid/item/0', 'timeout': 2})
+        live, dead = pool.proxies
+        for proxy in pool.proxies:
+            pool.record(proxy, 1.0, False)
+            proxy.quarantined_until = time.monotonic() - 1  # Expired, due for a check
+        assert pool.due_for_check() == [live, dead]
+        for proxy in pool.due_for_check():
+            pool.check(proxy)
+    finally:
+        site.close()
+    assert live.quarantines == 0 and live in pool.available()
+    assert dead.quarantines == 2 and dead not in pool.available()
+
+
+def test_selection_favours_fast_reliable_proxies():
+    pool = ProxyPool({'proxy_list': ['fast:1', 'slow:1', 'flaky:1'], 'proxy_max_errors': 100})
+    fast, slow, flaky = pool.proxies
+    for _ in range(10):
+        pool.record(fast, 0.1, True)
+        pool.record(slow, 1.0, True)
+        pool.record(flaky, 0.1, False)
+    assert flaky.success < 0.1 < 0.99 < fast.success
+    random.seed(1)
+    picks = {proxy.url: 0 for proxy in pool.proxies}
+    for _ in range(1000):
+        proxy = pool.acquire()
+        proxy.in_flight -= 1
+        picks[proxy.url] += 1
+    assert picks['http://fast:1'] > 5 * picks['http://slow:1'] > 5 * picks['http://flaky:1']
+    assert pool.best() is fast
+
+
+def test_in_flight_requests_spread_load():
+    pool = ProxyPool({'proxy_list': ['a:1', 'b:1']})
+    a, b = pool.proxies
+    a.in_flight = 9
+    assert pool.best() is b
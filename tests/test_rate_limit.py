@@ -0,0 +1,78 @@
+import time
+from email.utils import formatdate
+import pytest
+from modules.rate_limit import AdaptiveRateLimiter, HostThrottle, parse_retry_after
+
+
+def test_retry_after_delta_seconds():
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after('0') == 0
+    assert parse_retry_after('-5') == 0
+
+
+@pytest.mark.parametrize('value', [None, '', 'soon', 'Wed, 99 Foo 2024 25:00:00 GMT'])
+def test_retry_after_missing_or_malformed(value):
+    assert parse_retry_after(value) is None
+
+
+def test_retry_after_http_date():
+    assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+    assert parse_retry_after(formatdate(time.time() - 3600, usegmt=True)) == 0
+
+
+def test_throttled_response_backs_off_and_halves_concurrency():
+    throttle = HostThrottle({'per_host_concurrency': 8})
+    throttle.record(429, 0.1)
+    assert (throttle.delay, throttle.concurrency) == (0.25, 4)
+    throttle.record(None, 5.0)  # Connection failure
+    assert (throttle.delay, throttle.concurrency) == (0.5, 2)
+    assert throttle.throttled == 2
+
+
+def test_delay_is_capped_and_retry_after_blocks_the_host():
+    throttle = HostThrottle({'throttle_max_delay': 1})
+    for _ in range(5):
+        throttle.record(503, 0.1, retry_after=30)
+    assert throttle.delay == 1
+    wait = throttle.try_acquire()
+    assert 0.5 < wait <= 1  # Retry-After is capped at the maximum delay too
+
+
+def test_successes_move_delay_to_latency_over_target_concurrency():
+    throttle = HostThrottle({'per_host_concurrency': 4, 'throttle_start_delay': 2})
+    for _ in range(20):
+        throttle.record(200, 0.4)
+    assert throttle.delay == pytest.approx(0.1, rel=0.01)
+    throttle.record(404, 0.0)
+    assert throttle.delay == pytest.approx(0.1, rel=0.01)  # Fast error pages do not speed things up
+
+
+def test_concurrency_recovers_one_step_per_round_of_successes():
+    throttle = HostThrottle({'per_host_concurrency': 4})
+    throttle.record(429, 0.1)
+    throttle.record(429, 0.1)
+    assert throttle.concurrency == 1
+    throttle.record(200, 0.01)
+    assert throttle.concurrency == 2
+    throttle.record(200, 0.01)
+    assert throttle.concurrency == 2
+    throttle.record(200, 0.01)
+    assert throttle.concurrency == 3
+
+
+def test_in_flight_requests_are_capped_at_the_concurrency_limit():
+    throttle = HostThrottle({'per_host_concurrency': 2})
+    assert throttle.try_acquire() == 0
+    assert throttle.try_acquire() == 0
+    assert throttle.try_acquire() > 0
+    throttle.release()
+    assert throttle.try_acquire() == 0
+    assert throttle.in_flight == 2
+
+
+def test_limiter_keeps_one_throttle_per_host():
+    limiter = AdaptiveRateLimiter({})
+    limiter.record('http://A.example/1', 429, 0.1, {'Retry-After': '1'})
+    assert limiter.host('http://a.example/2') is limiter.host('http://A.example/1')
+    assert limiter.host('http://b.example/').throttled == 0
+    assert limiter.host('http://a.example/').try_acquire() > 0.5
@@ -0,0 +1,25 @@
+from modules.tor_control import TorIdentityRotator
+
+
+class SilentController:
+    """Accepts NEWNYM but never delivers Tor's SIGNAL event"""
+
+    def __init__(self):
+        self.signals = 0
+
+    def is_newnym_available(self):
+        return True
+
+    def signal(self, signal):
+        self.signals += 1
+
+
+def test_rotate_every_counts_from_the_newnym_signal():
+    rotator = TorIdentityRotator({'tor_rotate_every': 3})
+    rotator.controller = SilentController()
+    for _ in range(9):
+        rotator.record(200, 0.1)
+        pending = rotator.pending
+        if pending:
+            pending.join()
+    assert rotator.controller.signals == 3